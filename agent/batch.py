@@ -0,0 +1,136 @@
+import json
+import time
+import queue
+import logging
+import threading
+import traceback
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from agent.tools.llm_cache import LLMCache, CachedLLMClient
+from agent.tools.artifact_store import artifact_store_for
+from agent.tools.llm_pool import create_pooled_openai_client, ConcurrencyLimitedClient
+
+# Поля проєкту в маніфесті, які перевизначають загальні налаштування запуску
+PROJECT_OPTIONS = {"convert_mode", "max_workers", "incremental", "stream_plan", "validate"}
+
+
+def load_batch_manifest(path: str) -> List[Dict[str, Any]]:
+    """
+    Маніфест пакетного запуску — JSON:
+    {"projects": [{"input": "...", "output": "...", "name": "...", "convert_mode": "chunked"}, ...]}
+    або просто список таких об'єктів. Output-директорії мають бути різними: у них живуть
+    маніфест, артефакти й чекпойнти проєкту, і за ними ж ведеться звіт.
+    """
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    projects = data.get("projects", []) if isinstance(data, dict) else data
+    outputs = {}
+    for i, project in enumerate(projects):
+        if not project.get("input") or not project.get("output"):
+            raise ValueError(f"❌ Проєкт #{i} у маніфесті {path} не має input/output")
+        output = str(Path(project["output"]).resolve())
+        if output in outputs:
+            raise ValueError(f"❌ Проєкти #{outputs[output]} і #{i} у маніфесті {path} мають однаковий output")
+        outputs[output] = i
+        project.setdefault("name", Path(project["input"]).name)
+    return projects
+
+
+def _run_job(job: Dict[str, Any], client, defaults: Dict[str, Any], status: Dict[str, Any]):
+    from agent.graph import run_conversion_pipeline
+
+    options = {**defaults, **{k: v for k, v in job.items() if k in PROJECT_OPTIONS}}
+    status.update(state="running", started=time.time())
+    logging.info(f"📦 [{job['name']}] conversion started")
+    try:
+        result = run_conversion_pipeline(job["input"], job["output"], client=client, **options)
+        store = artifact_store_for(job["output"])
+        status.update(
+            state="done",
+            apps=len(store.keys(result.get("django_plan"))),
+            templates=len(store.get(result.get("converted_templates"), [])),
+            valid=(result.get("validation") or {}).get("ok"),
+            node_timings={k: round(v["duration"], 3) for k, v in result.get("node_timings", {}).items()},
+        )
+    except Exception as e:
+        status.update(state="failed", error=f"{type(e).__name__}: {e}", traceback=traceback.format_exc())
+        logging.error(f"❌ [{job['name']}] conversion failed: {e}")
+    finally:
+        status["finished"] = time.time()
+        status["duration"] = round(status["finished"] - status["started"], 3)
+        logging.info(f"📦 [{job['name']}] {status['state']} in {status['duration']:.2f}s")
+
+
+def run_batch(manifest_path: str, report_path: str = "batch_report.json", projects_parallel: int = 4,
+              max_in_flight: int = 16, cache_dir: str = ".llm_cache", use_cache: bool = True,
+              convert_mode: str = "single", max_workers: int = 4, incremental: bool = True,
+              stream_plan: bool = False, validate: bool = True) -> Dict[str, Any]:
+    """
+    Конвертує всі проєкти з маніфесту в одному процесі.
+    Проєкти беруться з черги projects_parallel воркерами; усі вони ділять один
+    OpenAI-клієнт з пулом з'єднань, спільний кеш і глобальний ліміт max_in_flight
+    одночасних LLM-запитів. Наприкінці пише зведений звіт у report_path.
+    """
+    projects = load_batch_manifest(manifest_path)
+    logging.info(f"📦 Batch: {len(projects)} projects, {projects_parallel} parallel, "
+                 f"≤{max_in_flight} LLM requests in flight")
+
+    # ліміт — лише на справжні запити, кеш — поверх нього: влучання в кеш не займають слот
+    limited = ConcurrencyLimitedClient(create_pooled_openai_client(max_connections=max_in_flight), max_in_flight)
+    client, cache = limited, None
+    if use_cache:
+        cache = LLMCache(cache_dir)
+        client = CachedLLMClient(limited, cache)
+
+    defaults = {"convert_mode": convert_mode, "max_workers": max_workers,
+                "incremental": incremental, "stream_plan": stream_plan, "validate": validate}
+    jobs: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+    # статуси — за output: імена проєктів (за замовчуванням — ім'я input-директорії) можуть повторюватися
+    statuses: Dict[str, Dict[str, Any]] = {}
+    for project in projects:
+        statuses[project["output"]] = {"name": project["name"], "input": project["input"], "state": "pending"}
+        jobs.put(project)
+
+    def worker():
+        while True:
+            job = jobs.get()
+            if job is None:
+                return
+            _run_job(job, client, defaults, statuses[job["output"]])
+
+    started = time.time()
+    threads = [threading.Thread(target=worker, name=f"batch-{i}", daemon=True)
+               for i in range(max(1, min(projects_parallel, len(projects))))]
+    for thread in threads:
+        jobs.put(None)
+        thread.start()
+    cache_stats = None
+    try:
+        for thread in threads:
+            thread.join()
+    finally:
+        if cache:
+            cache_stats = cache.stats()
+            cache.close()
+
+    report = {
+        "manifest": str(manifest_path),
+        "duration": round(time.time() - started, 3),
+        "done": sum(s["state"] == "done" for s in statuses.values()),
+        "failed": sum(s["state"] == "failed" for s in statuses.values()),
+        "llm": limited.stats(),
+        "cache": cache_stats,
+        "projects": statuses,
+    }
+    Path(report_path).write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    logging.info(batch_summary(report))
+    logging.info(f"🧾 Batch report → {report_path}")
+    return report
+
+
+def batch_summary(report: Dict[str, Any]) -> str:
+    lines = [f"📦 Batch finished in {report['duration']:.2f}s: {report['done']} done, {report['failed']} failed "
+             f"(LLM requests: {report['llm']['requests']}, peak in flight: {report['llm']['peak_in_flight']})"]
+    for output, status in report["projects"].items():
+        mark = {"done": "✅", "failed": "❌"}.get(status["state"], "⏳")
+        lines.append(f"  {mark} {status['name']:<24} {status.get('duration', 0):8.2f}s  {output}  {status.get('error', '')}")
+    return "\n".join(lines)
@@ -1,58 +1,266 @@
-from langgraph.graph import StateGraph
+import time
+import uuid
+import asyncio
+import inspect
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+import aiosqlite
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from langgraph.graph import StateGraph, START, END
 from agent.state import ConversionState
-from openai import OpenAI
+from openai import AsyncOpenAI
 import logging
 from agent.nodes.planner_node import LLMPlannerNode
+from agent.nodes.parser_node import RailsParserNode
 from agent.nodes.discovery_node import LLMDiscoveryNode
 from agent.nodes.converter_node import LLMConverterNode
 from agent.nodes.builder_node import LLMProjectBuilderNode
+from agent.nodes.template_node import TemplateConverterNode
 from agent.nodes.integration_node import LLMIntegrationNode
+from agent.nodes.validator_node import DjangoValidatorNode
+from agent.tools.llm_cache import LLMCache, AsyncCachedLLMClient
+from agent.tools.prompt_budget import start_token_usage, token_usage_report
+from agent.tools.model_router import routing_report, start_route_stats
+from agent.tools.profiler import AsyncProfiledLLMClient, current_profiler, start_profiler
+from agent.tools.async_client import as_async_client
+from agent.tools.validator import start_validator
+from agent.tools.artifact_store import ArtifactRef, artifact_store_for
+
+
+# Окремий SQLite-файл на запуск: конкурентні й пакетні запуски не ділять одну базу
+CHECKPOINT_DB = ".checkpoints/{run_id}.sqlite"
+
+# Залежності між вузлами: вузол стартує, коли завершились усі його попередники.
+# planner і parser не залежать один від одного, discovery і converter — теж,
+# тож LLM-виклики цих пар перекриваються у часі. Конвертація шаблонів (CPU)
+# іде паралельно з builder і LLM-викликами readme/requirements; валідація
+# згенерованого проєкту — паралельно з readme/requirements.
+PIPELINE_EDGES = [
+    (START, "planner"),
+    (START, "parser"),
+    ("parser", "discovery"),
+    (["planner", "parser"], "converter"),
+    (["discovery", "converter"], "builder"),
+    ("builder", "readme"),
+    ("builder", "requirements"),
+    ("builder", "validator"),
+    ("converter", "templates"),
+    (["readme", "requirements", "templates", "validator"], END),
+]
+
+
+def timed_node(name: str, func):
+    """
+    Обгортка, що записує start/end/duration вузла у state.node_timings.
+    Синхронні (CPU/диск) вузли виконуються у пулі потоків, щоб не блокувати цикл подій
+    для інших конверсій, які він обслуговує.
+    """
+    is_async = inspect.iscoroutinefunction(func) or inspect.iscoroutinefunction(getattr(func, "__call__", None))
+
+    async def wrapper(state: ConversionState):
+        started = time.time()
+        with current_profiler().span(name, node=name):
+            if is_async:
+                updates = await func(state) or {}
+            else:
+                updates = await asyncio.to_thread(func, state) or {}
+        finished = time.time()
+        updates["node_timings"] = {name: {"start": started, "end": finished, "duration": finished - started}}
+        return updates
+
+    return wrapper
 
 
 def build_conversion_graph(client):
     from agent.nodes.planner_node import LLMPlannerNode
+    from agent.nodes.parser_node import RailsParserNode
     from agent.nodes.discovery_node import LLMDiscoveryNode
     from agent.nodes.converter_node import LLMConverterNode
     from agent.nodes.builder_node import LLMProjectBuilderNode
+    from agent.nodes.template_node import TemplateConverterNode
     from agent.nodes.integration_node import LLMIntegrationNode
+    from agent.nodes.validator_node import DjangoValidatorNode
     from agent.state import ConversionState  # ensure import
 
     # ✅ use ConversionState, not StateGraph
     graph = StateGraph(ConversionState)
 
-    planner = LLMPlannerNode(client)
-    discovery = LLMDiscoveryNode(client)
-    converter = LLMConverterNode(client)
-    builder = LLMProjectBuilderNode()
     integrator = LLMIntegrationNode(client)
+    nodes = {
+        "planner": LLMPlannerNode(client),
+        "parser": RailsParserNode(),
+        "discovery": LLMDiscoveryNode(client),
+        "converter": LLMConverterNode(client),
+        "builder": LLMProjectBuilderNode(),
+        "templates": TemplateConverterNode(),
+        "validator": DjangoValidatorNode(),
+        "readme": integrator.generate_readme,
+        "requirements": integrator.generate_requirements,
+    }
+    for name, node in nodes.items():
+        graph.add_node(name, timed_node(name, node))
 
-    graph.add_node("planner", planner)
-    graph.add_node("discovery", discovery)
-    graph.add_node("converter", converter)
-    graph.add_node("builder", builder)
-    graph.add_node("integrator", integrator)
+    # ✅ паралельні гілки: список джерел у add_edge — це join
+    for source, target in PIPELINE_EDGES:
+        graph.add_edge(source, target)
 
-    # ✅ modern LangGraph API
-    graph.set_entry_point("planner")  # instead of set_entry()
+    return graph
 
-    graph.add_edge("planner", "discovery")
-    graph.add_edge("discovery", "converter")
-    graph.add_edge("converter", "builder")
-    graph.add_edge("builder", "integrator")
 
-    return graph
+def _predecessors() -> dict:
+    """{вузол: [вузли, на які він чекає]} з PIPELINE_EDGES (без START/END)."""
+    predecessors = {}
+    for source, target in PIPELINE_EDGES:
+        sources = source if isinstance(source, list) else [source]
+        predecessors.setdefault(target, []).extend(s for s in sources if s != START)
+    return predecessors
 
 
-def run_conversion_pipeline(input_dir: str, output_dir: str, log_path=None):
-    """Запуск конверсії Rails → Django через LangGraph."""
+def critical_path_report(node_timings: dict) -> str:
+    """
+    Відновлює критичний шлях за фактичними часами: від вузла, що завершився
+    останнім, рухаємось ребрами PIPELINE_EDGES назад — до того з його попередників,
+    який завершився найпізніше (саме він і тримав старт вузла).
+    """
+    if not node_timings:
+        return "⚠️ Немає даних про час виконання вузлів."
+
+    wall_start = min(t["start"] for t in node_timings.values())
+    wall_end = max(t["end"] for t in node_timings.values())
+    wall = max(wall_end - wall_start, 1e-9)
+
+    predecessors = _predecessors()
+    path = [max(node_timings, key=lambda n: node_timings[n]["end"])]
+    while True:
+        gating = [n for n in predecessors.get(path[-1], ()) if n in node_timings]
+        if not gating:
+            break
+        path.append(max(gating, key=lambda n: node_timings[n]["end"]))
+    path.reverse()
+
+    lines = [f"⏱️ Critical path ({wall:.2f}s wall): {' → '.join(path)}"]
+    for name in sorted(node_timings, key=lambda n: node_timings[n]["start"]):
+        t = node_timings[name]
+        marker = "★" if name in path else " "
+        lines.append(
+            f"  {marker} {name:<13} {t['duration']:8.2f}s  "
+            f"[{t['start'] - wall_start:7.2f} → {t['end'] - wall_start:7.2f}]  "
+            f"{100 * t['duration'] / wall:5.1f}%"
+        )
+    return "\n".join(lines)
+
+
+async def arun_conversion_pipeline(input_dir: Optional[str], output_dir: Optional[str], log_path=None,
+                                   cache_dir: str = ".llm_cache", use_cache: bool = True,
+                                   convert_mode: str = "single", max_workers: int = 4,
+                                   incremental: bool = True, stream_plan: bool = False,
+                                   validate: bool = True, profile_path: Optional[str] = None, client=None,
+                                   checkpoint_db: Optional[str] = CHECKPOINT_DB,
+                                   run_id: Optional[str] = None, resume: bool = False,
+                                   from_node: Optional[str] = None, timeout: Optional[float] = None):
+    """
+    Асинхронний запуск конверсії Rails → Django через LangGraph.
+    Один цикл подій може вести багато конверсій одночасно (asyncio.gather / create_task);
+    скасування задачі або timeout зупиняють запуск, а чекпойнти дозволяють продовжити його з resume=True.
+    :param validate: перевірити згенерований проєкт у теплому процесі-валідаторі
+    :param profile_path: якщо задано — профілювання вузлів і LLM-викликів,
+                         Chrome trace записується за цим шляхом
+    :param client: готовий (спільний) LLM-клієнт — AsyncOpenAI або синхронний (виклики підуть у потоки);
+                   кешем і лімітами тоді керує викликач, cache_dir/use_cache ігноруються
+    :param checkpoint_db: SQLite-файл чекпойнтів (стан після кожного вузла), {run_id} підставляється;
+                          None — без чекпойнтів
+    :param run_id: ідентифікатор запуску; для нового запуску генерується
+    :param resume: продовжити run_id з останнього успішного вузла
+    :param from_node: перезапустити run_id, починаючи з вузла (напр. "converter")
+    :param timeout: ліміт часу на весь запуск, с (asyncio.TimeoutError після скасування)
+    """
     from agent.nodes.executor_node import ExecutorNode  # імпорт сюди, щоб уникнути циклу
 
-    client = OpenAI()
-    state = ConversionState(input_dir=input_dir, output_dir=output_dir)
+    # статистика, профіль і валідатор — свої для кожного запуску (contextvars), як і токени
+    tokens_sent = start_token_usage()
+    route_stats = start_route_stats()
+    validator = start_validator()
+    cache, owned_client = None, None
+    if client is None:
+        client = owned_client = AsyncOpenAI()
+        if use_cache:
+            cache = LLMCache(cache_dir)
+            client = AsyncCachedLLMClient(client, cache)
+            logging.info(f"💾 LLM cache enabled → {cache.db_path}")
+    else:
+        client = as_async_client(client)
+    profiler = None
+    if profile_path:
+        profiler = start_profiler()
+        client = AsyncProfiledLLMClient(client)
+    if resume or from_node:
+        if not run_id:
+            raise ValueError("❌ run_id is required to resume a run.")
+        state = None
+    else:
+        state = ConversionState(
+            input_dir=input_dir,
+            output_dir=output_dir,
+            log_path=str(log_path) if log_path else None,
+            convert_mode=convert_mode,
+            max_workers=max_workers,
+            incremental=incremental,
+            stream_plan=stream_plan,
+            validate_project=validate,
+        )
+        run_id = run_id or f"{datetime.now():%Y%m%d_%H%M%S}_{uuid.uuid4().hex[:6]}"
+        if validate:
+            validator.warm_up()
+
+    checkpointer = None
+    if checkpoint_db:
+        checkpoint_db = checkpoint_db.format(run_id=run_id)
+        Path(checkpoint_db).parent.mkdir(parents=True, exist_ok=True)
+        checkpointer = AsyncSqliteSaver(await aiosqlite.connect(checkpoint_db))
+        logging.info(f"🧷 Run id: {run_id} (checkpoints → {checkpoint_db}; resume with --resume {run_id})")
     logging.info("🚀 Building conversion graph...")
 
     executor = ExecutorNode(client, build_graph_func=build_conversion_graph)
-    result = executor.run(state)
+    try:
+        result = await asyncio.wait_for(
+            executor.arun(state, checkpointer=checkpointer, run_id=run_id, from_node=from_node), timeout
+        )
+    except asyncio.TimeoutError:
+        logging.error(f"⏰ Run {run_id} timed out after {timeout}s"
+                      + (f" — resume with --resume {run_id}" if checkpointer else ""))
+        raise
+    except asyncio.CancelledError:
+        logging.warning(f"⛔ Run {run_id} cancelled" + (f" — resume with --resume {run_id}" if checkpointer else ""))
+        raise
+    finally:
+        if cache:
+            logging.info(f"💾 LLM cache stats: {cache.stats()}")
+            cache.close()
+        if checkpointer:
+            await checkpointer.conn.close()
+        if owned_client:
+            await owned_client.close()
+        if profiler:
+            profiler.disable()
+        validator.close()
+
+    # артефакти минулих запусків у output_dir більше не потрібні: лишаються ті, на які посилається стан
+    pruned = artifact_store_for(result["output_dir"]).prune(
+        v for v in result.values() if isinstance(v, ArtifactRef))
+    if pruned:
+        logging.info(f"🧹 {pruned} stale artifacts pruned")
 
+    logging.info(critical_path_report(result.get("node_timings", {})))
+    logging.info(token_usage_report(tokens_sent))
+    logging.info(routing_report(route_stats))
+    if profiler:
+        logging.info(profiler.summary())
+        profiler.export_chrome_trace(profile_path)
     logging.info("✅ Conversion complete.")
     return result
+
+
+def run_conversion_pipeline(*args, **kwargs):
+    """Синхронна обгортка над arun_conversion_pipeline (ті самі параметри; власний цикл подій)."""
+    return asyncio.run(arun_conversion_pipeline(*args, **kwargs))
@@ -1,10 +1,10 @@
-import os
-import json
 import logging
-import subprocess
 from pathlib import Path
-from agent.tools.django_builder import build_django_project
+from agent.tools.django_builder import build_django_project, apps_to_build, project_root_for
+from agent.tools.artifact_store import artifact_store_for
 from agent.tools.log_utils import log_state
+from agent.tools.manifest import save_manifest
+from agent.nodes.template_node import rails_view_templates
 from agent.state import ConversionState
 
 
@@ -22,17 +22,31 @@ class LLMProjectBuilderNode:
             raise ValueError("❌ Missing Django plan in state — run converter first.")
 
         out_dir = Path(state.output_dir).resolve()
-        proj_name = "converted_project"
-
-        # --- 1️⃣ створюємо базову структуру проєкту ---
-        subprocess.run(["django-admin", "startproject", proj_name, str(out_dir)], check=False)
-        state.project_root = str(out_dir / proj_name)
-
-        # --- 2️⃣ будуємо внутрішні Django-app-и ---
-        build_django_project(state.django_plan, Path(state.project_root))
+        out_dir.mkdir(parents=True, exist_ok=True)
+
+        # --- 1️⃣ каркас проєкту і внутрішні Django-app-и (крім уже записаних під час стрімінгу) ---
+        # зі сховища читаються лише apps, які перебудовуються
+        store = artifact_store_for(state.output_dir)
+        state.project_root = str(project_root_for(state.output_dir))
+        root = Path(state.project_root)
+        names = store.keys(state.django_plan)
+        apps = store.get(state.django_plan, keys=apps_to_build(names, root, state.affected_apps, state.prebuilt_apps))
+        manifest_files = store.get(state.manifest_files)
+        build_django_project(
+            {"apps": list(apps.values())},
+            root,
+            # шаблони з Rails-джерелом пише TemplateConverterNode
+            skip_templates=rails_view_templates(manifest_files).values(),
+            max_workers=state.max_workers,
+            project_apps=names,
+        )
+
+        # --- 2️⃣ маніфест для наступного інкрементального запуску ---
+        if manifest_files is not None and state.plan_units is not None:
+            save_manifest(state.output_dir, manifest_files, store.get(state.plan_units))
 
         # --- 3️⃣ логування ---
         log_state(node, state)
         logging.info(f"✅ {node} completed. Project root: {state.project_root}")
 
-        return state
+        return {"project_root": state.project_root, "current_node": "builder"}
@@ -1,8 +1,29 @@
-import os
-import json
+import time
+import asyncio
 import logging
-from pathlib import Path
+import contextvars
+from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
 from agent.tools.log_utils import log_state, log_llm_call
+from agent.tools.plan_utils import split_rails_structure, merge_django_plans, parse_llm_json
+from agent.tools.manifest import load_manifest, hash_json
+from agent.tools.schema_parser import schema_plan_fragment, strip_models
+from agent.tools.prompt_budget import PayloadTooLargeError, budget_payload, log_prompt_tokens
+from agent.tools.json_stream import AppsStreamParser
+from agent.tools.django_builder import build_django_app, project_root_for
+from agent.tools.model_router import achat_completion, route_for
+from agent.tools.plan_schema import (
+    DjangoPlan, DjangoAppSpec, response_format, repair_items, repair_messages, is_valid,
+)
+from agent.tools.llm_cache import invalidate_cached
+from agent.tools.artifact_store import artifact_store_for
+from agent.tools.prompt_registry import PromptTemplate, load_prompt, prompt_text
+from agent.tools.scaffold_detector import (
+    detect_scaffolds, strip_scaffolds, scaffold_plan_fragment, claim_scaffold_models, claim_scaffold_mixins,
+)
+from agent.tools.dependency_graph import (
+    SCHEMA_PREFIX, build_unit_graph, conversion_waves, wave_dependencies, dependency_context,
+)
 from agent.state import ConversionState
 
 
@@ -11,46 +32,405 @@ class LLMConverterNode:
     Основний вузол для LLM-конвертації Rails структури у Django.
     Використовує промпт з описом Rails архітектури (з discovery_node)
     та генерує JSON-план Django-проєкту (apps, models, views, urls, templates).
+
+    Режими:
+    - single  — вся rails_structure в одному промпті;
+    - chunked — окремий виклик на кожну модель/контролер/шаблон, конкурентно
+      (не більше max_workers запитів одночасно), хвилями за графом залежностей
+      (agent/tools/dependency_graph.py): моделі → контролери → шаблони; кожна одиниця
+      отримує вже згенеровані визначення своїх залежностей.
+      Часткові плани зливаються у спільний {"apps": [...]}.
+
+    В інкрементальному режимі фрагменти плану незмінених одиниць беруться
+    з маніфесту попереднього запуску, а LLM викликається лише для змінених.
+
+    Зі stream_plan=True (режим single) відповідь читається стрімом, і кожна
+    завершена app одразу записується на диск, поки решта плану ще генерується.
+
+    Моделі, знайдені в db/schema.rb (state.schema_models), LLM не генерує:
+    у промпт потрапляють лише їхні назви, а готові визначення додаються в план
+    окремим фрагментом "__schema__".
+
+    Стандартні Rails-скафолди (agent/tools/scaffold_detector.py) конвертуються без LLM:
+    generic views, URLs і шаблони додаються фрагментом "__scaffold__", а в промпт
+    потрапляють лише нестандартні дії їхніх контролерів і фрагменти (фільтри, finder),
+    з яких LLM робить mixin-и для цих views.
+
+    Відповідь запитується у structured output (JSON Schema DjangoPlan) і валідується;
+    невалідна app перепитується окремо, повний повтор — лише якщо відповідь взагалі не план.
     """
 
-    def __init__(self, client, prompt_path="agent/prompts/convert_prompt.txt"):
+    def __init__(self, client, prompt_path: Optional[str] = None):
         self.client = client
-        self.prompt_path = Path(prompt_path)
+        self.prompt = load_prompt(prompt_path or "convert")
 
-    def __call__(self, state: ConversionState):
+    async def __call__(self, state: ConversionState):
         node = "LLMConverterNode"
-        logging.info(f"[3/6] 🔄 {node} started...")
+        logging.info(f"[3/6] 🔄 {node} started (mode={state.convert_mode})...")
 
         if not state.rails_structure:
             raise ValueError("❌ Missing Rails structure in state — run discovery first.")
 
-        # --- Крок 1: Підготовка промпта ---
-        prompt_template = self.prompt_path.read_text(encoding="utf-8")
-        prompt = (
-            prompt_template
-            .replace("{{rails_structure}}", json.dumps(state.rails_structure, indent=2))
+        store = artifact_store_for(state.output_dir)
+        schema_models = store.get(state.schema_models, [])
+        previous_units = load_manifest(state.output_dir)["units"] if state.incremental else {}
+        schema_names = {m["name"] for m in schema_models}
+        # уточнення запуску однакові для всіх одиниць — вони йдуть у кешований префікс
+        prompt = self.prompt.extend(
+            f"Models {', '.join(sorted(schema_names))} are generated from db/schema.rb: "
+            "reference them by name in views, but do not include them in \"models\"." if schema_names else ""
         )
+        rails_structure = store.get(state.rails_structure)
+        model_names = {m["name"] for m in rails_structure.get("models", [])} | schema_names
+        scaffolds = detect_scaffolds(rails_structure, model_names, state.input_dir)
+        if scaffolds:
+            placement = ", ".join(f"{s['model']} → \"{s['app']}\"" for s in scaffolds if s["model"] not in schema_names)
+            prompt = prompt.extend(
+                f"Controllers {', '.join(s['controller'] for s in scaffolds)} are standard scaffolds: their CRUD "
+                "views, urls and templates are generated without you — do not include them."
+                + (f" Put these models into the matching apps: {placement}." if placement else "")
+                + (" Their controllers' \"fragments\" are Rails filters and finders of those views: return each "
+                   "as a Python mixin class (e.g. overriding dispatch() or get_object()) named after its \"mixin\" "
+                   "field, in the \"mixins\" of the controller's app — the generated views already inherit it."
+                   if any(s["mixins"] for s in scaffolds) else "")
+            )
+            logging.info(f"🏗️ {len(scaffolds)} scaffold resources converted deterministically: "
+                         f"{', '.join(s['controller'] for s in scaffolds)}")
+        rails_structure = _without_schema_models(strip_scaffolds(rails_structure, scaffolds), schema_names)
 
-        # --- Крок 2: Виклик LLM ---
-        response = self.client.chat.completions.create(
-            model=os.getenv("MODEL_NAME", "gpt-4o"),
-            messages=[{"role": "user", "content": prompt}],
+        # проєкт, що не вміщується в один запит, не обрізається — конвертується по одиницях
+        mode = state.convert_mode
+        if mode != "chunked" and any(rails_structure.values()):
+            try:
+                self._single_messages(prompt, rails_structure)
+            except PayloadTooLargeError as e:
+                logging.warning(f"⚠️ {e} — switching to chunked mode.")
+                mode = "chunked"
+
+        if mode == "chunked":
+            units = [
+                u for u in split_rails_structure(rails_structure)
+                if not (u["kind"] == "model" and u["structure"]["models"][0]["name"] in schema_names)
+            ]
+            graph = build_unit_graph(units, schema_names)
+            waves = conversion_waves(graph)
+            dependencies = wave_dependencies(graph, waves)
+            by_key = {u["key"]: u for u in units}
+            units = [by_key[key] for wave in waves for key in wave]  # залежності — раніше за залежних
+            logging.info(f"🕸️ {len(units)} units in {len(waves)} dependency waves "
+                         f"(widest: {max(map(len, waves), default=0)})")
+        elif any(rails_structure.values()):
+            units = [{"key": "__all__", "kind": "project", "app": None, "structure": rails_structure}]
+            waves, dependencies = [["__all__"]], {}
+        else:
+            units, waves, dependencies = [], [], {}  # увесь проєкт — скафолди, LLM не потрібна
+        schema_by_name = {m["name"]: m for m in schema_models}
+
+        # --- Відбираємо одиниці, що змінилися з минулого запуску ---
+        # хеш одиниці включає хеші її залежностей: зміна моделі переконвертовує views, що від неї залежать
+        unit_records, pending = {}, []
+        for unit in units:
+            dep_hashes = [
+                hash_json(schema_by_name[dep[len(SCHEMA_PREFIX):]]) if dep.startswith(SCHEMA_PREFIX)
+                else unit_records[dep]["hash"]
+                for dep in dependencies.get(unit["key"], [])
+            ]
+            digest = hash_json([prompt.instructions, route_for("converter")["model"], unit["structure"]]
+                               + ([dep_hashes] if dep_hashes else []))
+            prev = previous_units.get(unit["key"])
+            # невдала конвертація минулого запуску (порожній або не-план) не перевикористовується
+            if prev and prev.get("hash") == digest and _is_plan(prev.get("plan")):
+                unit_records[unit["key"]] = prev
+            else:
+                unit_records[unit["key"]] = {"hash": digest, "sources": _unit_sources(unit), "plan": None}
+                pending.append(unit)
+        if previous_units:
+            logging.info(f"🧾 Units to convert: {len(pending)} of {len(units)} (rest reused from manifest)")
+        else:
+            logging.info(f"🧾 Units to convert: {len(pending)} (no manifest from a previous run)")
+
+        streamed_apps = []
+        if mode == "chunked":
+            fragments = await self._convert_waves(node, prompt, waves, pending, dependencies,
+                                                  unit_records, schema_by_name, state.max_workers)
+        elif state.stream_plan and pending:
+            fragments = {"__all__": await self._convert_streaming(node, prompt, rails_structure, state, streamed_apps)}
+        else:
+            fragments = {u["key"]: await self._convert_single(node, prompt, rails_structure) for u in pending}
+
+        for key, plan in fragments.items():
+            unit_records[key]["plan"] = plan
+
+        if mode == "chunked":
+            plans = [unit_records[u["key"]]["plan"] for u in units if unit_records[u["key"]]["plan"]]
+            django_plan = merge_django_plans(plans)
+        else:
+            django_plan = unit_records["__all__"]["plan"] if units else {"apps": []}
+
+        # --- Детерміновані скафолди: їхні views мають пріоритет над однойменними від LLM ---
+        if scaffolds:
+            fragment = scaffold_plan_fragment(scaffolds)
+            django_plan = claim_scaffold_models(merge_django_plans([fragment, django_plan]), scaffolds)
+            django_plan = claim_scaffold_mixins(django_plan, scaffolds)
+            self._record_fragment(unit_records, previous_units, pending, "__scaffold__", fragment,
+                                  sorted({src for s in scaffolds for src in s["sources"]}))
+            streamed_apps = [a for a in streamed_apps if a not in _plan_apps(fragment)]
+
+        # --- Детерміновані моделі зі схеми ---
+        if schema_models and isinstance(django_plan, dict) and "apps" in django_plan:
+            fragment = schema_plan_fragment(django_plan, schema_models)
+            django_plan = merge_django_plans([strip_models(django_plan, schema_names), fragment])
+            self._record_fragment(unit_records, previous_units, pending, "__schema__", fragment, ["db/schema.rb"])
+            # apps, записані під час стріму без моделей зі схеми, builder перезапише
+            streamed_apps = [a for a in streamed_apps if a not in _plan_apps(fragment)]
+            logging.info(f"🗄️ {len(schema_models)} models injected from schema, LLM models with the same names dropped")
+
+        # --- Оновлення стану: план зберігається по apps, builder читає лише потрібні ---
+        state.django_plan = store.put_parts({app["name"]: app for app in django_plan.get("apps", [])})
+        state.plan_units = store.put(unit_records)
+        state.affected_apps = _affected_apps(previous_units, unit_records, {u["key"] for u in pending})
+        log_state(node, state)
+
+        logging.info(f"✅ {node} completed. Django plan generated: {len(django_plan.get('apps', []))} apps.")
+        return {
+            "django_plan": state.django_plan,
+            "plan_units": state.plan_units,
+            "affected_apps": state.affected_apps,
+            "prebuilt_apps": streamed_apps,
+            "current_node": "converter",
+        }
+
+    @staticmethod
+    def _record_fragment(unit_records: dict, previous_units: dict, pending: list, key: str,
+                         fragment: dict, sources: list):
+        """Детермінований фрагмент плану як одиниця маніфесту: змінений — перебудовує свої apps."""
+        digest = hash_json(fragment)
+        prev = previous_units.get(key)
+        unit_records[key] = prev if prev and prev.get("hash") == digest else {
+            "hash": digest, "sources": sources, "plan": fragment,
+        }
+        if unit_records[key] is not prev:
+            pending.append({"key": key})
+
+    async def _complete(self, messages: list, schema=DjangoPlan, task: str = "converter") -> str:
+        log_prompt_tokens(task, prompt_text(messages))
+        response = await achat_completion(
+            self.client, task,
+            messages,
+            node="converter",
             temperature=0.3,
+            response_format=response_format(schema),
         )
-        llm_output = response.choices[0].message.content.strip()
+        return response.choices[0].message.content.strip()
 
-        log_llm_call(node, prompt, llm_output)
+    async def _repair_app(self, node: str, app, errors: str):
+        messages = repair_messages(app, errors, DjangoAppSpec, "You are fixing one app of a Django project plan.\n")
+        llm_output = await self._complete(messages, DjangoAppSpec, task="repair")
+        log_llm_call(f"{node}:repair", prompt_text(messages), llm_output)
+        repaired = parse_llm_json(llm_output)
+        if not is_valid(DjangoAppSpec, repaired):
+            invalidate_cached(self.client, llm_output)
+        return repaired
 
-        # --- Крок 3: Парсинг відповіді у JSON ---
-        try:
-            django_plan = json.loads(llm_output)
-        except json.JSONDecodeError:
-            logging.warning("⚠️ LLM output not valid JSON, wrapping raw text instead.")
-            django_plan = {"raw_plan": llm_output}
+    async def _validated_plan(self, node: str, messages: list, llm_output: str):
+        """
+        Валідує відповідь за DjangoPlan з адресним ремонтом невалідних apps.
+        Якщо відповідь не є планом навіть після ремонту — один повний повтор із поясненням.
+        :return: план (dict) або None
+        """
+        for attempt in range(2):
+            plan, repairs = await repair_items(parse_llm_json(llm_output), DjangoPlan, "apps", DjangoAppSpec,
+                                         lambda app, errors: self._repair_app(node, app, errors))
+            if repairs:
+                logging.info(f"🩹 {node}: {repairs} targeted repair call(s)")
+            if repairs or plan is None:
+                # відхилена відповідь не повинна повторюватися з кешу при наступному запуску
+                invalidate_cached(self.client, llm_output)
+            if plan is not None:
+                return plan.model_dump(exclude_none=True)
+            if attempt == 0:
+                logging.warning(f"⚠️ {node}: reply is not a valid plan, asking once more")
+                # повтор продовжує той самий діалог — префікс запиту лишається кешованим
+                retry = messages + [
+                    {"role": "assistant", "content": llm_output},
+                    {"role": "user", "content": "Your previous reply was not a valid JSON object with an \"apps\" array. "
+                                                "Reply with that JSON only."},
+                ]
+                llm_output = await self._complete(retry)
+                log_llm_call(f"{node}:retry", prompt_text(retry), llm_output)
+        return None
 
-        # --- Крок 4: Оновлення стану ---
-        state.django_plan = django_plan
-        log_state(node, state)
+    @staticmethod
+    def _single_messages(prompt: PromptTemplate, rails_structure: dict) -> list:
+        return prompt.messages({"Rails structure": budget_payload("converter", rails_structure, truncate=False)})
+
+    async def _convert_single(self, node: str, prompt: PromptTemplate, rails_structure: dict):
+        # --- Крок 1: Підготовка промпта ---
+        messages = self._single_messages(prompt, rails_structure)
+
+        # --- Крок 2: Виклик LLM ---
+        llm_output = await self._complete(messages)
+        log_llm_call(node, prompt_text(messages), llm_output)
 
-        logging.info(f"✅ {node} completed. Django plan generated.")
-        return state
+        # --- Крок 3: Валідація плану ---
+        plan = await self._validated_plan(node, messages, llm_output)
+        if plan is None:
+            # порожній план мовчки дав би проєкт без apps
+            raise ValueError(f"❌ {node}: LLM did not return a valid Django plan.")
+        return plan
+
+    async def _convert_streaming(self, node: str, prompt: PromptTemplate, rails_structure: dict,
+                                 state: ConversionState, streamed_apps: list):
+        """
+        Стрімінгова конвертація: кожна завершена app з масиву apps передається
+        фоновому потоку, який записує її файли, поки LLM генерує наступні.
+        """
+        messages = self._single_messages(prompt, rails_structure)
+        log_prompt_tokens("converter", prompt_text(messages))
+        root = project_root_for(state.output_dir)
+        parser = AppsStreamParser()
+        started = time.time()
+        parts = []
+        loop = asyncio.get_running_loop()
+
+        with ThreadPoolExecutor(max_workers=1) as writer:
+            writes = []
+            stream = await achat_completion(
+                self.client, "converter",
+                messages,
+                node="converter",
+                temperature=0.3,
+                response_format=response_format(DjangoPlan),
+                stream=True,
+            )
+            async for chunk in stream:
+                if not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+                text = chunk.choices[0].delta.content
+                parts.append(text)
+                for app in parser.feed(text):
+                    try:
+                        app = DjangoAppSpec.model_validate(app).model_dump(exclude_none=True)
+                    except ValueError:
+                        continue  # невалідну app builder запише після ремонту
+                    if not streamed_apps:
+                        logging.info(f"⚡ First app '{app['name']}' ready after {time.time() - started:.2f}s")
+                    streamed_apps.append(app["name"])
+                    context = contextvars.copy_context()
+                    writes.append(loop.run_in_executor(writer, context.run, build_django_app, app, root))
+            await asyncio.gather(*writes)
+
+        llm_output = "".join(parts).strip()
+        log_llm_call(node, prompt_text(messages), llm_output)
+        logging.info(f"⚡ Streamed {len(streamed_apps)} apps in {time.time() - started:.2f}s")
+
+        plan = await self._validated_plan(node, messages, llm_output)
+        if plan is None:
+            raise ValueError(f"❌ {node}: LLM did not return a valid Django plan.")
+        return plan
+
+    async def _convert_unit(self, node: str, prompt: PromptTemplate, unit: dict, context: Optional[dict] = None):
+        # інструкції спільні для всіх одиниць, тож у кожному запиті змінюється лише user-повідомлення
+        payload = {"Rails structure": budget_payload("converter", unit["structure"], truncate=False)}
+        if context:
+            payload["Already converted Django definitions (reference their names and apps, do not redefine them)"] = (
+                budget_payload("converter", context)
+            )
+        messages = prompt.messages(payload, note=f"Put everything into a single Django app named \"{unit['app']}\".")
+        llm_output = await self._complete(messages)
+        log_llm_call(f"{node}:{unit['key']}", prompt_text(messages), llm_output)
+
+        plan = await self._validated_plan(f"{node}:{unit['key']}", messages, llm_output)
+        if plan is None:
+            logging.warning(f"⚠️ {unit['key']}: LLM output is not a valid plan, unit skipped.")
+        return plan
+
+    async def _convert_waves(self, node: str, prompt: PromptTemplate, waves: list, pending: list,
+                             dependencies: dict, unit_records: dict, schema_by_name: dict, max_workers: int):
+        """Хвиля за хвилею: одиниці хвилі — конкурентно, з визначеннями залежностей з попередніх хвиль."""
+        pending = {u["key"]: u for u in pending}
+        results = {}
+        for number, wave in enumerate(waves, 1):
+            units = [pending[key] for key in wave if key in pending]
+            if not units:
+                continue
+            logging.info(f"🌊 Wave {number}/{len(waves)}: {len(units)} units")
+            contexts = {}
+            for unit in units:
+                deps = dependencies.get(unit["key"], [])
+                plans = {dep: unit_records[dep]["plan"] for dep in deps if dep in unit_records}
+                contexts[unit["key"]] = dependency_context(deps, plans, schema_by_name)
+            wave_results = await self._convert_chunked(node, prompt, units, max_workers, contexts)
+            for key, plan in wave_results.items():
+                unit_records[key]["plan"] = plan
+            results.update(wave_results)
+        return results
+
+    async def _convert_chunked(self, node: str, prompt: PromptTemplate, units: list, max_workers: int,
+                               contexts: Optional[dict] = None):
+        logging.info(f"🧩 {len(units)} conversion units, up to {max_workers} concurrent requests")
+        limit = asyncio.Semaphore(max_workers)
+        contexts = contexts or {}
+
+        async def convert(unit):
+            async with limit:
+                plan = await self._convert_unit(node, prompt, unit, contexts.get(unit["key"]))
+            if plan:
+                logging.info(f"  ✔ {unit['key']} → app '{unit['app']}'")
+            return unit["key"], plan
+
+        results = dict(await asyncio.gather(*(convert(u) for u in units)))
+
+        failed = [key for key, plan in results.items() if not plan]
+        if failed:
+            logging.warning(f"⚠️ {len(failed)} of {len(units)} units failed to convert.")
+
+        return results
+
+
+def _without_schema_models(rails_structure: dict, schema_names: set) -> dict:
+    """Для моделей зі схеми в промпті лишається тільки назва — поля LLM не потрібні."""
+    if not schema_names:
+        return rails_structure
+    models = [
+        {"name": m["name"], "source": m.get("source")} if m.get("name") in schema_names else m
+        for m in rails_structure.get("models", [])
+    ]
+    return {**rails_structure, "models": models}
+
+
+def _unit_sources(unit: dict) -> list:
+    """Файли Rails, з яких зібрано одиницю конвертації."""
+    sources = set()
+    for entities in unit["structure"].values():
+        for entity in entities:
+            if isinstance(entity, dict) and entity.get("source"):
+                sources.add(entity["source"])
+    return sorted(sources)
+
+
+def _is_plan(plan) -> bool:
+    return isinstance(plan, dict) and isinstance(plan.get("apps"), list)
+
+
+def _plan_apps(plan) -> set:
+    if not isinstance(plan, dict):
+        return set()
+    return {app.get("name") for app in plan.get("apps", []) if app.get("name")}
+
+
+def _affected_apps(previous_units: dict, unit_records: dict, converted: set):
+    """
+    Apps, які треба перебудувати: ті, куди потрапили щойно сконвертовані одиниці,
+    а також ті, що раніше містили змінені або видалені одиниці.
+    None означає «перебудувати все» (перший запуск без маніфесту).
+    """
+    if not previous_units:
+        return None
+    apps = set()
+    for key in converted:
+        apps |= _plan_apps(unit_records[key]["plan"])
+        apps |= _plan_apps(previous_units.get(key, {}).get("plan"))
+    for key in set(previous_units) - set(unit_records):
+        apps |= _plan_apps(previous_units[key].get("plan"))
+    return sorted(apps)
@@ -1,49 +1,50 @@
-import os
 import logging
-from pathlib import Path
+from typing import Optional
 from agent.tools.log_utils import log_state, log_llm_call
-from agent.tools.rails_parser import parse_rails_app
+from agent.tools.prompt_budget import budget_payload, log_prompt_tokens
+from agent.tools.model_router import achat_completion
+from agent.tools.artifact_store import artifact_store_for
+from agent.tools.prompt_registry import load_prompt, prompt_text
 from agent.state import ConversionState
 
 
 class LLMDiscoveryNode:
     """
     Аналізує Rails-проєкт і створює структуроване представлення його складових.
-    Використовує локальний парсер + LLM для уточнення архітектури.
+    Уточнює через LLM структуру, отриману локальним парсером (RailsParserNode).
     """
 
-    def __init__(self, client, prompt_path="agent/prompts/discovery_prompt.txt"):
+    def __init__(self, client, prompt_path: Optional[str] = None):
         self.client = client
-        self.prompt_path = Path(prompt_path)
+        self.prompt = load_prompt(prompt_path or "discovery")
 
-    def __call__(self, state: ConversionState):
+    async def __call__(self, state: ConversionState):
         node = "LLMDiscoveryNode"
         logging.info(f"[2/6] 🔍 {node} started...")
 
-        input_dir = Path(state.input_dir)
-        if not input_dir.exists():
-            raise FileNotFoundError(f"❌ Input directory not found: {input_dir}")
-
-        # --- Крок 1: Локальний парсинг ---
-        rails_structure = parse_rails_app(input_dir)
-        state.rails_structure = rails_structure
-
-        # --- Крок 2: Формування промпта для уточнення через LLM ---
-        prompt_template = self.prompt_path.read_text(encoding="utf-8")
-        prompt = prompt_template.replace("{{rails_structure}}", str(rails_structure))
-
-        # --- Крок 3: Виклик LLM для уточнення структури ---
-        response = self.client.chat.completions.create(
-            model=os.getenv("MODEL_NAME", "gpt-4o"),
-            messages=[{"role": "user", "content": prompt}],
+        if not state.rails_structure:
+            raise ValueError("❌ Missing Rails structure in state — run parser first.")
+        store = artifact_store_for(state.output_dir)
+        rails_structure = store.get(state.rails_structure)
+
+        # --- Крок 1: Формування промпта для уточнення через LLM ---
+        messages = self.prompt.messages({"Rails structure": budget_payload("discovery", rails_structure)})
+        prompt = prompt_text(messages)
+        log_prompt_tokens("discovery", prompt)
+
+        # --- Крок 2: Виклик LLM для уточнення структури ---
+        response = await achat_completion(
+            self.client, "discovery",
+            messages,
+            node="discovery",
             temperature=0.3,
         )
         llm_output = response.choices[0].message.content.strip()
         log_llm_call(node, prompt, llm_output)
 
-        # --- Крок 4: Збереження ---
-        state.rails_summary = llm_output
+        # --- Крок 3: Збереження ---
+        state.rails_summary = store.put(llm_output)
         log_state(node, state)
 
-        logging.info(f"✅ {node} completed. Files analyzed: {len(rails_structure.get('files', []))}")
-        return state
+        logging.info(f"✅ {node} completed. Rails summary: {len(llm_output)} chars")
+        return {"rails_summary": state.rails_summary, "current_node": "discovery"}
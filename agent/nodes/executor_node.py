@@ -1,5 +1,8 @@
+import asyncio
 import logging
+from typing import Optional
 from agent.state import ConversionState
+from agent.tools.profiler import current_profiler
 
 
 class ExecutorNode:
@@ -10,19 +13,52 @@ class ExecutorNode:
 
     def __init__(self, client, build_graph_func):
         """
-        :param client: OpenAI клієнт
+        :param client: асинхронний LLM-клієнт (AsyncOpenAI або обгортка над ним)
         :param build_graph_func: функція для побудови графа (передається ззовні)
         """
         self.client = client
         self.build_graph_func = build_graph_func
 
-    def run(self, state: ConversionState):
+    def run(self, state: Optional[ConversionState], checkpointer=None, run_id: Optional[str] = None,
+            from_node: Optional[str] = None):
+        """Синхронна обгортка над arun (власний цикл подій на час виконання)."""
+        return asyncio.run(self.arun(state, checkpointer=checkpointer, run_id=run_id, from_node=from_node))
+
+    async def arun(self, state: Optional[ConversionState], checkpointer=None, run_id: Optional[str] = None,
+                   from_node: Optional[str] = None):
+        """
+        :param state: початковий стан; None — продовжити запуск run_id з останнього збереженого вузла
+        :param checkpointer: асинхронний LangGraph checkpointer (стан знімається після кожного вузла)
+        :param run_id: thread_id запуску в checkpointer
+        :param from_node: перезапустити run_id, починаючи з цього вузла
+        """
         logging.info("🧩 ExecutorNode started — building conversion pipeline...")
         graph = self.build_graph_func(self.client)
-        app = graph.compile()
+        app = graph.compile(checkpointer=checkpointer)
+        config = {"configurable": {"thread_id": run_id}} if checkpointer else None
+
+        if from_node:
+            config = await self._checkpoint_before(app, config, from_node)
+            state = None
+        elif state is None:
+            snapshot = await app.aget_state(config)
+            if not snapshot.values:
+                raise ValueError(f"❌ Run '{run_id}' not found in checkpoints.")
+            logging.info(f"♻️ Resuming run '{run_id}' at: {', '.join(snapshot.next) or 'end (nothing to do)'}")
 
         logging.info("🚀 Executing full conversion pipeline...")
-        final_state = app.invoke(state)
+        with current_profiler().span("ExecutorNode.run", cat="run"):
+            final_state = await app.ainvoke(state, config)
 
         logging.info("✅ ExecutorNode finished all steps successfully.")
         return final_state
+
+    @staticmethod
+    async def _checkpoint_before(app, config: dict, node: str) -> dict:
+        """Конфіг останнього чекпойнта, після якого мав виконуватися node (для replay з цього місця)."""
+        async for snapshot in app.aget_state_history(config):
+            if node in snapshot.next:
+                logging.info(f"⏪ Replaying run '{config['configurable']['thread_id']}' from '{node}' "
+                             f"(checkpoint {snapshot.config['configurable']['checkpoint_id']})")
+                return snapshot.config
+        raise ValueError(f"❌ No checkpoint before node '{node}' in run '{config['configurable']['thread_id']}'.")
@@ -1,7 +1,15 @@
-import os
 import logging
 from pathlib import Path
+from typing import Optional
 from agent.tools.log_utils import log_state, log_llm_call
+from agent.tools.prompt_budget import budget_payloads, count_tokens, log_prompt_tokens
+from agent.tools.profiler import current_profiler
+from agent.tools.model_router import achat_completion
+from agent.tools.artifact_store import artifact_store_for
+from agent.tools.prompt_registry import load_prompt, prompt_text
+from agent.tools.gem_mapper import (
+    load_gems, map_gems, unmapped_gems, render_requirements, unmapped_gems_listing, parse_unmapped_reply,
+)
 from agent.state import ConversionState
 
 
@@ -9,34 +17,52 @@ class LLMIntegrationNode:
     """
     Завершальний етап конвертації:
     - Генерує README.md
-    - Генерує requirements.txt
+    - Генерує requirements.txt (детерміновано з Gemfile.lock; LLM — лише для невідомих гемів)
     - Підсумовує процес і лог
+
+    README і requirements незалежні, тому у графі вони зареєстровані
+    як дві паралельні гілки (generate_readme / generate_requirements).
     """
 
-    def __init__(self, client, prompt_path="agent/prompts/integration_prompt.txt"):
+    def __init__(self, client, prompt_path: Optional[str] = None):
         self.client = client
-        self.prompt_path = Path(prompt_path)
+        self.prompt = load_prompt(prompt_path or "integration")
+        self.requirements_prompt = load_prompt("requirements")
 
-    def __call__(self, state: ConversionState):
-        node = "LLMIntegrationNode"
-        logging.info(f"[5/6] 📦 {node} started...")
+    async def __call__(self, state: ConversionState):
+        updates = await self.generate_readme(state)
+        updates.update(await self.generate_requirements(state))
+        return updates
 
+    @staticmethod
+    def _project_root(state: ConversionState) -> Path:
         if not state.project_root:
             raise ValueError("❌ Missing project_root — build step must run first.")
+        return Path(state.project_root)
 
-        project_root = Path(state.project_root)
+    async def generate_readme(self, state: ConversionState):
+        node = "LLMIntegrationNode:readme"
+        logging.info(f"[5/6] 📦 {node} started...")
+        project_root = self._project_root(state)
 
-        # --- 1️⃣ README.md ---
-        readme_prompt = self.prompt_path.read_text(encoding="utf-8")
-        readme_prompt = (
-            readme_prompt
-            .replace("{{rails_structure}}", str(state.rails_structure))
-            .replace("{{django_plan}}", str(state.django_plan))
-        )
+        store = artifact_store_for(state.output_dir)
+        django_plan = {"apps": list(store.get(state.django_plan, {}).values())}
+        # бюджет — на весь промпт: спершу план, у залишок — структура Rails
+        payloads = budget_payloads("readme", {
+            "Django plan": django_plan,
+            "Rails structure": store.get(state.rails_structure),
+        }, reserved=count_tokens(self.prompt.instructions))
+        messages = self.prompt.messages({
+            "Rails structure": payloads["Rails structure"],
+            "Django plan": payloads["Django plan"],
+        })
+        readme_prompt = prompt_text(messages)
+        log_prompt_tokens("readme", readme_prompt)
 
-        readme_response = self.client.chat.completions.create(
-            model=os.getenv("MODEL_NAME", "gpt-4o"),
-            messages=[{"role": "user", "content": readme_prompt}],
+        readme_response = await achat_completion(
+            self.client, "readme",
+            messages,
+            node="readme",
             temperature=0.2,
         )
 
@@ -45,22 +71,50 @@ class LLMIntegrationNode:
 
         with open(project_root / "README.md", "w", encoding="utf-8") as f:
             f.write(readme_md)
+        current_profiler().add_bytes(len(readme_md.encode("utf-8")))
 
-        # --- 2️⃣ requirements.txt ---
-        req_prompt = "Generate minimal requirements.txt for Django 5 project with SQLite."
-        req_response = self.client.chat.completions.create(
-            model=os.getenv("MODEL_NAME", "gpt-4o"),
-            messages=[{"role": "user", "content": req_prompt}],
-            temperature=0.1,
-        )
-        req_text = req_response.choices[0].message.content.strip()
-        log_llm_call(node, req_prompt, req_text)
+        log_state(node, state)
+        logging.info(f"✅ {node} completed. README.md written to {project_root}")
+        return {"current_node": "readme"}
 
-        with open(project_root / "requirements.txt", "w", encoding="utf-8") as f:
-            f.write(req_text)
+    async def generate_requirements(self, state: ConversionState):
+        node = "LLMIntegrationNode:requirements"
+        logging.info(f"[5/6] 📦 {node} started...")
+        project_root = self._project_root(state)
 
-        # --- 3️⃣ логування фінального стану ---
-        log_state(node, state)
+        gems = load_gems(state.input_dir)
+        unmapped = unmapped_gems(gems)
+        resolved = await self._resolve_unmapped_gems(node, unmapped) if unmapped else {}
+        runtime, dev, skipped = map_gems(gems, resolved)
+
+        files = {"requirements.txt": render_requirements(runtime, gems, "# Generated from Gemfile.lock")}
+        if dev:
+            files["requirements-dev.txt"] = render_requirements(dev, gems, "-r requirements.txt")
+        for name, text in files.items():
+            (project_root / name).write_text(text, encoding="utf-8")
+            current_profiler().add_bytes(len(text.encode("utf-8")))
 
+        missing = sorted(name for name, reason in skipped.items() if reason == "unmapped")
+        if missing:
+            logging.warning(f"⚠️ No PyPI equivalent for gems: {', '.join(missing)}")
+        logging.info(f"📌 {len(gems)} gems → {len(runtime)} runtime + {len(dev)} dev requirements "
+                     f"({len(skipped)} gems need no package)")
         logging.info(f"✅ {node} completed. Django project ready at {state.output_dir}")
-        return state
+        return {"current_node": "requirements"}
+
+    async def _resolve_unmapped_gems(self, node: str, unmapped: dict) -> dict:
+        """Один LLM-виклик на всі геми, яких немає в GEM_TO_PYPI."""
+        logging.info(f"🤖 Asking LLM about {len(unmapped)} unmapped gems: {', '.join(sorted(unmapped))}")
+        messages = self.requirements_prompt.messages({"Gems": unmapped_gems_listing(unmapped)})
+        prompt = prompt_text(messages)
+        log_prompt_tokens("requirements", prompt)
+        response = await achat_completion(
+            self.client, "requirements",
+            messages,
+            node="requirements",
+            temperature=0.0,
+            response_format={"type": "json_object"},
+        )
+        reply = response.choices[0].message.content.strip()
+        log_llm_call(node, prompt, reply)
+        return parse_unmapped_reply(reply, unmapped)
@@ -0,0 +1,51 @@
+import logging
+from pathlib import Path
+from agent.tools.log_utils import log_state
+from agent.tools.rails_parser import parse_rails_app_incremental
+from agent.tools.file_index import scan_rails_tree
+from agent.tools.schema_parser import load_schema_models
+from agent.tools.manifest import load_manifest, empty_manifest, diff_fingerprints
+from agent.tools.artifact_store import artifact_store_for
+from agent.state import ConversionState
+
+
+class RailsParserNode:
+    """
+    Локальний (без LLM) парсинг Rails-проєкту.
+    Виконується паралельно з LLMPlannerNode — їхні результати незалежні.
+    """
+
+    def __call__(self, state: ConversionState):
+        node = "RailsParserNode"
+        logging.info(f"[1/6] 📂 {node} started...")
+
+        input_dir = Path(state.input_dir)
+        if not input_dir.exists():
+            raise FileNotFoundError(f"❌ Input directory not found: {input_dir}")
+
+        # лише змінені файли, якщо є маніфест попереднього запуску
+        previous = load_manifest(state.output_dir) if state.incremental else empty_manifest()
+        index = scan_rails_tree(str(input_dir))
+        rails_structure, records = parse_rails_app_incremental(input_dir, previous["files"], index)
+
+        # моделі з db/schema.rb генеруються без LLM
+        schema_models = load_schema_models(index)
+
+        if previous["files"]:
+            changed, removed = diff_fingerprints(previous["files"], {k: v["hash"] for k, v in records.items()})
+            logging.info(f"🧾 Змінено/додано файлів: {len(changed)}, видалено: {len(removed)}")
+
+        # у стан — лише посилання; розділи rails_structure читаються окремо
+        store = artifact_store_for(state.output_dir)
+        state.rails_structure = store.put_parts(rails_structure)
+        state.manifest_files = store.put(records)
+        state.schema_models = store.put(schema_models)
+        log_state(node, state)
+
+        logging.info(f"✅ {node} completed. Files analyzed: {len(records)}")
+        return {
+            "rails_structure": state.rails_structure,
+            "manifest_files": state.manifest_files,
+            "schema_models": state.schema_models,
+            "current_node": "parser",
+        }
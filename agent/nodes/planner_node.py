@@ -1,52 +1,48 @@
 import logging
-import json
-import re
 from pathlib import Path
+from typing import Optional
 from agent.tools.log_utils import log_state, log_llm_call
+from agent.tools.prompt_budget import log_prompt_tokens
+from agent.tools.plan_utils import parse_llm_json
+from agent.tools.plan_schema import ConversionPlan, PlanStep, response_format, repair_items, repair_messages, is_valid
+from agent.tools.llm_cache import invalidate_cached
+from agent.tools.model_router import achat_completion
+from agent.tools.artifact_store import artifact_store_for
+from agent.tools.prompt_registry import load_prompt, prompt_text
 from agent.state import ConversionState
 
 
+# fallback-промпт, якщо файла немає
+DEFAULT_PLAN_PROMPT = (
+    "You are an expert AI assistant specializing in converting Ruby on Rails projects to Django. "
+    "Analyze the Rails project located in the directory given in the user message and produce a detailed "
+    "JSON plan for conversion. The JSON should include a list of steps with clear actions, descriptions, "
+    "and dependencies."
+)
+
+
 class LLMPlannerNode:
     """
     Побудова початкового плану конвертації Rails→Django.
     Викликає LLM для створення покрокового плану дій на основі вхідного проєкту.
     """
 
-    def __init__(self, client, prompt_path: str = "agent/prompts/plan_prompt.txt"):
+    def __init__(self, client, prompt_path: Optional[str] = None):
         self.client = client
-        self.prompt_path = Path(prompt_path)
+        self.prompt = load_prompt(prompt_path or "plan", DEFAULT_PLAN_PROMPT)
 
-    def __call__(self, state: ConversionState):
+    async def __call__(self, state: ConversionState):
         node = "LLMPlannerNode"
         logging.info(f"[1/6] 🧭 {node} started...")
 
-        # --- Завантаження промпта ---
-        if self.prompt_path.exists():
-            prompt_template = self.prompt_path.read_text(encoding="utf-8")
-        else:
-            # fallback-промпт, якщо файла немає
-            logging.warning(f"⚠️ Prompt file not found at {self.prompt_path}. Using default prompt.")
-            prompt_template = (
-                "You are an expert AI assistant specializing in converting Ruby on Rails projects to Django. "
-                "Analyze the Rails project located at '{{input_dir}}' and produce a detailed JSON plan for conversion. "
-                "The JSON should include a list of steps with clear actions, descriptions, and dependencies."
-            )
-
-        # --- Формування динамічного промпта ---
-        input_dir = Path(state.input_dir).resolve()
-        prompt = prompt_template.replace("{{input_dir}}", str(input_dir))
+        # --- Формування промпта: статичні інструкції + директорія проєкту ---
+        messages = self.prompt.messages({"Rails project directory": str(Path(state.input_dir).resolve())})
+        prompt = prompt_text(messages)
+        log_prompt_tokens("planner", prompt)
 
         # --- Виклик LLM ---
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": "You are a senior software architect."},
-                    {"role": "user", "content": prompt},
-                ],
-                temperature=0.2,
-            )
-            llm_output = response.choices[0].message.content.strip()
+            llm_output = await self._complete(messages, ConversionPlan)
         except Exception as e:
             logging.error(f"❌ LLM API call failed: {e}")
             raise
@@ -54,19 +50,43 @@ class LLMPlannerNode:
         # --- Логування ---
         log_llm_call(node, prompt, llm_output)
 
-        # --- Обробка та парсинг відповіді ---
-        # видаляємо код-блоки ```json ... ```
-        clean_output = re.sub(r"^```(json|python)?|```$", "", llm_output.strip(), flags=re.MULTILINE).strip()
-
-        try:
-            parsed = json.loads(clean_output)
-        except json.JSONDecodeError:
-            logging.warning("⚠️ Planner output is not valid JSON. Storing raw output instead.")
-            parsed = {"raw_plan": clean_output}
+        # --- Валідація за схемою; невалідні кроки перепитуються поодинці ---
+        data = parse_llm_json(llm_output)
+        if isinstance(data, list):  # старий формат — список кроків без обгортки
+            data = {"steps": data}
+        plan, repairs = await repair_items(data, ConversionPlan, "steps", PlanStep, self._repair_step)
+        if repairs:
+            logging.info(f"🩹 {node}: {repairs} targeted repair call(s)")
+        if repairs or plan is None:
+            invalidate_cached(self.client, llm_output)
+        if plan is None:
+            raise ValueError(f"❌ {node}: LLM did not return a valid conversion plan.")
+        parsed = plan.model_dump()
 
         # --- Оновлення стану ---
         state.plan = parsed
-        state.llm_response = llm_output
+        state.llm_response = artifact_store_for(state.output_dir).put(llm_output)
         state.current_node = "planner"
 
         log_state(node, state)
+
+        return {"plan": parsed, "llm_response": state.llm_response, "current_node": "planner"}
+
+    async def _complete(self, messages: list, schema, task: str = "planner") -> str:
+        response = await achat_completion(
+            self.client, task,
+            messages,
+            node="planner",
+            temperature=0.2,
+            response_format=response_format(schema),
+        )
+        return response.choices[0].message.content.strip()
+
+    async def _repair_step(self, step, errors: str):
+        messages = repair_messages(step, errors, PlanStep, "You are fixing one step of a conversion plan.\n")
+        llm_output = await self._complete(messages, PlanStep, task="repair")
+        log_llm_call("LLMPlannerNode:repair", prompt_text(messages), llm_output)
+        repaired = parse_llm_json(llm_output)
+        if not is_valid(PlanStep, repaired):
+            invalidate_cached(self.client, llm_output)
+        return repaired
@@ -0,0 +1,86 @@
+import logging
+from pathlib import Path
+from typing import Dict, Any, Optional
+from agent.tools.log_utils import log_state
+from agent.tools.file_index import RailsFileIndex
+from agent.tools.plan_utils import app_name_for, camelize, singularize
+from agent.tools.template_converter import convert_views_parallel, timing_summary, django_template_name
+from agent.tools.django_builder import project_root_for, project_templates_dir
+from agent.tools.profiler import current_profiler
+from agent.tools.artifact_store import artifact_store_for
+from agent.state import ConversionState
+
+VIEWS_PREFIX = "app/views/"
+
+
+def rails_view_templates(manifest_files: Dict[str, Any]) -> Dict[str, str]:
+    """{app/views/blog_posts/show.html.erb: blog_posts/show.html} для всіх ERB-шаблонів проєкту."""
+    templates = {}
+    for rel in manifest_files or {}:
+        if RailsFileIndex.role_of(rel) == "views":
+            view = rel[len(VIEWS_PREFIX):]
+            templates[rel] = str(Path(view).parent / django_template_name(Path(view).name)).lstrip("./")
+    return templates
+
+
+def template_app(template: str, django_plan: Dict[str, Any]) -> Optional[str]:
+    """
+    App, у templates/ якої потрапить шаблон: app з назвою директорії,
+    app, чиї views працюють з однойменною моделлю, або детермінована назва як у chunked-режимі.
+    None — шаблон спільний (layouts/) або його app немає в плані (devise/, pwa/, ...) і, отже,
+    в INSTALLED_APPS: такий шаблон іде в templates/ проєкту, інакше {% extends %} його не знайде.
+    """
+    top = template.split("/")[0] if "/" in template else ""
+    apps = django_plan.get("apps", []) if isinstance(django_plan, dict) else []
+    names = {app.get("name") for app in apps}
+    if top == "layouts":
+        return None
+    if top in names:
+        return top
+    model = camelize(singularize(top)) if top else None
+    for app in apps:
+        for view in app.get("views", []):
+            if isinstance(view, dict) and model and view.get("model") == model:
+                return app["name"]
+    app = app_name_for("template", {"name": template})
+    return app if app in names else None
+
+
+class TemplateConverterNode:
+    """
+    Конвертує всі ERB-шаблони з app/views (включно з layouts і партіалами)
+    у шаблони Django у пулі процесів. Виконується паралельно з LLMProjectBuilderNode:
+    builder не пише заглушок для шаблонів, які мають Rails-джерело.
+    """
+
+    def __call__(self, state: ConversionState):
+        node = "TemplateConverterNode"
+        logging.info(f"[4/6] 🎨 {node} started...")
+
+        root = project_root_for(state.output_dir)
+        shared = project_templates_dir(state.output_dir)
+        input_dir = Path(state.input_dir)
+        store = artifact_store_for(state.output_dir)
+        django_plan = {"apps": list(store.get(state.django_plan, {}).values())}
+        jobs = []
+        for rel, template in rails_view_templates(store.get(state.manifest_files)).items():
+            app = template_app(template, django_plan)
+            templates_dir = root / app / "templates" if app else shared
+            view_dir = str(Path(template).parent).lstrip(".")
+            jobs.append((str(input_dir / rel), str(templates_dir / template), view_dir))
+
+        results = convert_views_parallel(jobs)
+        logging.info(timing_summary(results))
+
+        failed = [src for src, _, error in results if error]
+        if failed:
+            logging.warning(f"⚠️ {len(failed)} of {len(results)} templates failed to convert.")
+
+        converted = [dst for (src, dst, _), (_, _, error) in zip(jobs, results) if not error]
+        # файли пишуть процеси пулу — рахуємо записані байти тут
+        current_profiler().add_bytes(sum(Path(dst).stat().st_size for dst in converted))
+        state.converted_templates = store.put(converted)
+        log_state(node, state)
+
+        logging.info(f"✅ {node} completed. Templates converted: {len(converted)}")
+        return {"converted_templates": state.converted_templates, "current_node": "templates"}
@@ -0,0 +1,45 @@
+import logging
+from collections import defaultdict
+from agent.tools.log_utils import log_state
+from agent.tools.validator import current_validator
+from agent.state import ConversionState
+
+
+class DjangoValidatorNode:
+    """
+    Перевірка згенерованого проєкту після LLMProjectBuilderNode: імпорт модулів,
+    `manage.py check` і dry-run makemigrations у теплому процесі-валідаторі.
+    Помилки не зупиняють пайплайн — вони потрапляють у state.validation і лог.
+    Без явного validator використовується валідатор поточного запуску.
+    """
+
+    def __init__(self, validator=None):
+        self.validator = validator
+
+    def __call__(self, state: ConversionState):
+        node = "DjangoValidatorNode"
+        if not state.validate_project:
+            logging.info(f"⏭️ {node} skipped (validation disabled).")
+            return {"current_node": "validator"}
+        logging.info(f"[5/6] 🩺 {node} started...")
+
+        # на інкрементальному запуску перевіряємо лише перебудовані apps
+        report = (self.validator or current_validator()).validate(state.output_dir, apps=state.affected_apps)
+
+        by_app = defaultdict(list)
+        for error in report.get("errors", []):
+            by_app[error.get("app") or "project"].append(error)
+        for app, errors in by_app.items():
+            for error in errors:
+                where = f" ({error['file']}:{error['line']})" if error.get("file") else ""
+                logging.warning(f"❌ [{app}] {error.get('id') or error['kind']}: {error['message']}{where}")
+        migrations = report.get("migrations", {})
+        operations = sum(len(ops) for ops in migrations.values())
+
+        state.validation = report
+        log_state(node, state)
+        status = "✅ passed" if report.get("ok") else f"⚠️ {len(report.get('errors', []))} errors"
+        logging.info(f"{status} — {node} in {report.get('duration', 0) * 1000:.0f} ms: "
+                     f"{len(report.get('warnings', []))} warnings, "
+                     f"{operations} migration operations in {len(migrations)} apps")
+        return {"validation": report, "current_node": "validator"}
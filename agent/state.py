@@ -1,11 +1,25 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Annotated
+from agent.tools.artifact_store import ArtifactRef
+
+
+def merge_dicts(left: Optional[Dict[str, Any]], right: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Reducer для полів, які паралельні гілки графа доповнюють одночасно."""
+    return {**(left or {}), **(right or {})}
+
+
+def last_value(left: Any, right: Any) -> Any:
+    """Reducer «останнє значення перемагає» — дозволяє кільком гілкам писати в одне поле за крок."""
+    return right
 
 
 class ConversionState(BaseModel):
     """
     Єдина модель стану для всього пайплайну LangGraph.
-    Передається між нодами (planner → discovery → converter → builder → integration)
+    Передається між нодами (planner ∥ parser → discovery ∥ converter → builder ∥ templates → validator ∥ readme ∥ requirements).
+    Ноди повертають лише змінені поля; поля, які пишуть паралельні гілки, мають reducer.
+    Великі проміжні результати лежать у сховищі артефактів (agent/tools/artifact_store.py),
+    у стані — лише посилання на них (ArtifactRef).
     """
 
     # Вхідні параметри
@@ -14,17 +28,37 @@ class ConversionState(BaseModel):
     log_path: Optional[str] = Field(None, description="Шлях до файлу логів")
     plan: Optional[Dict[str, Any]] = Field(None, description="Згенерований LLM план міграції")
 
+    # Налаштування конвертації
+    convert_mode: str = Field("single", description="Режим конвертера: single | chunked")
+    max_workers: int = Field(4, description="Кількість паралельних LLM-викликів у chunked-режимі")
+    incremental: bool = Field(True, description="Перетворювати лише змінені файли (за маніфестом у output_dir)")
+    stream_plan: bool = Field(False, description="Стрімити план і записувати apps по мірі готовності")
+    validate_project: bool = Field(True, description="Перевіряти згенерований проєкт (check + makemigrations --dry-run)")
+
 
     # Проміжні стани
     files_to_read: Optional[List[str]] = Field(default_factory=list)
-    rails_structure: Optional[Dict[str, Any]] = Field(None, description="Парсинг Rails структури")
-    django_plan: Optional[Dict[str, Any]] = Field(None, description="План Django проекту")
+    rails_structure: Optional[ArtifactRef] = Field(None, description="Парсинг Rails структури (частини — розділи)")
+    schema_models: Optional[ArtifactRef] = Field(None, description="Моделі Django, детерміновано згенеровані з db/schema.rb / міграцій")
+    rails_summary: Optional[ArtifactRef] = Field(None, description="Уточнений LLM опис архітектури Rails")
+    django_plan: Optional[ArtifactRef] = Field(None, description="План Django проекту (частини — apps за назвою)")
     generated_app: Optional[str] = Field(None, description="Шлях до згенерованої Django апки")
     project_root: Optional[str] = Field(None, description="Коренева директорія Django проекту")
+    converted_templates: Optional[ArtifactRef] = Field(None, description="Шаблони Django, сконвертовані з ERB (список шляхів)")
+    validation: Optional[Dict[str, Any]] = Field(None, description="Звіт валідатора: errors, warnings, migrations")
+
+    # Інкрементальна конверсія (див. agent/tools/manifest.py)
+    manifest_files: Optional[ArtifactRef] = Field(None, description="Відбитки та результати парсингу файлів Rails")
+    plan_units: Optional[ArtifactRef] = Field(None, description="Фрагменти плану по одиницях конвертації")
+    affected_apps: Optional[List[str]] = Field(None, description="Apps, які треба перебудувати (None — усі)")
+    prebuilt_apps: List[str] = Field(default_factory=list, description="Apps, уже записані під час стрімінгу плану")
 
     # Службова інформація
-    current_node: Optional[str] = Field(None, description="Назва поточного вузла графу")
-    llm_response: Optional[Any] = Field(None, description="Сира відповідь LLM для дебагу")
+    current_node: Annotated[Optional[str], last_value] = Field(None, description="Назва поточного вузла графу")
+    llm_response: Optional[ArtifactRef] = Field(None, description="Сира відповідь LLM для дебагу")
+    node_timings: Annotated[Dict[str, Dict[str, float]], merge_dicts] = Field(
+        default_factory=dict, description="Час виконання кожного вузла: start/end/duration"
+    )
 
     def __repr__(self):
         return f"<ConversionState node={self.current_node} project_root={self.project_root}>"
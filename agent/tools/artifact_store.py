@@ -0,0 +1,122 @@
+"""
+Content-addressed сховище великих проміжних результатів пайплайну (rails_structure,
+django_plan, сирі відповіді LLM...). У ConversionState лежать лише легкі ArtifactRef,
+тож LangGraph не копіює і не валідує мегабайтні словники між вузлами, а чекпойнти
+лишаються маленькими. Вузли завантажують з диска тільки потрібне — весь артефакт
+або окремі його частини (app плану, розділ rails_structure).
+"""
+import os
+import json
+import hashlib
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+from pydantic import BaseModel
+
+ARTIFACTS_DIR = ".rails2django_artifacts"
+
+
+class ArtifactRef(BaseModel):
+    """
+    Посилання на артефакт: sha256 вмісту і розмір.
+    split=True — словник, розбитий на частини: digest вказує на індекс {ключ: digest частини}.
+    """
+
+    digest: str
+    size: int = 0
+    split: bool = False
+
+
+def _dumps(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class ArtifactStore:
+    """
+    Блоби JSON у <root>/<aa>/<sha256>.json. Однаковий вміст записується один раз
+    (повторні й інкрементальні запуски не дублюють незмінені частини), запис атомарний.
+    Блоби попередніх запусків прибирає prune.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def _path(self, digest: str) -> Path:
+        return self.root / digest[:2] / f"{digest}.json"
+
+    def _write(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp_")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        return digest
+
+    def _read(self, digest: str) -> Any:
+        try:
+            return json.loads(self._path(digest).read_bytes())
+        except FileNotFoundError:
+            raise FileNotFoundError(f"❌ Artifact {digest[:12]} not found in {self.root}") from None
+
+    def put(self, value: Any) -> ArtifactRef:
+        data = _dumps(value)
+        return ArtifactRef(digest=self._write(data), size=len(data))
+
+    def put_parts(self, mapping: Dict[str, Any]) -> ArtifactRef:
+        """Кожне значення словника — окремий блоб; частини потім читаються вибірково (get(..., keys=...))."""
+        index, size = {}, 0
+        for key, value in mapping.items():
+            data = _dumps(value)
+            index[key] = self._write(data)
+            size += len(data)
+        return ArtifactRef(digest=self._write(_dumps(index)), size=size, split=True)
+
+    def keys(self, ref: Optional[ArtifactRef]) -> List[str]:
+        """Ключі розбитого артефакту — без читання самих частин."""
+        return list(self._read(ref.digest)) if ref is not None and ref.split else []
+
+    def get(self, ref: Optional[ArtifactRef], default: Any = None, keys: Optional[Iterable[str]] = None) -> Any:
+        """
+        Артефакт цілком (розбитий — зібраний назад у словник); default, якщо посилання немає.
+        keys — для розбитого артефакту читаються лише ці частини.
+        """
+        if ref is None:
+            return default
+        if not ref.split:
+            return self._read(ref.digest)
+        index = self._read(ref.digest)
+        if keys is not None:
+            index = {key: index[key] for key in keys}
+        return {key: self._read(digest) for key, digest in index.items()}
+
+    def prune(self, live: Iterable[ArtifactRef]) -> int:
+        """
+        Видаляє блоби, на які не посилаються live (для розбитих — індекс і його частини).
+        :return: кількість видалених блобів
+        """
+        keep = set()
+        for ref in live:
+            keep.add(ref.digest)
+            if ref.split:
+                keep.update(self._read(ref.digest).values())
+        removed = 0
+        for path in self.root.glob("*/*.json"):
+            if path.stem not in keep:
+                path.unlink()
+                removed += 1
+        for directory in self.root.glob("*/"):
+            if not any(directory.iterdir()):
+                directory.rmdir()
+        return removed
+
+
+def artifact_store_for(output_dir: str) -> ArtifactStore:
+    """Сховище артефактів запуску — поруч із маніфестом у output_dir (переживає --resume)."""
+    return ArtifactStore(str(Path(output_dir).resolve() / ARTIFACTS_DIR))
@@ -0,0 +1,62 @@
+import asyncio
+from types import SimpleNamespace
+import openai
+
+_DONE = object()
+
+
+def _next_chunk(iterator):
+    return next(iterator, _DONE)
+
+
+async def _iterate_in_thread(stream):
+    """Асинхронний ітератор над синхронним стрімом: кожен next() — у потоці, цикл подій не блокується."""
+    iterator = iter(stream)
+    try:
+        while True:
+            chunk = await asyncio.to_thread(_next_chunk, iterator)
+            if chunk is _DONE:
+                return
+            yield chunk
+    finally:
+        close = getattr(iterator, "close", None)
+        if close:
+            await asyncio.to_thread(close)
+
+
+class _ThreadedCompletions:
+    def __init__(self, owner: "ThreadedAsyncClient"):
+        self._owner = owner
+
+    async def create(self, **kwargs):
+        response = await asyncio.to_thread(self._owner.client.chat.completions.create, **kwargs)
+        if kwargs.get("stream"):
+            return _iterate_in_thread(response)
+        return response
+
+
+class ThreadedAsyncClient:
+    """
+    Асинхронний інтерфейс (await client.chat.completions.create) над синхронним клієнтом:
+    виклик виконується у пулі потоків. Дає змогу передати в асинхронний пайплайн
+    спільний синхронний клієнт (наприклад, пакетного режиму з ConcurrencyLimitedClient).
+    """
+
+    is_async = True
+
+    def __init__(self, client):
+        self.client = client
+        self.chat = SimpleNamespace(completions=_ThreadedCompletions(self))
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+def is_async_client(client) -> bool:
+    """AsyncOpenAI або асинхронна обгортка (позначена атрибутом класу is_async)."""
+    return isinstance(client, openai.AsyncOpenAI) or getattr(type(client), "is_async", False)
+
+
+def as_async_client(client):
+    """Клієнт як є, якщо він асинхронний (AsyncOpenAI і обгортки над ним), інакше — ThreadedAsyncClient."""
+    return client if is_async_client(client) else ThreadedAsyncClient(client)
@@ -0,0 +1,115 @@
+"""
+Граф залежностей одиниць chunked-конвертації: моделі (асоціації) → контролери → шаблони.
+Одиниці однієї «хвилі» (топологічного покоління) конвертуються одночасно, а кожна наступна
+хвиля отримує в промпт уже згенеровані Django-визначення своїх залежностей — тож views
+посилаються на реальні назви моделей і apps, а не вигадують власні.
+"""
+import re
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import networkx as nx
+from agent.tools.plan_utils import app_name_for, camelize, singularize, merge_django_plans
+
+# Моделі з db/schema.rb генеруються детерміновано: у графі це готові залежності без одиниць
+SCHEMA_PREFIX = "schema:"
+
+_ASSOCIATION_RE = re.compile(r"^(belongs_to|has_many|has_one)\s+:(\w+)")
+
+
+def association_targets(model: Dict[str, Any]) -> Tuple[Set[str], Set[str]]:
+    """
+    :return: (моделі, від яких залежить model — belongs_to,
+              моделі, що залежать від model — has_many/has_one: зовнішній ключ у них)
+    """
+    parents, children = set(), set()
+    for association in model.get("associations", []):
+        match = _ASSOCIATION_RE.match(association)
+        if not match:
+            continue  # has_rich_text, has_one_attached — не моделі проєкту
+        target = camelize(singularize(match.group(2)))
+        (parents if match.group(1) == "belongs_to" else children).add(target)
+    return parents, children
+
+
+def build_unit_graph(units: List[Dict[str, Any]], schema_names: Iterable[str] = ()) -> nx.DiGraph:
+    """
+    Вузли — ключі одиниць (split_rails_structure) і "schema:<Model>" для моделей зі схеми;
+    ребро a → b означає, що b конвертується після a і бачить її визначення.
+    """
+    schema_names = set(schema_names)
+    graph = nx.DiGraph()
+    graph.add_nodes_from(u["key"] for u in units)
+
+    model_units = {u["structure"]["models"][0]["name"]: u["key"] for u in units if u["kind"] == "model"}
+    controller_units = {u["app"]: u["key"] for u in units if u["kind"] == "controller"}
+
+    def model_node(name: Optional[str]) -> Optional[str]:
+        if name in model_units:
+            return model_units[name]
+        if name in schema_names:
+            graph.add_node(SCHEMA_PREFIX + name)
+            return SCHEMA_PREFIX + name
+        return None
+
+    def depends(dependency: Optional[str], unit_key: Optional[str]):
+        # моделі зі схеми готові заздалегідь і самі ні від чого не залежать
+        if dependency and unit_key and dependency != unit_key and not unit_key.startswith(SCHEMA_PREFIX):
+            graph.add_edge(dependency, unit_key)
+
+    for unit in units:
+        key = unit["key"]
+        if unit["kind"] == "model":
+            model = unit["structure"]["models"][0]
+            parents, children = association_targets(model)
+            for parent in parents:
+                depends(model_node(parent), key)
+            for child in children:
+                depends(key, model_node(child))
+        elif unit["kind"] == "controller":
+            controller = unit["structure"]["controllers"][0]
+            depends(model_node(controller.get("model") or camelize(singularize(unit["app"]))), key)
+        elif unit["kind"] == "template":
+            directory = unit["structure"]["templates"][0]["name"].split("/")[0]
+            depends(controller_units.get(directory) or model_node(camelize(singularize(directory))), key)
+    return graph
+
+
+def conversion_waves(graph: nx.DiGraph) -> List[List[str]]:
+    """
+    Топологічні покоління одиниць. Цикли асоціацій (A belongs_to B, B belongs_to A)
+    стягуються в одну хвилю — такі одиниці конвертуються разом, без визначень одна одної.
+    """
+    units = graph.subgraph(n for n in graph if not n.startswith(SCHEMA_PREFIX))
+    condensed = nx.condensation(units)
+    return [
+        sorted(key for component in generation for key in condensed.nodes[component]["members"])
+        for generation in nx.topological_generations(condensed)
+    ]
+
+
+def wave_dependencies(graph: nx.DiGraph, waves: List[List[str]]) -> Dict[str, List[str]]:
+    """Прямі залежності кожної одиниці, готові до її хвилі: одиниці попередніх хвиль і моделі зі схеми."""
+    wave_of = {key: i for i, wave in enumerate(waves) for key in wave}
+    return {
+        key: sorted(
+            dep for dep in graph.predecessors(key)
+            if dep.startswith(SCHEMA_PREFIX) or wave_of[dep] < wave_of[key]
+        )
+        for key in wave_of
+    }
+
+
+def dependency_context(dependencies: List[str], plans: Dict[str, Any],
+                       schema_models: Dict[str, Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Django-визначення залежностей одиниці у формі плану {"apps": [...]}.
+    :param plans: {ключ одиниці: її фрагмент плану} (None — одиниця не сконвертувалась)
+    :param schema_models: {назва: модель зі схеми}
+    """
+    fragments = []
+    for dep in dependencies:
+        if dep.startswith(SCHEMA_PREFIX):
+            model = schema_models[dep[len(SCHEMA_PREFIX):]]
+            fragments.append({"apps": [{"name": app_name_for("model", model), "models": [model]}]})
+        elif plans.get(dep):
+            fragments.append(plans[dep])
+    return merge_django_plans(fragments) if fragments else None
@@ -1,71 +1,72 @@
-import os
-import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Iterable, List, Optional
+from agent.tools.file_tools import write_files_atomic
+from agent.tools.scaffold import PROJECT_NAME, PROJECT_TEMPLATES_DIR, render_app, render_project_skeleton
 
 
-def build_django_project(django_plan: dict, root: Path):
+def project_root_for(output_dir: str) -> Path:
+    """Директорія, у якій створюються Django apps."""
+    return Path(output_dir).resolve() / PROJECT_NAME
+
+
+def project_templates_dir(output_dir: str) -> Path:
+    """templates/ проєкту (TEMPLATES["DIRS"]) — для шаблонів, що не належать жодній app."""
+    return Path(output_dir).resolve() / PROJECT_TEMPLATES_DIR
+
+
+def apps_to_build(app_names: Iterable[str], root: Path, only_apps: Optional[Iterable[str]] = None,
+                  skip_apps: Iterable[str] = ()) -> List[str]:
     """
-    Генерує Django apps, models, views, urls і templates
-    відповідно до структури, створеної LLMConverterNode.
+    Apps, які треба (пере)записати.
+    only_apps — якщо задано, перебудовуються лише ці apps
+    (плюс ті, чиїх директорій ще немає на диску).
+    skip_apps — apps, уже записані під час стрімінгу плану.
     """
+    names = list(app_names)
+    if only_apps is not None:
+        only_apps = set(only_apps)
+        names = [n for n in names if n in only_apps or not (root / n).exists()]
+        logging.info(f"♻️ Перебудовуємо {len(names)} apps, решта без змін")
 
-    apps = django_plan.get("apps", [])
-    for app in apps:
-        app_name = app["name"]
-        app_dir = root / app_name
-        app_dir.mkdir(parents=True, exist_ok=True)
+    skip_apps = set(skip_apps)
+    if skip_apps:
+        names = [n for n in names if n not in skip_apps]
+        logging.info(f"⚡ {len(skip_apps)} apps вже записані під час стрімінгу")
+    return names
 
-        # models.py
-        models_file = app_dir / "models.py"
-        with models_file.open("w", encoding="utf-8") as f:
-            f.write("from django.db import models\n\n")
-            for model in app.get("models", []):
-                f.write(f"class {model['name']}(models.Model):\n")
-                for field, ftype in model.get("fields", {}).items():
-                    f.write(f"    {field} = models.{ftype}(max_length=255)\n")
-                f.write("\n")
 
-        # views.py
-        views_file = app_dir / "views.py"
-        with views_file.open("w", encoding="utf-8") as f:
-            f.write("from django.views import generic\n")
-            f.write(f"from .models import *\n\n")
-            for view in app.get("views", []):
-                f.write(f"class {view['name']}(generic.{view['type']}):\n")
-                f.write(f"    model = {view['model']}\n")
-                f.write(f"    template_name = '{view.get('template', '')}'\n\n")
+def build_django_project(django_plan: dict, root: Path, only_apps: Optional[Iterable[str]] = None,
+                         skip_apps: Iterable[str] = (), skip_templates: Iterable[str] = (),
+                         max_workers: int = 8, project_apps: Optional[List[str]] = None):
+    """
+    Генерує каркас проєкту (manage.py, settings, urls) і Django apps — models, views, urls, templates —
+    відповідно до структури, створеної LLMConverterNode.
+    Усі файли рендеряться в пам'яті (apps — паралельно) і записуються одним атомарним проходом.
 
-        # urls.py
-        urls_file = app_dir / "urls.py"
-        with urls_file.open("w", encoding="utf-8") as f:
-            f.write("from django.urls import path\n")
-            f.write("from . import views\n\n")
-            f.write("urlpatterns = [\n")
-            for url in app.get("urls", []):
-                f.write(f"    path('{url['pattern']}', views.{url['view']}.as_view(), name='{url['view'].lower()}'),\n")
-            f.write("]\n")
+    only_apps, skip_apps — див. apps_to_build.
+    skip_templates — шаблони, сконвертовані з ERB (заглушки для них не пишуться).
+    project_apps — повний список apps проєкту для settings/urls, якщо django_plan
+    містить лише ті apps, що перебудовуються.
+    """
 
-        # templates
-        for tmpl in app.get("templates", []):
-            tmpl_path = root / app_name / "templates" / tmpl["name"]
-            tmpl_path.parent.mkdir(parents=True, exist_ok=True)
-            with tmpl_path.open("w", encoding="utf-8") as f:
-                f.write("{% extends 'base.html' %}\n{% block content %}\n")
-                f.write(f"<!-- Auto-generated template for {tmpl['name']} -->\n")
-                f.write("{% endblock %}\n")
+    all_apps = django_plan.get("apps", [])
+    selected = set(apps_to_build([a["name"] for a in all_apps], root, only_apps, skip_apps))
+    apps = [a for a in all_apps if a["name"] in selected]
 
-        # apps.py
-        apps_file = app_dir / "apps.py"
-        with apps_file.open("w", encoding="utf-8") as f:
-            f.write("from django.apps import AppConfig\n\n")
-            f.write(f"class {app_name.capitalize()}Config(AppConfig):\n")
-            f.write(f"    default_auto_field = 'django.db.models.BigAutoField'\n")
-            f.write(f"    name = '{app_name}'\n")
+    # settings/urls залежать від повного списку apps, тож каркас рендериться завжди
+    files = render_project_skeleton(root.parent, project_apps or [a["name"] for a in all_apps])
+    skip_templates = set(skip_templates)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(apps)))) as pool:
+        for app_files in pool.map(lambda app: render_app(app, root, skip_templates), apps):
+            files.update(app_files)
 
-        # __init__.py
-        (app_dir / "__init__.py").touch()
+    written = write_files_atomic(files)
+    logging.info(f"🎯 Django project build completed: {len(apps)} apps, {len(files)} files, {written} bytes.")
 
-        logging.info(f"✅ Django app '{app_name}' created.")
 
-    logging.info("🎯 Django project build completed.")
+def build_django_app(app: dict, root: Path, skip_templates: Iterable[str] = ()):
+    """Записує файли однієї Django app (models, views, urls, templates, apps.py)."""
+    write_files_atomic(render_app(app, root, skip_templates))
+    logging.info(f"✅ Django app '{app['name']}' created.")
@@ -0,0 +1,177 @@
+import os
+import re
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Iterable, Tuple
+
+
+# Директорії, які ніколи не містять коду застосунку (за назвою, на будь-якому рівні)
+EXCLUDED_DIR_NAMES = {".git", "node_modules", "__pycache__", "venv", ".venv", ".bundle", ".idea"}
+
+# Директорії Rails, які пропускаємо відносно кореня проєкту
+EXCLUDED_ROOT_DIRS = {"tmp", "log", "vendor", "storage", "coverage", "public/assets", "app/assets/builds"}
+
+IGNORE_FILES = (".gitignore", ".dockerignore")
+
+# Rails-роль файлу → префікс шляху (+ допустимі розширення)
+ROLE_RULES: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "models": ("app/models/", (".rb",)),
+    "controllers": ("app/controllers/", (".rb",)),
+    "views": ("app/views/", (".erb",)),
+    "helpers": ("app/helpers/", (".rb",)),
+    "jobs": ("app/jobs/", (".rb",)),
+    "mailers": ("app/mailers/", (".rb",)),
+    "migrations": ("db/migrate/", (".rb",)),
+}
+
+
+class IgnoreRules:
+    """
+    Спрощена реалізація синтаксису .gitignore для файлів у корені проєкту:
+    `*`, `**`, `?`, якорі `/`, шаблони лише для директорій (`dir/`) і заперечення `!`.
+    Останній збіг перемагає, як у git.
+    """
+
+    def __init__(self, patterns: Iterable[str] = ()):
+        self.rules: List[Tuple[re.Pattern, bool, bool]] = []
+        for pattern in patterns:
+            self.add(pattern)
+
+    @classmethod
+    def from_files(cls, root: Path, names: Iterable[str] = IGNORE_FILES) -> "IgnoreRules":
+        rules = cls()
+        for name in names:
+            path = root / name
+            if path.exists():
+                for line in path.read_text(encoding="utf-8", errors="ignore").splitlines():
+                    rules.add(line)
+        return rules
+
+    def add(self, pattern: str):
+        pattern = pattern.strip()
+        if not pattern or pattern.startswith("#"):
+            return
+
+        negate = pattern.startswith("!")
+        if negate:
+            pattern = pattern[1:]
+        dir_only = pattern.endswith("/")
+        pattern = pattern.strip("/") if dir_only else pattern
+        anchored = "/" in pattern.rstrip("/")
+        pattern = pattern.lstrip("/")
+
+        regex = _glob_to_regex(pattern)
+        prefix = "^" if anchored else "^(?:.*/)?"
+        self.rules.append((re.compile(prefix + regex + "$"), negate, dir_only))
+
+    def is_ignored(self, rel_path: str, is_dir: bool = False) -> bool:
+        ignored = False
+        for regex, negate, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path):
+                ignored = not negate
+        return ignored
+
+
+def _glob_to_regex(pattern: str) -> str:
+    i, out = 0, []
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            out.append("[^/]")
+            i += 1
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(out)
+
+
+class RailsFileIndex:
+    """
+    Індекс файлів Rails-проєкту, побудований одним проходом os.walk.
+    Зберігає відносні POSIX-шляхи та розкладає їх по Rails-ролях.
+    """
+
+    def __init__(self, root: Path, files: List[str]):
+        self.root = root
+        self.files = files
+        self._file_set = set(files)
+        self.buckets: Dict[str, List[str]] = {role: [] for role in ROLE_RULES}
+        for rel in files:
+            role = self.role_of(rel)
+            if role:
+                self.buckets[role].append(rel)
+
+    @staticmethod
+    def role_of(rel: str) -> Optional[str]:
+        for role, (prefix, extensions) in ROLE_RULES.items():
+            if rel.startswith(prefix) and rel.endswith(extensions):
+                return role
+        return None
+
+    def bucket(self, role: str) -> List[str]:
+        return self.buckets.get(role, [])
+
+    def path(self, rel: str) -> Path:
+        return self.root / rel
+
+    def has(self, rel: str) -> bool:
+        return rel in self._file_set
+
+    def under(self, prefix: str) -> List[str]:
+        prefix = prefix.rstrip("/") + "/"
+        return [rel for rel in self.files if rel.startswith(prefix)]
+
+    def summary(self) -> Dict[str, int]:
+        return {role: len(files) for role, files in self.buckets.items()}
+
+
+def scan_rails_tree(app_dir: str, use_ignore_files: bool = True) -> RailsFileIndex:
+    """
+    Один обхід дерева Rails-проєкту з відсіканням ігнорованих директорій:
+    вбудовані виключення + правила з .gitignore/.dockerignore.
+    Вкладені Python venv (директорії з pyvenv.cfg) теж пропускаються.
+    """
+    root = Path(app_dir)
+    if not root.exists():
+        logging.warning(f"⚠️ Директорія не знайдена: {root}")
+        return RailsFileIndex(root, [])
+
+    rules = IgnoreRules.from_files(root) if use_ignore_files else IgnoreRules()
+    files, pruned = [], 0
+
+    for current, dirnames, filenames in os.walk(root):
+        rel_dir = Path(current).relative_to(root).as_posix()
+        rel_dir = "" if rel_dir == "." else rel_dir + "/"
+
+        keep = []
+        for d in sorted(dirnames):
+            rel = rel_dir + d
+            if (
+                d in EXCLUDED_DIR_NAMES
+                or rel in EXCLUDED_ROOT_DIRS
+                or rules.is_ignored(rel, is_dir=True)
+                or (Path(current) / d / "pyvenv.cfg").exists()
+            ):
+                pruned += 1
+                continue
+            keep.append(d)
+        dirnames[:] = keep
+
+        for f in sorted(filenames):
+            rel = rel_dir + f
+            if not rules.is_ignored(rel):
+                files.append(rel)
+
+    index = RailsFileIndex(root, files)
+    logging.info(f"📇 Проіндексовано {len(files)} файлів (відсічено {pruned} директорій): {index.summary()}")
+    return index
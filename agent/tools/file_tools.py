@@ -1,21 +1,29 @@
 import os
 import logging
+import tempfile
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Iterable
+from agent.tools.file_index import EXCLUDED_DIR_NAMES
+from agent.tools.profiler import current_profiler
 
 
-def list_files(base_dir: str, extensions: Optional[List[str]] = None) -> List[str]:
+def list_files(base_dir: str, extensions: Optional[List[str]] = None,
+               exclude_dirs: Iterable[str] = EXCLUDED_DIR_NAMES) -> List[str]:
     """
     Рекурсивно повертає список файлів у директорії base_dir.
     Можна вказати список розширень (наприклад ['.rb', '.erb']).
+    Директорії з exclude_dirs (node_modules, venv, .git, ...) не обходяться.
+    Для повного Rails-дерева використовуйте scan_rails_tree — один прохід з .gitignore.
     """
     base_path = Path(base_dir)
     if not base_path.exists():
         logging.warning(f"⚠️ Директорія не знайдена: {base_path}")
         return []
 
+    exclude_dirs = set(exclude_dirs)
     result = []
-    for root, _, files in os.walk(base_path):
+    for root, dirs, files in os.walk(base_path):
+        dirs[:] = [d for d in dirs if d not in exclude_dirs]
         for f in files:
             if not extensions or any(f.endswith(ext) for ext in extensions):
                 result.append(str(Path(root) / f))
@@ -50,11 +58,37 @@ def write_file(file_path: str, content: str):
         path.parent.mkdir(parents=True, exist_ok=True)
         with open(path, "w", encoding="utf-8") as f:
             f.write(content)
+        current_profiler().add_bytes(len(content.encode("utf-8")))
         logging.debug(f"💾 Записано файл: {file_path} ({len(content)} симв.)")
     except Exception as e:
         logging.error(f"❌ Помилка при записі у {file_path}: {e}")
 
 
+def write_files_atomic(files: Dict[Path, str]) -> int:
+    """
+    Записує набір файлів одним проходом: директорії створюються один раз,
+    кожен файл пишеться у тимчасовий поруч і атомарно підміняється через os.replace —
+    читач ніколи не побачить напівзаписаний файл. :return: кількість записаних байтів
+    """
+    for directory in {path.parent for path in files}:
+        directory.mkdir(parents=True, exist_ok=True)
+
+    written = 0
+    for path, content in files.items():
+        data = content.encode("utf-8")
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        written += len(data)
+    current_profiler().add_bytes(written)
+    return written
+
+
 def ensure_dir(directory: str):
     """
     Переконується, що директорія існує.
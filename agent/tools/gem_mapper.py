@@ -0,0 +1,255 @@
+"""
+Детермінована генерація requirements.txt з Gemfile.lock / Gemfile.
+Прямі залежності Rails-проєкту мапляться на PyPI-пакети за курованою таблицею
+GEM_TO_PYPI; LLM питається лише про гемів, яких у таблиці немає — усіх одним викликом.
+"""
+import re
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from agent.tools.plan_utils import parse_llm_json
+
+DJANGO_REQUIREMENT = "Django>=5.0,<6.0"
+
+# gem → PyPI-вимога; None — в екосистемі Django відповідник не потрібен
+# (вбудована функціональність, фронтенд-асети або інструменти деплою Rails)
+GEM_TO_PYPI: Dict[str, Optional[str]] = {
+    # фреймворк і інфраструктура
+    "rails": DJANGO_REQUIREMENT,
+    "pg": "psycopg[binary]>=3.1,<4",
+    "mysql2": "mysqlclient>=2.2,<3",
+    "trilogy": "mysqlclient>=2.2,<3",
+    "sqlite3": None,
+    "puma": "gunicorn>=22.0,<24",
+    "unicorn": "gunicorn>=22.0,<24",
+    "redis": "redis>=5.0,<6",
+    "dotenv-rails": "python-dotenv>=1.0,<2",
+    "rack-cors": "django-cors-headers>=4.3,<5",
+    "bootsnap": None,
+    "kamal": None,
+    "thruster": None,
+    "tzinfo-data": None,
+    "rails-i18n": None,
+    # кеш, черги, websockets
+    "solid_cache": None,  # django.core.cache.backends.db.DatabaseCache
+    "solid_queue": "django-q2>=1.6,<2",
+    "sidekiq": "celery[redis]>=5.4,<6",
+    "good_job": "django-q2>=1.6,<2",
+    "delayed_job_active_record": "django-q2>=1.6,<2",
+    "solid_cable": "channels>=4.1,<5",
+    "actioncable": "channels>=4.1,<5",
+    # автентифікація і доступ
+    "devise": "django-allauth>=65.0,<66",
+    "omniauth": "django-allauth>=65.0,<66",
+    "tailwind_devise": None,  # Tailwind-стилі для в'юшок devise
+    "bcrypt": "bcrypt>=4.1,<5",
+    "jwt": "PyJWT>=2.8,<3",
+    "pundit": "rules>=3.3,<4",
+    "cancancan": "rules>=3.3,<4",
+    "rolify": "django-guardian>=2.4,<3",
+    # моделі
+    "friendly_id": "django-autoslug>=1.9,<2",
+    "paper_trail": "django-simple-history>=3.5,<4",
+    "acts-as-taggable-on": "django-taggit>=5.0,<7",
+    "acts_as_list": "django-ordered-model>=3.7,<4",
+    "money-rails": "django-money>=3.4,<4",
+    "ransack": "django-filter>=24.0,<26",
+    "kaminari": None,  # django.core.paginator
+    "will_paginate": None,
+    "pagy": None,
+    # файли і зображення
+    "image_processing": "Pillow>=10.0,<12",
+    "mini_magick": "Pillow>=10.0,<12",
+    "ruby-vips": "Pillow>=10.0,<12",
+    "carrierwave": "django-storages>=1.14,<2",
+    "shrine": "django-storages>=1.14,<2",
+    "aws-sdk-s3": "boto3>=1.34,<2",
+    # API і представлення
+    "jbuilder": "djangorestframework>=3.15,<4",
+    "active_model_serializers": "djangorestframework>=3.15,<4",
+    "simple_form": "django-crispy-forms>=2.1,<3",
+    "propshaft": "whitenoise>=6.6,<7",
+    "sprockets-rails": "whitenoise>=6.6,<7",
+    "importmap-rails": None,
+    "turbo-rails": None,
+    "stimulus-rails": None,
+    "tailwindcss-rails": "django-tailwind>=3.8,<5",
+    "cssbundling-rails": None,
+    "jsbundling-rails": None,
+    # інтеграції
+    "stripe": "stripe>=8.0,<12",
+    "httparty": "requests>=2.31,<3",
+    "faraday": "requests>=2.31,<3",
+    "nokogiri": "lxml>=5.0,<6",
+    "geocoder": "geopy>=2.4,<3",
+    "sentry-ruby": "sentry-sdk>=2.0,<3",
+    "sentry-rails": "sentry-sdk>=2.0,<3",
+    # розробка і тести (потрапляють у requirements-dev.txt)
+    "debug": None,
+    "web-console": "django-debug-toolbar>=4.3,<6",
+    "brakeman": "bandit>=1.7,<2",
+    "rubocop": "ruff>=0.4",
+    "rubocop-rails-omakase": "ruff>=0.4",
+    "rspec-rails": "pytest-django>=4.8,<5",
+    "capybara": "pytest-django>=4.8,<5",
+    "selenium-webdriver": "selenium>=4.20,<5",
+    "factory_bot_rails": "factory-boy>=3.3,<4",
+    "faker": "Faker>=24.0",
+    "letter_opener": None,
+}
+
+DEV_GROUPS = {"development", "test"}
+
+_SPEC_RE = re.compile(r"^    (\S+) \(([^)]+)\)$")
+_DEP_RE = re.compile(r"^  (\S+?)(!)?(?: \(([^)]+)\))?$")
+_GEM_RE = re.compile(r"""^\s*gem\s+["']([^"']+)["'](.*)$""")
+_GROUP_RE = re.compile(r"^\s*group\s+(.+?)\s+do\b")
+_GROUP_OPT_RE = re.compile(r"group:\s*(\[[^\]]*\]|%i\[[^\]]*\]|:\w+)")
+# інші блоки, що закриваються end: platforms/install_if/source/git ... do, if/unless/case
+_BLOCK_RE = re.compile(r"(\bdo\s*(\|[^|]*\|)?\s*$)|^\s*(if|unless|case|begin|while|until)\b")
+
+
+def parse_gemfile_lock(text: str) -> Dict[str, Any]:
+    """
+    :return: {"specs": {gem: версія}, "dependencies": {gem: вимога або ""}} —
+             specs містять усі (і транзитивні) геми, dependencies — лише прямі.
+    """
+    specs, dependencies = {}, {}
+    section = None
+    for line in text.splitlines():
+        if line and not line.startswith(" "):
+            section = line.strip()
+            continue
+        if section in ("GEM", "GIT", "PATH"):
+            match = _SPEC_RE.match(line)
+            if match:
+                # "1.18.1-x86_64-linux-gnu" → "1.18.1"
+                specs.setdefault(match.group(1), match.group(2).split("-")[0])
+        elif section == "DEPENDENCIES":
+            match = _DEP_RE.match(line)
+            if match:
+                dependencies[match.group(1)] = match.group(3) or ""
+    return {"specs": specs, "dependencies": dependencies}
+
+
+def parse_gemfile(text: str) -> Dict[str, Dict[str, Any]]:
+    """
+    {gem: {"requirement": "~> 4.9", "groups": [...]}} з урахуванням блоків group ... do.
+    Кожен блок (і вкладені platforms/install_if ... do) кладе на стек свій запис — порожній
+    для не-group, — тож end закриває саме свій блок, а не зовнішній group.
+    """
+    gems: Dict[str, Dict[str, Any]] = {}
+    group_stack: List[List[str]] = []
+    for raw in text.splitlines():
+        line = raw.split("#", 1)[0].rstrip()
+        if not line.strip():
+            continue
+        group = _GROUP_RE.match(line)
+        if group:
+            group_stack.append(re.findall(r"\w+", group.group(1)))
+            continue
+        if _BLOCK_RE.search(line):
+            group_stack.append([])
+            continue
+        if re.match(r"^\s*end\b", line) and group_stack:
+            group_stack.pop()
+            continue
+        gem = _GEM_RE.match(line)
+        if not gem:
+            continue
+        rest = gem.group(2)
+        groups = [g for block in group_stack for g in block]
+        option = _GROUP_OPT_RE.search(rest)
+        if option:
+            groups += [g for g in re.findall(r"\w+", option.group(1)) if g != "i"]
+        versions = re.findall(r"""["']([~<>=!]+\s*[\d.]+\w*)["']""", rest)
+        gems[gem.group(1)] = {"requirement": ", ".join(versions), "groups": groups or ["default"]}
+    return gems
+
+
+def load_gems(rails_dir: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Прямі залежності проєкту: {gem: {"version": заблокована версія, "requirement", "groups"}}.
+    Групи беруться з Gemfile, версії — з Gemfile.lock (якщо він є).
+    """
+    root = Path(rails_dir)
+    gemfile = root / "Gemfile"
+    lockfile = root / "Gemfile.lock"
+    declared = parse_gemfile(gemfile.read_text(encoding="utf-8")) if gemfile.exists() else {}
+    locked = parse_gemfile_lock(lockfile.read_text(encoding="utf-8")) if lockfile.exists() else None
+
+    names = list(locked["dependencies"]) if locked else list(declared)
+    gems = {}
+    for name in names:
+        info = declared.get(name, {})
+        gems[name] = {
+            "version": locked["specs"].get(name, "") if locked else "",
+            "requirement": (locked["dependencies"].get(name) if locked else None) or info.get("requirement", ""),
+            "groups": info.get("groups", ["default"]),
+        }
+    return gems
+
+
+def _is_dev(gem: Dict[str, Any]) -> bool:
+    return bool(gem["groups"]) and set(gem["groups"]) <= DEV_GROUPS
+
+
+def _requirement_name(requirement: str) -> str:
+    return re.split(r"[\[<>=~!; ]", requirement, 1)[0].lower()
+
+
+def unmapped_gems(gems: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Геми, яких немає в GEM_TO_PYPI (про них питається LLM)."""
+    return {name: gem for name, gem in gems.items() if name not in GEM_TO_PYPI}
+
+
+def map_gems(gems: Dict[str, Dict[str, Any]], resolved: Optional[Dict[str, Optional[str]]] = None,
+             ) -> Tuple[Dict[str, List[str]], Dict[str, List[str]], Dict[str, str]]:
+    """
+    Мапить геми на PyPI-вимоги.
+    :param resolved: {gem: вимога або None} для гемів поза таблицею (відповідь LLM)
+    :return: (runtime {вимога: [геми]}, dev {вимога: [геми]}, {gem: причина пропуску})
+    """
+    resolved = resolved or {}
+    runtime: Dict[str, List[str]] = {DJANGO_REQUIREMENT: []}
+    dev: Dict[str, List[str]] = {}
+    skipped: Dict[str, str] = {}
+    for name, gem in gems.items():
+        requirement = GEM_TO_PYPI[name] if name in GEM_TO_PYPI else resolved.get(name)
+        if not requirement:
+            skipped[name] = "no Django equivalent needed" if name in GEM_TO_PYPI or name in resolved else "unmapped"
+            continue
+        target = dev if _is_dev(gem) else runtime
+        # один пакет із кількох гемів — одна вимога (перша з таблиці)
+        existing = next((r for r in target if _requirement_name(r) == _requirement_name(requirement)), requirement)
+        target.setdefault(existing, []).append(name)
+    return runtime, dev, skipped
+
+
+def _label(name: str, gem: Dict[str, Any]) -> str:
+    return f"{name} {gem['version']}".strip() if gem.get("version") else name
+
+
+def render_requirements(requirements: Dict[str, List[str]], gems: Dict[str, Dict[str, Any]],
+                        header: str = "") -> str:
+    lines = [header] if header else []
+    for requirement in sorted(requirements, key=str.lower):
+        sources = ", ".join(_label(n, gems[n]) for n in requirements[requirement])
+        lines.append(f"{requirement:<40}  # {sources}" if sources else requirement)
+    return "\n".join(lines) + "\n"
+
+
+def unmapped_gems_listing(unmapped: Dict[str, Dict[str, Any]]) -> str:
+    """Навантаження промпта requirements (інструкції — agent/prompts/requirements_prompt.txt)."""
+    return "\n".join(f"- {name} {gem['version']}".rstrip() for name, gem in sorted(unmapped.items()))
+
+
+def parse_unmapped_reply(reply: str, unmapped: Dict[str, Any]) -> Dict[str, Optional[str]]:
+    data = parse_llm_json(reply)
+    if not isinstance(data, dict):
+        logging.warning("⚠️ Gem mapping reply is not a JSON object, unmapped gems skipped.")
+        return {}
+    return {
+        name: value.strip() if isinstance(value, str) and value.strip() else None
+        for name, value in data.items() if name in unmapped
+    }
@@ -0,0 +1,87 @@
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+
+class AppsStreamParser:
+    """
+    Інкрементальний парсер JSON-плану {"apps": [...]} для стрімінгових відповідей LLM.
+    Приймає шматки тексту через feed() і повертає елементи масиву apps,
+    щойно закривається їхня фігурна дужка — не чекаючи кінця відповіді.
+    Текст до першої `{` (наприклад, ```json) ігнорується.
+    """
+
+    def __init__(self, array_key: str = "apps"):
+        self.array_key = array_key
+        self.buffer = ""
+        self._pos = 0
+        self._stack: List[str] = []       # відкриті контейнери: '{' або '['
+        self._keys: Dict[int, Optional[str]] = {}
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._array_depth: Optional[int] = None
+        self._item_start: Optional[int] = None
+        self._started = False
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        self.buffer += chunk
+        completed = []
+        buf = self.buffer
+
+        for i in range(self._pos, len(buf)):
+            ch = buf[i]
+
+            if not self._started:
+                if ch != "{":
+                    continue
+                self._started = True
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._last_string = json.loads(buf[self._string_start:i + 1])
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch == ":":
+                self._keys[len(self._stack)] = self._last_string
+            elif ch in "{[":
+                if (
+                    ch == "["
+                    and len(self._stack) == 1
+                    and self._keys.get(1) == self.array_key
+                ):
+                    self._array_depth = 2
+                if ch == "{" and self._array_depth is not None and len(self._stack) == self._array_depth:
+                    self._item_start = i
+                self._stack.append(ch)
+            elif ch in "}]":
+                if self._stack:
+                    self._stack.pop()
+                depth = len(self._stack)
+                if ch == "}" and self._item_start is not None and depth == self._array_depth:
+                    item = self._parse_item(buf[self._item_start:i + 1])
+                    if item is not None:
+                        completed.append(item)
+                    self._item_start = None
+                elif ch == "]" and self._array_depth is not None and depth == self._array_depth - 1:
+                    self._array_depth = None
+
+        self._pos = len(buf)
+        return completed
+
+    @staticmethod
+    def _parse_item(text: str) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError as e:
+            logging.warning(f"⚠️ Streamed app is not valid JSON, skipped: {e}")
+            return None
@@ -0,0 +1,325 @@
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, Optional
+
+
+# Параметри запиту, які не впливають на зміст відповіді
+_NON_KEY_PARAMS = {"stream", "timeout", "extra_headers", "user"}
+
+
+class LLMCache:
+    """
+    Персистентний content-addressed кеш відповідей LLM у SQLite.
+    Ключ — хеш моделі, температури, повідомлень та інших параметрів запиту.
+    Витіснення — LRU за розміром і віком записів.
+    """
+
+    def __init__(self, cache_dir: str = ".llm_cache", max_size_mb: int = 512, max_age_days: int = 30):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.cache_dir / "llm_cache.sqlite"
+        self.max_size_bytes = max_size_mb * 1024 * 1024
+        self.max_age_seconds = max_age_days * 24 * 3600
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " model TEXT,"
+            " payload TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created REAL NOT NULL,"
+            " accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries(accessed)")
+        self._conn.commit()
+        self.evict()
+
+    @staticmethod
+    def make_key(request: Dict[str, Any]) -> str:
+        """Стабільний sha256-ключ для параметрів chat.completions.create."""
+        keyed = {k: v for k, v in request.items() if k not in _NON_KEY_PARAMS}
+        raw = json.dumps(keyed, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, created FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or time.time() - row[1] > self.max_age_seconds:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def put(self, key: str, model: str, payload: Dict[str, Any]):
+        data = json.dumps(payload, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, model, payload, size, created, accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, data, len(data.encode("utf-8")), now, now),
+            )
+            self._conn.commit()
+        self.evict()
+
+    def evict(self):
+        """Видаляє застарілі записи, а потім найдавніше використані — поки кеш не вкладеться в ліміт."""
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM entries WHERE created < ?", (time.time() - self.max_age_seconds,)
+            )
+            removed = cur.rowcount
+
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total > self.max_size_bytes:
+                for key, size in self._conn.execute(
+                    "SELECT key, size FROM entries ORDER BY accessed ASC"
+                ).fetchall():
+                    if total <= self.max_size_bytes:
+                        break
+                    self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    total -= size
+                    removed += 1
+
+            self._conn.commit()
+            self.evictions += removed
+
+        if removed:
+            logging.debug(f"🧹 LLM cache: витіснено {removed} записів")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "size_bytes": size,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _dump_response(response: Any) -> Dict[str, Any]:
+    """Серіалізує відповідь OpenAI у JSON-сумісний словник."""
+    if hasattr(response, "model_dump"):
+        return response.model_dump(mode="json")
+    return {
+        "choices": [
+            {"index": 0, "message": {"role": "assistant", "content": response.choices[0].message.content}}
+        ]
+    }
+
+
+def _finish_reason(response: Any) -> Optional[str]:
+    choices = getattr(response, "choices", None)
+    return getattr(choices[0], "finish_reason", None) if choices else None
+
+
+def _stream_chunk(content: str) -> SimpleNamespace:
+    """Один шматок стріму у форматі chat.completion.chunk (з кешу — cached=True)."""
+    return _to_namespace({"choices": [{"index": 0, "delta": {"content": content}, "finish_reason": None}],
+                          "cached": True})
+
+
+def _stream_payload(content: str, finish_reason: Optional[str]) -> Dict[str, Any]:
+    """Зібрана зі стріму відповідь у форматі chat.completion."""
+    return {"choices": [{"index": 0, "finish_reason": finish_reason,
+                         "message": {"role": "assistant", "content": content}}]}
+
+
+def _to_namespace(data: Any) -> Any:
+    """Відновлює атрибутний доступ (response.choices[0].message.content) зі словника."""
+    if isinstance(data, dict):
+        return SimpleNamespace(**{k: _to_namespace(v) for k, v in data.items()})
+    if isinstance(data, list):
+        return [_to_namespace(v) for v in data]
+    return data
+
+
+class _CachedCompletions:
+    def __init__(self, owner: "CachedLLMClient"):
+        self._owner = owner
+
+    def create(self, **kwargs):
+        owner = self._owner
+        inner = owner.client.chat.completions
+
+        # множинні варіанти не кешуємо
+        if kwargs.get("n", 1) != 1:
+            return inner.create(**kwargs)
+
+        key = owner.cache.make_key(kwargs)
+        cached = owner.cache.get(key)
+        if cached is not None:
+            logging.debug(f"💾 LLM cache hit ({kwargs.get('model')}, {key[:12]})")
+            owner.remember(key, cached)
+            if kwargs.get("stream"):
+                return iter([_stream_chunk(cached["choices"][0]["message"]["content"])])
+            return _to_namespace({**cached, "cached": True})
+
+        if kwargs.get("stream"):
+            return self._record_stream(key, kwargs)
+
+        response = inner.create(**kwargs)
+        owner.store(key, kwargs, _finish_reason(response), _dump_response(response))
+        return response
+
+    def _record_stream(self, key: str, kwargs: dict):
+        """Прозоро віддає шматки стріму і зберігає зібрану відповідь у кеш після завершення."""
+        parts, finish_reason = [], None
+        for chunk in self._owner.client.chat.completions.create(**kwargs):
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+            finish_reason = _finish_reason(chunk) or finish_reason
+            yield chunk
+        self._owner.store(key, kwargs, finish_reason, _stream_payload("".join(parts), finish_reason))
+
+
+class CachedLLMClient:
+    """
+    Обгортка над OpenAI-клієнтом з тим самим інтерфейсом
+    (client.chat.completions.create), яка кешує відповіді на диску.
+    Решта атрибутів делегується оригінальному клієнту.
+
+    Кешуються лише повні відповіді (finish_reason == "stop"): обрізана на max_tokens
+    не повторюється при наступному запуску. Відповідь, яку відхилила валідація,
+    прибирається через invalidate_cached(client, вміст).
+    """
+
+    # скільки останніх відповідей пам'ятати для invalidate (вміст → ключ)
+    MAX_SERVED = 1024
+
+    def __init__(self, client, cache: LLMCache):
+        self.client = client
+        self.cache = cache
+        self.chat = SimpleNamespace(completions=_CachedCompletions(self))
+        self._served: Dict[str, str] = {}
+        self._served_lock = threading.Lock()
+
+    @staticmethod
+    def _content_digest(content: str) -> str:
+        return hashlib.sha256(content.strip().encode("utf-8")).hexdigest()
+
+    def remember(self, key: str, payload: Dict[str, Any]):
+        """Запам'ятовує, яким ключем віддано вміст (для invalidate)."""
+        try:
+            content = payload["choices"][0]["message"]["content"] or ""
+        except (KeyError, IndexError, TypeError):
+            return
+        with self._served_lock:
+            self._served[self._content_digest(content)] = key
+            while len(self._served) > self.MAX_SERVED:
+                self._served.pop(next(iter(self._served)))
+
+    def store(self, key: str, request: Dict[str, Any], finish_reason: Optional[str], payload: Dict[str, Any]):
+        if finish_reason != "stop":
+            logging.debug(f"💾 LLM response not cached (finish_reason={finish_reason}, {key[:12]})")
+            return
+        self.cache.put(key, request.get("model", ""), payload)
+        self.remember(key, payload)
+
+    def invalidate(self, content: str) -> bool:
+        """Видаляє з кешу відповідь з таким вмістом. :return: чи була вона в кеші"""
+        with self._served_lock:
+            key = self._served.pop(self._content_digest(content), None)
+        if key is None:
+            return False
+        self.cache.delete(key)
+        logging.debug(f"💾 LLM cache entry invalidated ({key[:12]})")
+        return True
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+async def _cached_stream(content: str):
+    yield _stream_chunk(content)
+
+
+class _AsyncCachedCompletions(_CachedCompletions):
+    async def create(self, **kwargs):
+        owner = self._owner
+        inner = owner.client.chat.completions
+
+        if kwargs.get("n", 1) != 1:
+            return await inner.create(**kwargs)
+
+        key = owner.cache.make_key(kwargs)
+        cached = owner.cache.get(key)
+        if cached is not None:
+            logging.debug(f"💾 LLM cache hit ({kwargs.get('model')}, {key[:12]})")
+            owner.remember(key, cached)
+            if kwargs.get("stream"):
+                return _cached_stream(cached["choices"][0]["message"]["content"])
+            return _to_namespace({**cached, "cached": True})
+
+        if kwargs.get("stream"):
+            return self._record_stream(key, kwargs)
+
+        response = await inner.create(**kwargs)
+        owner.store(key, kwargs, _finish_reason(response), _dump_response(response))
+        return response
+
+    async def _record_stream(self, key: str, kwargs: dict):
+        parts, finish_reason = [], None
+        async for chunk in await self._owner.client.chat.completions.create(**kwargs):
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+            finish_reason = _finish_reason(chunk) or finish_reason
+            yield chunk
+        self._owner.store(key, kwargs, finish_reason, _stream_payload("".join(parts), finish_reason))
+
+
+class AsyncCachedLLMClient(CachedLLMClient):
+    """
+    CachedLLMClient для асинхронного клієнта (AsyncOpenAI): await client.chat.completions.create.
+    Звернення до SQLite локальні й короткі, тож виконуються прямо в циклі подій.
+    """
+
+    is_async = True
+
+    def __init__(self, client, cache: LLMCache):
+        super().__init__(client, cache)
+        self.chat = SimpleNamespace(completions=_AsyncCachedCompletions(self))
+
+
+def invalidate_cached(client, content: str) -> bool:
+    """
+    Прибирає з кешу відповідь LLM, яку відхилила валідація, — наступний запуск
+    спитає модель знову замість повтору тієї самої невалідної відповіді.
+    client — будь-яка обгортка (router/profiler/limiter), CachedLLMClient шукається всередині.
+    """
+    while client is not None:
+        if isinstance(client, CachedLLMClient):
+            return client.invalidate(content)
+        client = vars(client).get("client") if hasattr(client, "__dict__") else None
+    return False
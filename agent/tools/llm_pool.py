@@ -0,0 +1,86 @@
+import time
+import threading
+from types import SimpleNamespace
+import httpx
+from openai import OpenAI
+
+
+def create_pooled_openai_client(max_connections: int = 32, timeout: float = 600.0) -> OpenAI:
+    """
+    Один OpenAI-клієнт з пулом keep-alive з'єднань httpx для всіх проєктів пакетного запуску.
+    """
+    http_client = httpx.Client(
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        timeout=timeout,
+    )
+    return OpenAI(http_client=http_client)
+
+
+class _LimitedCompletions:
+    def __init__(self, owner: "ConcurrencyLimitedClient"):
+        self._owner = owner
+
+    def create(self, **kwargs):
+        owner = self._owner
+        waited = time.perf_counter()
+        owner.semaphore.acquire()
+        owner._enter(time.perf_counter() - waited)
+        try:
+            response = owner.client.chat.completions.create(**kwargs)
+        except BaseException:
+            owner._exit()
+            raise
+        if kwargs.get("stream"):
+            return self._hold_stream(response)
+        owner._exit()
+        return response
+
+    def _hold_stream(self, stream):
+        """Слот звільняється лише після того, як стрім повністю прочитано (або закрито)."""
+        try:
+            yield from stream
+        finally:
+            self._owner._exit()
+
+
+class ConcurrencyLimitedClient:
+    """
+    Обгортка з тим самим інтерфейсом (client.chat.completions.create), що обмежує
+    кількість одночасних LLM-запитів глобально — для всіх вузлів і всіх проєктів,
+    які ділять цей клієнт.
+    """
+
+    def __init__(self, client, max_in_flight: int):
+        self.client = client
+        self.max_in_flight = max_in_flight
+        self.semaphore = threading.BoundedSemaphore(max_in_flight)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests = 0
+        self.wait_seconds = 0.0
+        self.chat = SimpleNamespace(completions=_LimitedCompletions(self))
+
+    def _enter(self, waited: float):
+        with self._lock:
+            self.in_flight += 1
+            self.requests += 1
+            self.wait_seconds += waited
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def _exit(self):
+        with self._lock:
+            self.in_flight -= 1
+        self.semaphore.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "max_in_flight": self.max_in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "queue_wait_s": round(self.wait_seconds, 3),
+            }
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
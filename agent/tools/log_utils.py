@@ -1,59 +1,55 @@
 import json
+import atexit
 import logging
 from datetime import datetime
 from pathlib import Path
 from typing import Any
+from agent.tools.trace_sink import start_logging, stop_logging, trace, tracing_enabled
 
 
-def setup_logging(log_dir: str = "logs"):
+def setup_logging(log_dir: str = "logs", max_mb: int = 50, backup_count: int = 5):
     """
-    Ініціалізує логування з часом, кольорами і файлом для запису.
+    Ініціалізує логування: консоль, текстовий logs/run_*.log і структурована
+    траса logs/run_*.trace.jsonl. Запис виконується у фоновому потоці (QueueListener),
+    файли ротуються за розміром і стискаються у .gz.
     """
     Path(log_dir).mkdir(exist_ok=True)
     timestamp = datetime.now().strftime("run_%Y%m%d_%H%M")
     log_path = Path(log_dir) / f"{timestamp}.log"
+    trace_path = Path(log_dir) / f"{timestamp}.trace.jsonl"
 
-    logging.basicConfig(
-        level=logging.DEBUG,
-        format="%(asctime)s [%(levelname)s] %(message)s",
-        handlers=[
-            logging.FileHandler(log_path, encoding="utf-8"),
-            logging.StreamHandler()
-        ]
-    )
+    start_logging(str(log_path), str(trace_path), max_bytes=max_mb * 1024 * 1024, backup_count=backup_count)
+    atexit.register(stop_logging)
 
-    logging.info(f"📝 Logging to: {log_path}")
+    logging.info(f"📝 Logging to: {log_path} (trace → {trace_path})")
     return log_path
 
 
 def log_state(node_name: str, state: Any):
     """
-    Логує поточний стан після кожного вузла у форматі JSON.
+    Записує знімок стану після вузла у JSONL-трасу.
+    Запис форматується у фоновому потоці, тож стан копіюється тут через JSON: вузли далі
+    змінюють свої списки й словники, і неглибока копія мала б спільні з ними об'єкти.
+    Незмінні між вузлами поля записуються лише хешем.
     """
+    if not tracing_enabled():
+        return
     try:
-        # Уникаємо надто великих даних (якщо є файли)
-        filtered = {}
-        for k, v in state.__dict__.items():
-            if isinstance(v, (str, int, float, bool, list, dict, type(None))):
-                filtered[k] = v
-            else:
-                filtered[k] = str(v)
-
-        state_json = json.dumps(filtered, indent=2, ensure_ascii=False)
-        logging.debug(f"\n📦 STATE SNAPSHOT AFTER [{node_name}]\n{state_json}\n")
-
+        fields = state.__dict__ if hasattr(state, "__dict__") else state
+        snapshot = json.loads(json.dumps(fields, ensure_ascii=False, default=str))
+        trace("state", node=node_name, state=snapshot)
+        logging.debug(f"📦 STATE SNAPSHOT AFTER [{node_name}] → trace")
     except Exception as e:
         logging.error(f"❌ Помилка при логуванні стану: {e}")
 
 
 def log_llm_call(node_name: str, prompt: str, response: str):
     """
-    Форматоване логування LLM викликів (prompt + response).
+    Логування LLM викликів: повні prompt і response — у JSONL-трасу,
+    у текстовий лог — лише розміри.
     """
-    logging.debug(f"\n--- LLM CALL [{node_name}] ---")
-    logging.debug(f"[PROMPT ↓]\n{prompt.strip()}\n")
-    logging.debug(f"[RESPONSE ↓]\n{response.strip()}\n")
-    logging.debug(f"--- END LLM CALL ---\n")
+    trace("llm_call", node=node_name, prompt=prompt, response=response)
+    logging.debug(f"🤖 LLM CALL [{node_name}] prompt {len(prompt)} chars → response {len(response)} chars")
 
 
 def summarize_state_changes(old_state: Any, new_state: Any) -> str:
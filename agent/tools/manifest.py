@@ -0,0 +1,83 @@
+import json
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, Any, Tuple, Set, Optional
+from agent.tools.file_index import RailsFileIndex, scan_rails_tree
+from agent.tools.profiler import current_profiler
+
+MANIFEST_NAME = ".rails2django_manifest.json"
+MANIFEST_VERSION = 2  # 2: apps пакетовані як converted_project.<app>
+
+# Файли поза app/, від яких залежить конвертація
+TRACKED_FILES = ["config/routes.rb", "db/schema.rb"]
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_json(obj: Any) -> str:
+    """Стабільний хеш JSON-сумісного об'єкта (ключі відсортовано)."""
+    return hash_bytes(json.dumps(obj, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+
+
+def fingerprint_rails_tree(app_dir: str, index: Optional[RailsFileIndex] = None) -> Dict[str, str]:
+    """
+    Повертає {відносний_шлях: sha256} для всіх файлів у app/ і db/migrate/,
+    а також config/routes.rb і db/schema.rb.
+    Якщо індекс файлів уже побудовано — використовує його замість нового обходу.
+    """
+    index = index or scan_rails_tree(app_dir)
+    tracked = index.under("app") + index.under("db/migrate") + [rel for rel in TRACKED_FILES if index.has(rel)]
+    return {rel: hash_bytes(index.path(rel).read_bytes()) for rel in tracked}
+
+
+def diff_fingerprints(old: Dict[str, Any], new: Dict[str, str]) -> Tuple[Set[str], Set[str]]:
+    """
+    Порівнює відбитки двох запусків.
+    :param old: {rel: {"hash": ...}} з попереднього маніфесту
+    :return: (змінені або нові файли, видалені файли)
+    """
+    changed = {rel for rel, h in new.items() if old.get(rel, {}).get("hash") != h}
+    removed = set(old) - set(new)
+    return changed, removed
+
+
+def empty_manifest() -> Dict[str, Any]:
+    return {"version": MANIFEST_VERSION, "files": {}, "units": {}}
+
+
+def load_manifest(output_dir: str) -> Dict[str, Any]:
+    """
+    Зчитує маніфест попереднього запуску з output_dir.
+    Якщо маніфесту немає або він іншої версії — повертає порожній.
+    """
+    path = Path(output_dir) / MANIFEST_NAME
+    if not path.exists():
+        return empty_manifest()
+    try:
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError) as e:
+        logging.warning(f"⚠️ Маніфест пошкоджено, виконуємо повну конвертацію: {e}")
+        return empty_manifest()
+    if manifest.get("version") != MANIFEST_VERSION:
+        return empty_manifest()
+    return manifest
+
+
+def save_manifest(output_dir: str, files: Dict[str, Any], units: Dict[str, Any]):
+    """
+    Записує маніфест (відбитки файлів + фрагменти плану) в output_dir.
+    Запис атомарний: спочатку тимчасовий файл, потім rename.
+    """
+    path = Path(output_dir) / MANIFEST_NAME
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(
+        json.dumps({"version": MANIFEST_VERSION, "files": files, "units": units}, ensure_ascii=False),
+        encoding="utf-8",
+    )
+    tmp.replace(path)
+    current_profiler().add_bytes(path.stat().st_size)
+    logging.info(f"🧾 Маніфест збережено: {path} ({len(files)} файлів, {len(units)} фрагментів)")
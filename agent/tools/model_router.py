@@ -0,0 +1,213 @@
+"""
+Маршрутизація LLM-викликів: кожен вузол/тип задачі має свою модель, max_tokens і timeout,
+а на тайм-аут — запасну (швидшу) модель. Усі вузли викликають LLM через achat_completion().
+
+Перевизначення (за зростанням пріоритету):
+- MODEL_NAME — основна модель для «важких» задач (planner, discovery, converter);
+- LLM_ROUTES=routes.json — {"readme": {"model": "gpt-4o", "timeout": 120}, ...};
+- MODEL_<TASK>, напр. MODEL_REQUIREMENTS=gpt-4o-mini.
+
+З usage кожної відповіді записуються prompt_tokens і cached_tokens (частина промпта,
+взята провайдером з кешу префіксів, див. agent/tools/prompt_registry.py); для стрімів
+запитується usage в останньому шматку (stream_options.include_usage).
+
+Відповідь, обрізана на max_tokens (finish_reason == "length"), не проходить мовчки:
+для structured output (response_format) — TruncatedResponseError, для тексту — попередження.
+"""
+import os
+import json
+import time
+import logging
+import threading
+import contextvars
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import httpx
+import openai
+from agent.tools.trace_sink import trace
+
+FLAGSHIP = "gpt-4o"
+FAST = "gpt-4o-mini"
+
+# model=None — основна модель (MODEL_NAME або FLAGSHIP)
+DEFAULT_ROUTES: Dict[str, Dict[str, Any]] = {
+    "planner": {"model": None, "max_tokens": 2000, "timeout": 60, "fallback": FAST},
+    "discovery": {"model": None, "max_tokens": 4000, "timeout": 90, "fallback": FAST},
+    # якість плану критична — без підміни моделі
+    "converter": {"model": None, "max_tokens": 16000, "timeout": 300, "fallback": None},
+    "repair": {"model": FAST, "max_tokens": 4000, "timeout": 60, "fallback": None},
+    "readme": {"model": FAST, "max_tokens": 4000, "timeout": 60, "fallback": None},
+    "requirements": {"model": FAST, "max_tokens": 500, "timeout": 20, "fallback": None},
+}
+
+_TIMEOUT_ERRORS = (openai.APITimeoutError, httpx.TimeoutException, TimeoutError)
+
+
+class TruncatedResponseError(RuntimeError):
+    """LLM досягла max_tokens маршруту: JSON-відповідь обрізана і не розбирається."""
+
+
+_stats_lock = threading.Lock()
+# статистика поточного запуску (start_route_stats); поза запуском — спільний словник процесу
+ROUTE_STATS: Dict[str, Dict[str, Any]] = {}
+_run_routes: contextvars.ContextVar[Optional[Dict[str, Dict[str, Any]]]] = contextvars.ContextVar(
+    "run_routes", default=None)
+
+
+def _file_routes() -> Dict[str, Dict[str, Any]]:
+    path = os.getenv("LLM_ROUTES")
+    if not path:
+        return {}
+    try:
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError) as e:
+        logging.warning(f"⚠️ LLM_ROUTES {path} not loaded: {e}")
+        return {}
+
+
+def route_for(task: str) -> Dict[str, Any]:
+    """Повний маршрут задачі: model, max_tokens, timeout, fallback."""
+    route = {**DEFAULT_ROUTES.get(task, DEFAULT_ROUTES["converter"]), **_file_routes().get(task, {})}
+    route["model"] = os.getenv(f"MODEL_{task.upper()}") or route.get("model") or os.getenv("MODEL_NAME", FLAGSHIP)
+    return route
+
+
+def start_route_stats() -> Dict[str, Dict[str, Any]]:
+    """Окрема статистика маршрутизації для запуску (конкурентні та пакетні запуски не змішуються)."""
+    stats: Dict[str, Dict[str, Any]] = {}
+    _run_routes.set(stats)
+    return stats
+
+
+def _stats(task: str) -> Dict[str, Any]:
+    routes = _run_routes.get()
+    return (ROUTE_STATS if routes is None else routes).setdefault(task, {"calls": 0, "fallbacks": 0, "seconds": 0.0, "models": {},
+                                         "prompt_tokens": 0, "cached_tokens": 0, "truncated": 0})
+
+
+def _record(task: str, model: str, duration: float, fallback: bool, node: Optional[str]):
+    with _stats_lock:
+        stats = _stats(task)
+        stats["calls"] += 1
+        stats["fallbacks"] += int(fallback)
+        stats["seconds"] += duration
+        stats["models"][model] = stats["models"].get(model, 0) + 1
+    trace("llm_route", task=task, node=node, model=model, fallback=fallback, duration=round(duration, 3))
+
+
+def usage_tokens(usage: Any) -> Tuple[int, int]:
+    """(prompt_tokens, cached_tokens) з usage відповіді; (0, 0), якщо провайдер їх не повернув."""
+    if usage is None:
+        return 0, 0
+    details = getattr(usage, "prompt_tokens_details", None)
+    return getattr(usage, "prompt_tokens", 0) or 0, getattr(details, "cached_tokens", 0) or 0
+
+
+def _record_usage(task: str, usage: Any, node: Optional[str]):
+    prompt_tokens, cached_tokens = usage_tokens(usage)
+    if not prompt_tokens:
+        return
+    with _stats_lock:
+        stats = _stats(task)
+        stats["prompt_tokens"] += prompt_tokens
+        stats["cached_tokens"] += cached_tokens
+    trace("llm_usage", task=task, node=node, prompt_tokens=prompt_tokens, cached_tokens=cached_tokens)
+
+
+def _check_truncated(task: str, request: Dict[str, Any], finish_reason: Optional[str], node: Optional[str]):
+    if finish_reason != "length":
+        return
+    with _stats_lock:
+        _stats(task)["truncated"] += 1
+    trace("llm_truncated", task=task, node=node, model=request["model"], max_tokens=request["max_tokens"])
+    hint = "use --convert-mode chunked or raise" if task == "converter" else "raise"
+    message = (f"[{task}] {request['model']} response was cut off at max_tokens={request['max_tokens']} — "
+               f"{hint} max_tokens for \"{task}\" in LLM_ROUTES.")
+    if request.get("response_format"):
+        raise TruncatedResponseError(f"❌ {message}")
+    logging.warning(f"⚠️ {message}")
+
+
+def _finish_reason(response) -> Optional[str]:
+    choices = getattr(response, "choices", None)
+    return getattr(choices[0], "finish_reason", None) if choices else None
+
+
+async def _recording_stream(task: str, request: Dict[str, Any], stream, node: Optional[str]):
+    """
+    Прозоро віддає шматки стріму; usage з останнього шматка — у статистику задачі,
+    обрізання на max_tokens перевіряється після останнього шматка.
+    """
+    finish_reason = None
+    async for chunk in stream:
+        if getattr(chunk, "usage", None):
+            _record_usage(task, chunk.usage, node)
+        finish_reason = _finish_reason(chunk) or finish_reason
+        yield chunk
+    _check_truncated(task, request, finish_reason, node)
+
+
+def _finish(task: str, request: Dict[str, Any], response, node: Optional[str]):
+    if request.get("stream"):
+        return _recording_stream(task, request, response, node)
+    _record_usage(task, getattr(response, "usage", None), node)
+    _check_truncated(task, request, _finish_reason(response), node)
+    return response
+
+
+def _request(task: str, messages: List[Dict[str, Any]], params: Dict[str, Any]):
+    route = route_for(task)
+    request = {"model": route["model"], "messages": messages, "max_tokens": route["max_tokens"],
+               "timeout": route["timeout"], **params}
+    if request.get("stream"):
+        request.setdefault("stream_options", {"include_usage": True})
+    return route, request
+
+
+def _log_fallback(task: str, route: Dict[str, Any]):
+    logging.warning(f"⏳ [{task}] {route['model']} timed out after {route['timeout']}s "
+                    f"→ falling back to {route['fallback']}")
+
+
+async def achat_completion(client, task: str, messages: List[Dict[str, Any]], node: Optional[str] = None, **params):
+    """
+    await client.chat.completions.create з моделлю, max_tokens і timeout маршруту task
+    (client — асинхронний, див. agent.tools.async_client.as_async_client).
+    На тайм-аут повторює запит запасною моделлю маршруту (якщо вона задана).
+    Інші параметри (temperature, response_format, stream) передаються як є.
+    """
+    route, request = _request(task, messages, params)
+    started = time.perf_counter()
+    try:
+        response = await client.chat.completions.create(**request)
+        _record(task, request["model"], time.perf_counter() - started, False, node)
+        return _finish(task, request, response, node)
+    except _TIMEOUT_ERRORS:
+        if not route.get("fallback"):
+            raise
+        _log_fallback(task, route)
+
+    request["model"] = route["fallback"]
+    started = time.perf_counter()
+    response = await client.chat.completions.create(**request)
+    _record(task, request["model"], time.perf_counter() - started, True, node)
+    return _finish(task, request, response, node)
+
+
+def routing_report(routes: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+    """Звіт за статистикою запуску routes (за замовчуванням — поточного)."""
+    routes = routes if routes is not None else _run_routes.get() or ROUTE_STATS
+    with _stats_lock:
+        if not routes:
+            return "🧭 No LLM calls routed."
+        lines = ["🧭 LLM routing:"]
+        for task, stats in sorted(routes.items()):
+            models = ", ".join(f"{m}×{n}" for m, n in stats["models"].items())
+            cached = ""
+            if stats["prompt_tokens"]:
+                share = 100 * stats["cached_tokens"] / stats["prompt_tokens"]
+                cached = f"  cached {stats['cached_tokens']}/{stats['prompt_tokens']} prompt tokens ({share:.0f}%)"
+            truncated = f"  truncated {stats['truncated']}" if stats["truncated"] else ""
+            lines.append(f"  {task:<13} {stats['calls']:4d} calls  {stats['seconds']:8.2f}s  "
+                         f"fallbacks {stats['fallbacks']}  [{models}]{cached}{truncated}")
+        return "\n".join(lines)
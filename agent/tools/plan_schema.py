@@ -0,0 +1,167 @@
+"""
+Pydantic-схеми відповідей LLM (план планувальника і Django-план конвертера),
+response_format для structured output і адресний ремонт: якщо невалідний
+лише один елемент списку (наприклад, одна app), LLM перепитується тільки про нього.
+"""
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Literal, Optional, Tuple, Type, Union
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator, model_validator
+from agent.tools.prompt_registry import PromptTemplate
+
+VIEW_TYPES = Literal[
+    "View", "TemplateView", "RedirectView", "ListView", "DetailView",
+    "CreateView", "UpdateView", "DeleteView", "FormView",
+]
+# generic views, яким потрібна модель (queryset); View/TemplateView/RedirectView/FormView — без неї
+MODEL_VIEW_TYPES = {"ListView", "DetailView", "CreateView", "UpdateView", "DeleteView"}
+PLAN_TOOLS = Literal["parse_rails_project", "convert_templates", "build_django_project", "write_file"]
+
+
+# --------------------------
+# PLANNER
+# --------------------------
+class PlanStep(BaseModel):
+    tool: PLAN_TOOLS
+    args: Dict[str, Any] = Field(default_factory=dict)
+
+
+class ConversionPlan(BaseModel):
+    steps: List[PlanStep]
+
+
+# --------------------------
+# CONVERTER
+# --------------------------
+class DjangoModelSpec(BaseModel):
+    model_config = ConfigDict(extra="allow")  # meta/source у моделей зі схеми
+
+    name: str = Field(..., pattern=r"^[A-Za-z_]\w*$")
+    fields: Dict[str, str] = Field(default_factory=dict)
+    relationships: Dict[str, str] = Field(default_factory=dict)
+
+
+class DjangoViewSpec(BaseModel):
+    name: str = Field(..., pattern=r"^[A-Za-z_]\w*$")
+    type: VIEW_TYPES
+    model: Optional[str] = None
+    template: Optional[str] = None
+    context_object_name: Optional[str] = None
+    fields: Optional[List[str]] = None  # Create/UpdateView; за замовчуванням — "__all__"
+    success_url: Optional[str] = None  # ім'я URL; Create/UpdateView передають у нього pk об'єкта
+    mixins: Optional[List[str]] = None  # назви mixin-ів цієї app, які view успадковує перед generic-класом
+
+    @model_validator(mode="after")
+    def _model_required(self):
+        if self.type in MODEL_VIEW_TYPES and not self.model:
+            raise ValueError(f"{self.type} '{self.name}' requires a model")
+        return self
+
+
+class DjangoMixinSpec(BaseModel):
+    name: str = Field(..., pattern=r"^[A-Za-z_]\w*$")
+    code: str  # повний Python-код класу (імпорти, потрібні йому, — перед class)
+
+
+class DjangoUrlSpec(BaseModel):
+    pattern: str
+    view: str = Field(..., pattern=r"^[A-Za-z_]\w*$")
+    name: Optional[str] = None  # за замовчуванням — назва view у нижньому регістрі
+
+
+class DjangoTemplateSpec(BaseModel):
+    name: str
+    context_variables: List[str] = Field(default_factory=list)
+
+
+class DjangoAppSpec(BaseModel):
+    name: str = Field(..., pattern=r"^[a-z_][a-z0-9_]*$")
+    models: List[DjangoModelSpec] = Field(default_factory=list)
+    views: List[DjangoViewSpec] = Field(default_factory=list)
+    urls: List[DjangoUrlSpec] = Field(default_factory=list)
+    templates: List[DjangoTemplateSpec] = Field(default_factory=list)
+    mixins: List[DjangoMixinSpec] = Field(default_factory=list)
+
+    @field_validator("templates", mode="before")
+    @classmethod
+    def _template_names(cls, value):
+        """Шаблони-рядки ("blog/list.html") — теж валідна відповідь."""
+        if isinstance(value, list):
+            return [{"name": t} if isinstance(t, str) else t for t in value]
+        return value
+
+
+class DjangoPlan(BaseModel):
+    apps: List[DjangoAppSpec]
+
+
+def response_format(schema: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    response_format для chat.completions: JSON Schema моделі.
+    strict=False — у схемах є словники з довільними ключами (fields), які strict-режим не допускає.
+    """
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": schema.__name__, "schema": schema.model_json_schema(), "strict": False},
+    }
+
+
+def format_errors(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(p) for p in e['loc']) or '<root>'}: {e['msg']}" for e in error.errors())
+
+
+async def repair_items(
+    data: Any,
+    schema: Type[BaseModel],
+    list_field: str,
+    item_schema: Type[BaseModel],
+    reask: Callable[[Any, str], Awaitable[Any]],
+    max_repairs: int = 2,
+) -> Tuple[Optional[BaseModel], int]:
+    """
+    Валідує data за schema; невалідні елементи data[list_field] по одному віддає в await reask(item, errors)
+    (до max_repairs спроб на елемент), а безнадійні — відкидає.
+    :return: (валідна модель або None, якщо сама обгортка не відповідає схемі; кількість перепитувань)
+    """
+    if not isinstance(data, dict) or not isinstance(data.get(list_field), list):
+        return None, 0
+
+    items: List[Union[BaseModel, Any]] = []
+    repairs = 0
+    for index, item in enumerate(data[list_field]):
+        candidate = item
+        for attempt in range(max_repairs + 1):
+            try:
+                items.append(item_schema.model_validate(candidate))
+                break
+            except ValidationError as e:
+                errors = format_errors(e)
+                if attempt == max_repairs:
+                    logging.warning(f"⚠️ {list_field}[{index}] dropped after {max_repairs} repairs: {errors}")
+                    break
+                logging.info(f"🩹 {list_field}[{index}] invalid ({errors}) — re-asking for this item only")
+                repairs += 1
+                candidate = await reask(candidate, errors)
+
+    try:
+        return schema.model_validate({**data, list_field: items}), repairs
+    except ValidationError as e:
+        logging.warning(f"⚠️ {schema.__name__} invalid: {format_errors(e)}")
+        return None, repairs
+
+
+def is_valid(item_schema: Type[BaseModel], item: Any) -> bool:
+    try:
+        item_schema.model_validate(item)
+        return True
+    except ValidationError:
+        return False
+
+
+def repair_messages(item: Any, errors: str, item_schema: Type[BaseModel], context: str = "") -> List[Dict[str, str]]:
+    """Запит на ремонт одного елемента: інструкції (спільні для схеми) — префіксом, об'єкт і помилки — в кінці."""
+    template = PromptTemplate(f"repair:{item_schema.__name__}", (
+        f"{context}The JSON object in the user message failed validation against the {item_schema.__name__} "
+        "schema. Return only the corrected JSON object — no comments, no code fences."
+    ))
+    return template.messages({"Errors": errors, "Object": json.dumps(item, ensure_ascii=False, default=str)})
@@ -0,0 +1,167 @@
+import re
+import copy
+import json
+import logging
+from typing import Dict, List, Any, Optional
+
+
+# --------------------------
+# INFLECTION
+# --------------------------
+def underscore(name: str) -> str:
+    """BlogPostsController → blog_posts_controller"""
+    return re.sub(r'(?<!^)(?=[A-Z])', '_', name).lower()
+
+
+def pluralize(word: str) -> str:
+    if re.search(r'(s|x|z|ch|sh)$', word):
+        return word + "es"
+    if re.search(r'[^aeiou]y$', word):
+        return word[:-1] + "ies"
+    return word + "s"
+
+
+def singularize(word: str) -> str:
+    if re.search(r'[^aeiou]ies$', word):
+        return word[:-3] + "y"
+    if re.search(r'(s|x|z|ch|sh)es$', word):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def camelize(name: str) -> str:
+    """blog_post → BlogPost"""
+    return "".join(part.capitalize() for part in name.split("_"))
+
+
+def app_name_for(unit_kind: str, entity: Dict[str, Any]) -> str:
+    """
+    Детерміновано визначає назву Django app для сутності Rails,
+    щоб окремо сконвертовані частини потрапили в одну й ту саму app.
+    """
+    if unit_kind == "model":
+        return pluralize(underscore(entity["name"]))
+    if unit_kind == "controller":
+        return underscore(entity["name"]).removesuffix("_controller")
+    if unit_kind == "template":
+        parts = entity["name"].split("/")
+        return parts[0] if len(parts) > 1 and parts[0] != "layouts" else "core"
+    return "core"
+
+
+# --------------------------
+# SPLIT
+# --------------------------
+def _empty_structure() -> Dict[str, List]:
+    return {"models": [], "controllers": [], "routes": [], "templates": []}
+
+
+def split_rails_structure(rails_structure: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Розбиває rails_structure на незалежні одиниці конвертації:
+    одна модель / один контролер (разом з його маршрутами) / один шаблон.
+    Маршрути без контролера збираються в окрему одиницю.
+    """
+    units = []
+    claimed_routes = set()
+
+    for model in rails_structure.get("models", []):
+        structure = _empty_structure()
+        structure["models"].append(model)
+        units.append({
+            "key": f"model:{model['name']}",
+            "kind": "model",
+            "app": app_name_for("model", model),
+            "structure": structure,
+        })
+
+    routes = rails_structure.get("routes", [])
+    for ctrl in rails_structure.get("controllers", []):
+        structure = _empty_structure()
+        structure["controllers"].append(ctrl)
+        app = app_name_for("controller", ctrl)
+        for i, route in enumerate(routes):
+            if route.get("controller") == app:
+                structure["routes"].append(route)
+                claimed_routes.add(i)
+        units.append({
+            "key": f"controller:{ctrl['name']}",
+            "kind": "controller",
+            "app": app,
+            "structure": structure,
+        })
+
+    orphan_routes = [r for i, r in enumerate(routes) if i not in claimed_routes]
+    if orphan_routes:
+        structure = _empty_structure()
+        structure["routes"] = orphan_routes
+        units.append({"key": "routes", "kind": "routes", "app": "core", "structure": structure})
+
+    for tmpl in rails_structure.get("templates", []):
+        structure = _empty_structure()
+        structure["templates"].append(tmpl)
+        units.append({
+            "key": f"template:{tmpl['name']}",
+            "kind": "template",
+            "app": app_name_for("template", tmpl),
+            "structure": structure,
+        })
+
+    return units
+
+
+# --------------------------
+# PARSE
+# --------------------------
+def parse_llm_json(llm_output: str) -> Optional[Any]:
+    """Прибирає ```json ... ``` огорожі та парсить JSON. Повертає None, якщо JSON невалідний."""
+    clean_output = re.sub(r"^```(json|python)?|```$", "", llm_output.strip(), flags=re.MULTILINE).strip()
+    try:
+        return json.loads(clean_output)
+    except json.JSONDecodeError:
+        return None
+
+
+# --------------------------
+# MERGE
+# --------------------------
+_IDENTITY = {
+    "models": lambda x: x.get("name"),
+    "views": lambda x: x.get("name"),
+    "urls": lambda x: (x.get("pattern"), x.get("view")),
+    "templates": lambda x: x.get("name") if isinstance(x, dict) else x,
+    "mixins": lambda x: x.get("name"),
+}
+
+
+def merge_django_plans(plans: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Зливає часткові плани у форму {"apps": [...]}, яку споживає build_django_project.
+    Apps об'єднуються за назвою, елементи — за іменем (urls — за pattern + view),
+    поля однойменних моделей зливаються.
+    """
+    apps: Dict[str, Dict[str, Any]] = {}
+
+    for plan in plans:
+        for app in plan.get("apps", []):
+            name = app.get("name")
+            if not name:
+                logging.warning(f"⚠️ Пропущено app без назви: {app}")
+                continue
+            merged = apps.setdefault(name, {"name": name, **{key: [] for key in _IDENTITY}})
+
+            for key, identity in _IDENTITY.items():
+                existing = {identity(item): item for item in merged[key]}
+                for item in app.get(key, []):
+                    ident = identity(item)
+                    if ident not in existing:
+                        item = copy.deepcopy(item)
+                        merged[key].append(item)
+                        existing[ident] = item
+                    elif key == "models":
+                        existing[ident].setdefault("fields", {}).update(item.get("fields", {}))
+                        existing[ident].setdefault("relationships", {}).update(item.get("relationships", {}))
+
+    return {"apps": list(apps.values())}
@@ -0,0 +1,252 @@
+import os
+import json
+import time
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from types import SimpleNamespace
+from agent.tools.prompt_budget import count_tokens
+
+# Вузол графа, у межах якого виконується поточний код (для атрибуції LLM-викликів і записів)
+current_node = contextvars.ContextVar("current_node", default="pipeline")
+
+
+class Profiler:
+    """
+    Збирає інструментування запуску: span-и вузлів, LLM-виклики
+    (латентність, час до першого токена, токени) і байти, записані на диск.
+    Вимкнений профайлер нічого не записує — накладні витрати лише на перевірку прапорця.
+
+    Результат — таблиця по вузлах (summary) і Chrome trace-event JSON (export_chrome_trace),
+    який відкривається у Perfetto / chrome://tracing.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self.events: List[Dict[str, Any]] = []
+        self.nodes: Dict[str, Dict[str, float]] = {}
+
+    def enable(self):
+        with self._lock:
+            self.enabled = True
+            self._origin = time.perf_counter()
+            self.events.clear()
+            self.nodes.clear()
+
+    def disable(self):
+        """Зупиняє запис; зібрані дані лишаються для summary/export_chrome_trace."""
+        with self._lock:
+            self.enabled = False
+
+    def _us(self, t: float) -> float:
+        return round((t - self._origin) * 1e6, 1)
+
+    def _stats(self, node: str) -> Dict[str, float]:
+        return self.nodes.setdefault(node, {
+            "wall": 0.0, "llm_calls": 0, "llm_latency": 0.0, "ttft": 0.0, "ttft_calls": 0,
+            "prompt_tokens": 0, "completion_tokens": 0, "bytes_written": 0, "cache_hits": 0,
+        })
+
+    def _event(self, name: str, cat: str, start: float, end: float, args: Dict[str, Any]):
+        self.events.append({
+            "name": name, "cat": cat, "ph": "X", "pid": os.getpid(), "tid": threading.get_ident(),
+            "ts": self._us(start), "dur": round((end - start) * 1e6, 1), "args": args,
+        })
+
+    @contextmanager
+    def span(self, name: str, cat: str = "node", node: Optional[str] = None):
+        """Вимірює блок коду; з node=... — також робить його поточним вузлом для вкладених викликів."""
+        token = current_node.set(node) if node else None
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            finished = time.perf_counter()
+            if token is not None:
+                current_node.reset(token)
+            if self.enabled:
+                with self._lock:
+                    self._event(name, cat, started, finished, {})
+                    if node:
+                        self._stats(node)["wall"] += finished - started
+
+    def record_llm(self, model: str, started: float, finished: float, first_token: Optional[float],
+                   prompt_tokens: int, completion_tokens: int, cached: bool = False):
+        """cached=True — відповідь з LLMCache: рахується окремо і не впливає на латентність і tok/s."""
+        if not self.enabled:
+            return
+        node = current_node.get()
+        with self._lock:
+            stats = self._stats(node)
+            if cached:
+                stats["cache_hits"] += 1
+                self._event(f"cache:{model}", "cache", started, finished, {"node": node, "model": model})
+                return
+            stats["llm_calls"] += 1
+            stats["llm_latency"] += finished - started
+            stats["prompt_tokens"] += prompt_tokens
+            stats["completion_tokens"] += completion_tokens
+            args = {"node": node, "model": model, "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens}
+            if first_token is not None:
+                stats["ttft"] += first_token - started
+                stats["ttft_calls"] += 1
+                args["ttft_ms"] = round((first_token - started) * 1000, 1)
+            self._event(f"llm:{model}", "llm", started, finished, args)
+
+    def add_bytes(self, count: int):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._stats(current_node.get())["bytes_written"] += count
+
+    def summary(self) -> str:
+        with self._lock:
+            if not self.nodes:
+                return "📈 Profiler: немає даних."
+            lines = [
+                "📈 Profile per node:",
+                f"  {'node':<14}{'wall s':>9}{'llm':>5}{'hits':>5}{'llm s':>9}{'ttft ms':>9}"
+                f"{'prompt tok':>12}{'compl tok':>11}{'tok/s':>8}{'bytes':>11}",
+            ]
+            for node, s in sorted(self.nodes.items(), key=lambda kv: -kv[1]["wall"]):
+                ttft = 1000 * s["ttft"] / s["ttft_calls"] if s["ttft_calls"] else 0.0
+                rate = s["completion_tokens"] / s["llm_latency"] if s["llm_latency"] else 0.0
+                lines.append(
+                    f"  {node:<14}{s['wall']:9.2f}{int(s['llm_calls']):5d}{int(s['cache_hits']):5d}"
+                    f"{s['llm_latency']:9.2f}{ttft:9.1f}"
+                    f"{int(s['prompt_tokens']):12d}{int(s['completion_tokens']):11d}{rate:8.1f}"
+                    f"{int(s['bytes_written']):11d}"
+                )
+            return "\n".join(lines)
+
+    def export_chrome_trace(self, path: str) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            meta = [{"name": "process_name", "ph": "M", "pid": os.getpid(), "args": {"name": "rails2django"}}]
+            data = {"traceEvents": meta + list(self.events), "displayTimeUnit": "ms",
+                    "otherData": {"nodes": self.nodes}}
+        path.write_text(json.dumps(data), encoding="utf-8")
+        logging.info(f"📈 Chrome trace → {path} (open in https://ui.perfetto.dev)")
+        return path
+
+
+# поза запуском з профілюванням — вимкнений профайлер процесу, що нічого не записує
+PROFILER = Profiler()
+_run_profiler: contextvars.ContextVar[Optional[Profiler]] = contextvars.ContextVar("run_profiler", default=None)
+
+
+def start_profiler() -> Profiler:
+    """Окремий увімкнений профайлер для запуску (конкурентні та пакетні запуски не змішуються)."""
+    profiler = Profiler()
+    profiler.enable()
+    _run_profiler.set(profiler)
+    return profiler
+
+
+def current_profiler() -> Profiler:
+    """Профайлер поточного запуску (start_profiler), інакше — PROFILER."""
+    return _run_profiler.get() or PROFILER
+
+
+def run_in_context(pool, fn, *args):
+    """pool.submit зі збереженням поточного вузла (contextvars не переходять у потоки пулу самі)."""
+    return pool.submit(contextvars.copy_context().run, fn, *args)
+
+
+# --------------------------
+# LLM CLIENT WRAPPER
+# --------------------------
+def _usage(response: Any, kwargs: Dict[str, Any], content: str):
+    usage = getattr(response, "usage", None)
+    if usage is not None and getattr(usage, "prompt_tokens", None) is not None:
+        return usage.prompt_tokens, usage.completion_tokens or 0
+    prompt = "".join(str(m.get("content", "")) for m in kwargs.get("messages", []))
+    return count_tokens(prompt), count_tokens(content) if content else 0
+
+
+class _ProfiledCompletions:
+    def __init__(self, owner: "ProfiledLLMClient"):
+        self._owner = owner
+
+    def create(self, **kwargs):
+        started = time.perf_counter()
+        response = self._owner.client.chat.completions.create(**kwargs)
+        if kwargs.get("stream"):
+            return self._measure_stream(response, kwargs, started)
+        content = response.choices[0].message.content or ""
+        current_profiler().record_llm(kwargs.get("model", ""), started, time.perf_counter(), None,
+                                    *_usage(response, kwargs, content), cached=getattr(response, "cached", False))
+        return response
+
+    @staticmethod
+    def _measure_stream(stream, kwargs: dict, started: float):
+        first_token, parts, usage_chunk, cached = None, [], None, False
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                if first_token is None:
+                    first_token = time.perf_counter()
+                parts.append(chunk.choices[0].delta.content)
+            if getattr(chunk, "usage", None):
+                usage_chunk = chunk
+            cached = cached or getattr(chunk, "cached", False)
+            yield chunk
+        current_profiler().record_llm(kwargs.get("model", ""), started, time.perf_counter(), first_token,
+                                    *_usage(usage_chunk, kwargs, "".join(parts)), cached=cached)
+
+
+class ProfiledLLMClient:
+    """
+    Обгортка над OpenAI-клієнтом (або CachedLLMClient) з тим самим інтерфейсом,
+    що вимірює кожен chat.completions.create. Решта атрибутів делегується.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.chat = SimpleNamespace(completions=_ProfiledCompletions(self))
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+class _AsyncProfiledCompletions(_ProfiledCompletions):
+    async def create(self, **kwargs):
+        started = time.perf_counter()
+        response = await self._owner.client.chat.completions.create(**kwargs)
+        if kwargs.get("stream"):
+            return self._measure_stream(response, kwargs, started)
+        content = response.choices[0].message.content or ""
+        current_profiler().record_llm(kwargs.get("model", ""), started, time.perf_counter(), None,
+                                    *_usage(response, kwargs, content), cached=getattr(response, "cached", False))
+        return response
+
+    @staticmethod
+    async def _measure_stream(stream, kwargs: dict, started: float):
+        first_token, parts, usage_chunk, cached = None, [], None, False
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                if first_token is None:
+                    first_token = time.perf_counter()
+                parts.append(chunk.choices[0].delta.content)
+            if getattr(chunk, "usage", None):
+                usage_chunk = chunk
+            cached = cached or getattr(chunk, "cached", False)
+            yield chunk
+        current_profiler().record_llm(kwargs.get("model", ""), started, time.perf_counter(), first_token,
+                                    *_usage(usage_chunk, kwargs, "".join(parts)), cached=cached)
+
+
+class AsyncProfiledLLMClient(ProfiledLLMClient):
+    """ProfiledLLMClient для асинхронного клієнта: await client.chat.completions.create."""
+
+    is_async = True
+
+    def __init__(self, client):
+        super().__init__(client)
+        self.chat = SimpleNamespace(completions=_AsyncProfiledCompletions(self))
@@ -0,0 +1,199 @@
+import os
+import json
+import logging
+import threading
+import contextvars
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Бюджет вхідних токенів на корисне навантаження промпта для кожного вузла.
+# Перевизначається змінною середовища TOKEN_BUDGET_<NODE>, напр. TOKEN_BUDGET_CONVERTER=12000
+DEFAULT_BUDGETS = {
+    "discovery": 6000,
+    "converter": 24000,
+    "readme": 4000,
+}
+
+# Службові ключі, які не несуть інформації для LLM
+INTERNAL_KEYS = {"source"}
+
+# Поля, які відкидаються першими при перевищенні бюджету (від найменш цінних)
+TRIM_ORDER: List[Tuple[str, str]] = [
+    ("templates", "variables"),
+    ("controllers", "before_filters"),
+    ("routes", "actions"),
+    ("models", "attributes"),
+]
+
+_encoding = None
+_encoding_loaded = False
+_usage_lock = threading.Lock()
+# статистика поточного запуску (start_token_usage); поза запуском — спільний словник процесу
+TOKENS_SENT: Dict[str, Dict[str, int]] = {}
+_run_tokens: contextvars.ContextVar[Optional[Dict[str, Dict[str, int]]]] = contextvars.ContextVar(
+    "run_tokens", default=None)
+
+
+class PayloadTooLargeError(ValueError):
+    """Навантаження не вміщується в бюджет без відкидання сутностей (truncate=False)."""
+
+
+def _get_encoding():
+    """tiktoken, якщо встановлено і словник доступний офлайн; інакше None."""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            logging.debug(f"tiktoken недоступний, використовуємо оцінку за символами: {e}")
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    # ~4 символи на токен для англомовного коду/JSON
+    return max(1, len(text) // 4)
+
+
+def compact(obj: Any) -> Any:
+    """
+    Прибирає порожні значення та службові ключі, дедуплікує списки
+    (з збереженням порядку). Результат придатний для json.dumps.
+    """
+    if isinstance(obj, dict):
+        result = {}
+        for k, v in obj.items():
+            if k in INTERNAL_KEYS:
+                continue
+            v = compact(v)
+            if v in (None, "", [], {}):
+                continue
+            result[k] = v
+        return result
+    if isinstance(obj, (list, tuple)):
+        seen, result = set(), []
+        for item in obj:
+            item = compact(item)
+            marker = json.dumps(item, sort_keys=True, ensure_ascii=False, default=str)
+            if marker not in seen:
+                seen.add(marker)
+                result.append(item)
+        return result
+    return obj
+
+
+def to_prompt_json(obj: Any) -> str:
+    """Компактна серіалізація без відступів і пробілів."""
+    return json.dumps(compact(obj), separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def budget_for(node: str) -> int:
+    return int(os.getenv(f"TOKEN_BUDGET_{node.upper()}", DEFAULT_BUDGETS.get(node, 8000)))
+
+
+def fit_to_budget(obj: Any, budget: int, truncate: bool = True) -> Tuple[str, int, List[str]]:
+    """
+    Серіалізує obj і, поки не вкладається в бюджет, відкидає малоцінні поля
+    (TRIM_ORDER), а потім обрізає найдовші списки верхнього рівня. Про обрізані списки
+    LLM дізнається з ключа "truncated" ({"apps": "8 of 11 shown"}).
+    :param truncate: False — замість обрізання списків PayloadTooLargeError
+    :return: (payload, кількість токенів, список застосованих скорочень)
+    """
+    data = compact(obj)
+    payload = to_prompt_json(data)
+    tokens = count_tokens(payload)
+    trimmed = []
+
+    if not isinstance(data, dict):
+        return payload, tokens, trimmed
+
+    for section, field in TRIM_ORDER:
+        if tokens <= budget:
+            break
+        items = data.get(section)
+        if isinstance(items, list) and any(isinstance(i, dict) and field in i for i in items):
+            for item in items:
+                if isinstance(item, dict):
+                    item.pop(field, None)
+            trimmed.append(f"{section}.{field}")
+            payload = to_prompt_json(data)
+            tokens = count_tokens(payload)
+
+    if tokens > budget and not truncate:
+        raise PayloadTooLargeError(f"payload needs {tokens} tokens, budget is {budget}")
+
+    totals = {}
+    while tokens > budget:
+        lists = [(k, v) for k, v in data.items() if isinstance(v, list) and len(v) > 1]
+        if not lists:
+            break
+        key, items = max(lists, key=lambda kv: len(kv[1]))
+        keep = max(1, len(items) * 3 // 4)
+        totals.setdefault(key, len(items))
+        trimmed.append(f"{key}[{keep}:{len(items)}]")
+        data[key] = items[:keep]
+        data["truncated"] = {k: f"{len(data[k])} of {total} shown" for k, total in totals.items()}
+        payload = to_prompt_json(data)
+        tokens = count_tokens(payload)
+
+    return payload, tokens, trimmed
+
+
+def budget_payload(node: str, obj: Any, budget: Optional[int] = None, truncate: bool = True) -> str:
+    """Компактне представлення obj, що вкладається в бюджет вузла (truncate — див. fit_to_budget)."""
+    budget = budget or budget_for(node)
+    try:
+        payload, tokens, trimmed = fit_to_budget(obj, budget, truncate)
+    except PayloadTooLargeError as e:
+        raise PayloadTooLargeError(f"[{node}] {e}") from None
+    if trimmed:
+        logging.warning(f"✂️ [{node}] payload trimmed to {tokens}/{budget} tokens: {', '.join(trimmed)}")
+    return payload
+
+
+def budget_payloads(node: str, parts: Dict[str, Any], reserved: int = 0) -> Dict[str, str]:
+    """
+    Кілька навантажень одного промпта в спільному бюджеті вузла: кожна частина
+    (у порядку parts) отримує те, що лишилось після попередніх і reserved (інструкції).
+    """
+    remaining = budget_for(node) - reserved
+    payloads = {}
+    for title, obj in parts.items():
+        payloads[title] = budget_payload(node, obj, budget=max(remaining, 1))
+        remaining -= count_tokens(payloads[title])
+    return payloads
+
+
+def start_token_usage() -> Dict[str, Dict[str, int]]:
+    """Окрема статистика токенів для запуску (конкурентні та пакетні запуски не змішуються)."""
+    usage: Dict[str, Dict[str, int]] = {}
+    _run_tokens.set(usage)
+    return usage
+
+
+def log_prompt_tokens(node: str, prompt: str) -> int:
+    """Рахує і логує токени, що відправляються у LLM, накопичуючи статистику по вузлах."""
+    tokens = count_tokens(prompt)
+    sent = _run_tokens.get()
+    with _usage_lock:
+        usage = (TOKENS_SENT if sent is None else sent).setdefault(node, {"calls": 0, "tokens": 0})
+        usage["calls"] += 1
+        usage["tokens"] += tokens
+    logging.info(f"🔢 [{node}] prompt tokens: {tokens}")
+    return tokens
+
+
+def token_usage_report(sent: Optional[Dict[str, Dict[str, int]]] = None) -> str:
+    """Звіт за статистикою запуску sent (за замовчуванням — поточного)."""
+    sent = sent if sent is not None else _run_tokens.get() or TOKENS_SENT
+    with _usage_lock:
+        if not sent:
+            return "🔢 No prompt tokens sent."
+        lines = ["🔢 Prompt tokens sent per node:"]
+        for node, usage in sorted(sent.items(), key=lambda kv: -kv[1]["tokens"]):
+            lines.append(f"  {node:<14} {usage['tokens']:>9} tokens in {usage['calls']} call(s)")
+        return "\n".join(lines)
@@ -0,0 +1,72 @@
+"""
+Реєстр промптів. Шаблони з agent/prompts читаються і компілюються один раз — при створенні
+вузлів графа; кожен запит будується однаково: статичні інструкції — system-повідомлення,
+динамічне навантаження (структура Rails, план, одиниця chunked-конвертації) — останнє
+user-повідомлення. Незмінний префікс повторюваних викликів провайдер кешує (prompt caching):
+такі токени дешевші й швидше обробляються, їхню частку показує звіт model_router.
+"""
+import re
+import logging
+from pathlib import Path
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+PROMPTS_DIR = Path(__file__).resolve().parent.parent / "prompts"
+
+_PLACEHOLDER_RE = re.compile(r"\{\{\s*\w+\s*\}\}")
+
+
+class PromptTemplate:
+    """Скомпільований промпт: незмінні інструкції + складання повідомлень для запиту."""
+
+    def __init__(self, name: str, instructions: str):
+        placeholder = _PLACEHOLDER_RE.search(instructions)
+        if placeholder:
+            raise ValueError(f"❌ Prompt '{name}' contains {placeholder.group(0)}: the payload is appended "
+                             "after the instructions, placeholders are not supported.")
+        self.name = name
+        self.instructions = instructions.strip()
+
+    def extend(self, *notes: str) -> "PromptTemplate":
+        """
+        Шаблон з додатковими інструкціями, спільними для всіх викликів запуску
+        (моделі зі схеми, скафолди): вони стають частиною кешованого префікса.
+        """
+        notes = [note.strip() for note in notes if note and note.strip()]
+        if not notes:
+            return self
+        return PromptTemplate(self.name, "\n\n".join([self.instructions, *notes]))
+
+    def messages(self, payload: Optional[Dict[str, str]] = None, note: str = "") -> List[Dict[str, str]]:
+        """
+        [system: інструкції, user: розділи payload ("Заголовок:\\nтекст") і note наприкінці].
+        Порядок розділів фіксований викликом, тож однакові дані дають однаковий запит.
+        """
+        parts = [f"{title}:\n{text}" for title, text in (payload or {}).items()]
+        if note:
+            parts.append(note.strip())
+        return [
+            {"role": "system", "content": self.instructions},
+            {"role": "user", "content": "\n\n".join(parts)},
+        ]
+
+
+def prompt_text(messages: List[Dict[str, str]]) -> str:
+    """Увесь текст запиту — для логів і підрахунку токенів."""
+    return "\n\n".join(str(m.get("content", "")) for m in messages)
+
+
+@lru_cache(maxsize=None)
+def load_prompt(name: str, default: Optional[str] = None) -> PromptTemplate:
+    """
+    Шаблон за назвою ("convert" → agent/prompts/convert_prompt.txt) або шляхом до файлу.
+    Кешується: повторні вузли (пакетний режим, --resume) файл не перечитують.
+    :param default: текст, якщо файла немає (інакше FileNotFoundError)
+    """
+    path = Path(name) if name.endswith(".txt") else PROMPTS_DIR / f"{name}_prompt.txt"
+    if not path.exists():
+        if default is None:
+            raise FileNotFoundError(f"❌ Prompt file not found: {path}")
+        logging.warning(f"⚠️ Prompt file not found at {path}. Using default prompt.")
+        return PromptTemplate(path.stem, default)
+    return PromptTemplate(path.stem, path.read_text(encoding="utf-8"))
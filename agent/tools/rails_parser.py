@@ -1,8 +1,14 @@
 import re
 import logging
 from pathlib import Path
-from typing import Dict, List, Any
-from agent.tools.file_tools import list_files, read_file
+from typing import Dict, List, Any, Optional, Tuple
+from agent.tools.file_tools import read_file
+from agent.tools.file_index import RailsFileIndex, scan_rails_tree
+from agent.tools.manifest import fingerprint_rails_tree
+
+
+# Змінюється разом з форматом результатів парсерів: збережені в маніфесті результати старішої версії не використовуються
+PARSER_VERSION = 2
 
 
 def parse_rails_app(app_dir: str) -> Dict[str, Any]:
@@ -13,14 +19,54 @@ def parse_rails_app(app_dir: str) -> Dict[str, Any]:
     - routes
     - templates
     """
+    rails_structure, _ = parse_rails_app_incremental(app_dir)
+    return rails_structure
+
 
+def parse_rails_app_incremental(
+    app_dir: str,
+    previous_files: Optional[Dict[str, Any]] = None,
+    index: Optional[RailsFileIndex] = None,
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Те саме, що parse_rails_app, але перепарсює лише змінені та нові файли.
+
+    :param previous_files: записи маніфесту попереднього запуску {rel: {"hash", "parsed"}}
+    :param index: готовий індекс файлів; якщо не задано — дерево обходиться один раз тут
+    :return: (rails_structure, нові записи маніфесту для всіх відстежуваних файлів)
+    """
     logging.info(f"🔍 Аналізуємо Rails-додаток у {app_dir}")
-    rails_structure = {
-        "models": parse_models(Path(app_dir) / "app" / "models"),
-        "controllers": parse_controllers(Path(app_dir) / "app" / "controllers"),
-        "routes": parse_routes(Path(app_dir) / "config" / "routes.rb"),
-        "templates": parse_templates(Path(app_dir) / "app" / "views"),
-    }
+    previous_files = previous_files or {}
+    base = Path(app_dir)
+    index = index or scan_rails_tree(app_dir)
+
+    rails_structure = {"models": [], "controllers": [], "routes": [], "templates": []}
+    records = {}
+    reused = 0
+
+    for rel, file_hash in fingerprint_rails_tree(app_dir, index).items():
+        kind, parse_fn = _parser_for(rel)
+        record = {"hash": file_hash}
+        if parse_fn:
+            prev = previous_files.get(rel, {})
+            if prev.get("hash") == file_hash and prev.get("parser") == PARSER_VERSION and "parsed" in prev:
+                parsed = prev["parsed"]
+                reused += 1
+            else:
+                parsed = parse_fn(base / rel, rel)
+            record["parsed"] = parsed
+            record["parser"] = PARSER_VERSION
+            if isinstance(parsed, list):
+                rails_structure[kind].extend(parsed)
+            elif parsed:
+                rails_structure[kind].append(parsed)
+        records[rel] = record
+
+    if "config/routes.rb" not in records:
+        logging.warning(f"⚠️ Файл маршрутів не знайдено: {base / 'config' / 'routes.rb'}")
+
+    if reused:
+        logging.info(f"♻️ Повторно використано результати парсингу {reused} незмінених файлів")
 
     logging.info(f"✅ Rails структура проаналізована: "
                  f"{len(rails_structure['models'])} моделей, "
@@ -28,22 +74,42 @@ def parse_rails_app(app_dir: str) -> Dict[str, Any]:
                  f"{len(rails_structure['routes'])} маршрутів, "
                  f"{len(rails_structure['templates'])} шаблонів")
 
-    return rails_structure
+    return rails_structure, records
+
+
+def _parser_for(rel: str):
+    """Визначає тип сутності та функцію парсингу за Rails-роллю файлу в індексі."""
+    role = RailsFileIndex.role_of(rel)
+    if role == "models":
+        return "models", parse_model_file
+    if role == "controllers":
+        return "controllers", parse_controller_file
+    if role == "views":
+        return "templates", parse_template_file
+    if rel == "config/routes.rb":
+        return "routes", lambda path, _rel: parse_routes(path)
+    return None, None
 
 
 # --------------------------
 # MODELS
 # --------------------------
-def parse_models(models_dir: Path) -> List[Dict[str, Any]]:
+def parse_models(index: RailsFileIndex) -> List[Dict[str, Any]]:
     models = []
-    for file in list_files(str(models_dir), [".rb"]):
-        code = read_file(file)
-        model = extract_model_info(code)
+    for rel in index.bucket("models"):
+        model = parse_model_file(index.path(rel), rel)
         if model:
             models.append(model)
     return models
 
 
+def parse_model_file(path: Path, source: str) -> Dict[str, Any]:
+    model = extract_model_info(read_file(str(path)))
+    if model:
+        model["source"] = source
+    return model
+
+
 def extract_model_info(code: str) -> Dict[str, Any]:
     match = re.search(r'class\s+(\w+)\s*<\s*ApplicationRecord', code)
     if not match:
@@ -63,16 +129,22 @@ def extract_model_info(code: str) -> Dict[str, Any]:
 # --------------------------
 # CONTROLLERS
 # --------------------------
-def parse_controllers(ctrl_dir: Path) -> List[Dict[str, Any]]:
+def parse_controllers(index: RailsFileIndex) -> List[Dict[str, Any]]:
     controllers = []
-    for file in list_files(str(ctrl_dir), [".rb"]):
-        code = read_file(file)
-        ctrl = extract_controller_info(code)
+    for rel in index.bucket("controllers"):
+        ctrl = parse_controller_file(index.path(rel), rel)
         if ctrl:
             controllers.append(ctrl)
     return controllers
 
 
+def parse_controller_file(path: Path, source: str) -> Dict[str, Any]:
+    ctrl = extract_controller_info(read_file(str(path)))
+    if ctrl:
+        ctrl["source"] = source
+    return ctrl
+
+
 def extract_controller_info(code: str) -> Dict[str, Any]:
     match = re.search(r'class\s+(\w+Controller)\s*<\s*ApplicationController', code)
     if not match:
@@ -96,6 +168,23 @@ def extract_controller_info(code: str) -> Dict[str, Any]:
 # --------------------------
 # ROUTES
 # --------------------------
+RESOURCE_ACTIONS = ["index", "show", "new", "edit", "create", "update", "destroy"]
+
+
+def resource_actions(options: str) -> List[str]:
+    """
+    Дії resources з урахуванням only:/except: (only: [:index, :show], except: %i[destroy], only: :index).
+    Так само читаються опції before_action.
+    """
+    actions = list(RESOURCE_ACTIONS)
+    for key in ("only", "except"):
+        match = re.search(rf'{key}:\s*(\[[^\]]*\]|%i\[[^\]]*\]|:\w+)', options)
+        if match:
+            listed = set(re.findall(r'\w+', match.group(1))) - {"i"}
+            actions = [a for a in actions if (a in listed) == (key == "only")]
+    return actions
+
+
 def parse_routes(routes_file: Path) -> List[Dict[str, Any]]:
     if not routes_file.exists():
         logging.warning(f"⚠️ Файл маршрутів не знайдено: {routes_file}")
@@ -105,12 +194,12 @@ def parse_routes(routes_file: Path) -> List[Dict[str, Any]]:
     routes = []
 
     # Простий парсер resource і get
-    for m in re.finditer(r'resources\s+:([\w_]+)', content):
-        ctrl = m.group(1)
+    for m in re.finditer(r'resources\s+:([\w_]+)([^\n]*)', content):
+        ctrl, options = m.groups()
         routes.append({
             "path": f"/{ctrl}",
             "controller": ctrl,
-            "actions": ["index", "show", "new", "edit", "create", "update", "destroy"],
+            "actions": resource_actions(options),
         })
 
     for m in re.finditer(r'get\s+[\'"]([^\'"]+)[\'"]\s*,\s*to:\s*[\'"]([^\'"]+)[\'"]', content):
@@ -123,20 +212,25 @@ def parse_routes(routes_file: Path) -> List[Dict[str, Any]]:
                 "action": parts[1],
             })
 
+    for route in routes:
+        route["source"] = "config/routes.rb"
+
     return routes
 
 
 # --------------------------
 # TEMPLATES
 # --------------------------
-def parse_templates(views_dir: Path) -> List[Dict[str, Any]]:
-    templates = []
-    for file in list_files(str(views_dir), [".erb", ".html.erb"]):
-        rel_path = file.split("views/")[-1]
-        name = rel_path.replace(".html.erb", "").replace(".erb", "")
-        variables = re.findall(r'@(\w+)', read_file(file))
-        templates.append({
-            "name": name,
-            "variables": list(sorted(set(variables))),
-        })
-    return templates
+def parse_templates(index: RailsFileIndex) -> List[Dict[str, Any]]:
+    return [parse_template_file(index.path(rel), rel) for rel in index.bucket("views")]
+
+
+def parse_template_file(path: Path, source: str) -> Dict[str, Any]:
+    rel_path = str(path).split("views/")[-1]
+    name = rel_path.replace(".html.erb", "").replace(".erb", "")
+    variables = re.findall(r'@(\w+)', read_file(str(path)))
+    return {
+        "name": name,
+        "variables": list(sorted(set(variables))),
+        "source": source,
+    }
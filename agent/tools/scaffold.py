@@ -0,0 +1,318 @@
+"""
+Jinja2-шаблони каркаса Django-проєкту (замість `django-admin startproject`)
+і файлів кожної app. Шаблони компілюються один раз при імпорті модуля;
+рендеринг повертає {шлях: вміст} без жодного звернення до диска.
+"""
+import re
+import secrets
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+from jinja2 import DictLoader, Environment, StrictUndefined
+from agent.tools.plan_utils import camelize
+
+PROJECT_NAME = "converted_project"
+PROJECT_TEMPLATES_DIR = "templates"
+
+PROJECT_TEMPLATES = {
+    "manage.py": '''#!/usr/bin/env python
+"""Django's command-line utility for administrative tasks."""
+import os
+import sys
+
+
+def main():
+    """Run administrative tasks."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "{{ project }}.settings")
+    try:
+        from django.core.management import execute_from_command_line
+    except ImportError as exc:
+        raise ImportError(
+            "Couldn't import Django. Are you sure it's installed and "
+            "available on your PYTHONPATH environment variable? Did you "
+            "forget to activate a virtual environment?"
+        ) from exc
+    execute_from_command_line(sys.argv)
+
+
+if __name__ == "__main__":
+    main()
+''',
+    "{project}/__init__.py": "",
+    "{project}/settings.py": '''"""
+Django settings for {{ project }} project.
+"""
+import os
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+SECRET_KEY = os.environ.get("DJANGO_SECRET_KEY", {{ secret_key | tojson }})
+
+DEBUG = os.environ.get("DJANGO_DEBUG", "1") == "1"
+
+ALLOWED_HOSTS = []
+
+INSTALLED_APPS = [
+    "django.contrib.admin",
+    "django.contrib.auth",
+    "django.contrib.contenttypes",
+    "django.contrib.sessions",
+    "django.contrib.messages",
+    "django.contrib.staticfiles",
+{%- for app in apps %}
+    "{{ project }}.{{ app }}",
+{%- endfor %}
+]
+
+MIDDLEWARE = [
+    "django.middleware.security.SecurityMiddleware",
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "django.middleware.common.CommonMiddleware",
+    "django.middleware.csrf.CsrfViewMiddleware",
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "django.contrib.messages.middleware.MessageMiddleware",
+    "django.middleware.clickjacking.XFrameOptionsMiddleware",
+]
+
+ROOT_URLCONF = "{{ project }}.urls"
+
+TEMPLATES = [
+    {
+        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        # спільні шаблони без своєї app (layouts/, devise/, ...) — у templates/ проєкту
+        "DIRS": [BASE_DIR / "{{ templates_dir }}"],
+        "APP_DIRS": True,
+        "OPTIONS": {
+            "context_processors": [
+                "django.template.context_processors.request",
+                "django.contrib.auth.context_processors.auth",
+                "django.contrib.messages.context_processors.messages",
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = "{{ project }}.wsgi.application"
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "db.sqlite3",
+    }
+}
+
+AUTH_PASSWORD_VALIDATORS = [
+    {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
+    {"NAME": "django.contrib.auth.password_validation.MinimumLengthValidator"},
+    {"NAME": "django.contrib.auth.password_validation.CommonPasswordValidator"},
+    {"NAME": "django.contrib.auth.password_validation.NumericPasswordValidator"},
+]
+
+LANGUAGE_CODE = "en-us"
+TIME_ZONE = "UTC"
+USE_I18N = True
+USE_TZ = True
+
+STATIC_URL = "static/"
+
+DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+''',
+    "{project}/urls.py": '''"""
+URL configuration for {{ project }} project.
+"""
+from django.contrib import admin
+from django.urls import include, path
+
+urlpatterns = [
+    path("admin/", admin.site.urls),
+{%- for app in apps %}
+    path("{{ app }}/", include("{{ project }}.{{ app }}.urls")),
+{%- endfor %}
+]
+''',
+    "{project}/asgi.py": '''"""
+ASGI config for {{ project }} project.
+"""
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "{{ project }}.settings")
+
+application = get_asgi_application()
+''',
+    "{project}/wsgi.py": '''"""
+WSGI config for {{ project }} project.
+"""
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "{{ project }}.settings")
+
+application = get_wsgi_application()
+''',
+}
+
+APP_TEMPLATES = {
+    "__init__.py": "",
+    "models.py": '''from django.db import models
+{% for model in models %}
+class {{ model.name }}(models.Model):
+{%- for field, ftype in model.get("fields", {}).items() %}
+    {{ field }} = {{ ftype | field_code }}
+{%- endfor %}
+{%- if model.get("meta") %}
+
+    class Meta:
+{%- set meta = model.meta %}
+{%- if meta.get("db_table") %}
+        db_table = {{ meta.db_table | pyrepr }}
+{%- endif %}
+{%- if meta.get("indexes") %}
+        indexes = [
+{%- for index in meta.indexes %}
+            models.Index(fields={{ index.fields | pyrepr }}, name={{ index.name | pyrepr }}),
+{%- endfor %}
+        ]
+{%- endif %}
+{%- if meta.get("unique_together") %}
+        unique_together = {{ meta.unique_together | map("tuple") | list | pyrepr }}
+{%- endif %}
+{%- endif %}
+{% endfor %}''',
+    "views.py": '''{% if uses_reverse %}from django.urls import reverse, reverse_lazy
+{% endif %}from django.views import generic
+from .models import *
+{% for mixin in mixins %}
+{{ mixin.code | trim }}
+{% endfor %}
+{%- for view in views %}
+class {{ view.name }}({% for mixin in view.get("mixins") or [] %}{{ mixin }}, {% endfor %}generic.{{ view.type }}):
+{%- if view.get("model") %}
+    model = {{ view.model }}
+{%- endif %}
+    template_name = {{ view.get("template", "") | pyrepr }}
+{%- if view.get("context_object_name") %}
+    context_object_name = {{ view.context_object_name | pyrepr }}
+{%- endif %}
+{%- if view.type in ("CreateView", "UpdateView") %}
+    fields = {{ (view.get("fields") or "__all__") | pyrepr }}
+{%- endif %}
+{%- if view.get("success_url") %}
+{%- if view.type in ("CreateView", "UpdateView") %}
+
+    def get_success_url(self):
+        return reverse({{ view.success_url | pyrepr }}, args=[self.object.pk])
+{%- else %}
+    success_url = reverse_lazy({{ view.success_url | pyrepr }})
+{%- endif %}
+{%- endif %}
+{% endfor %}''',
+    "urls.py": '''from django.urls import path
+from . import views
+
+urlpatterns = [
+{%- for url in urls %}
+    path({{ url.pattern | pyrepr }}, views.{{ url.view }}.as_view(), name={{ (url.get("name") or url.view | lower) | pyrepr }}),
+{%- endfor %}
+]
+''',
+    "apps.py": '''from django.apps import AppConfig
+
+
+class {{ app | camelize }}Config(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "{{ project }}.{{ app }}"
+''',
+    "template.html": '''{% raw %}{% extends 'base.html' %}
+{% block content %}{% endraw %}
+<!-- Auto-generated template for {{ name }} -->
+{% raw %}{% endblock %}{% endraw %}
+''',
+    # сторінка підтвердження DeleteView (у Rails видалення — кнопка з method: :delete)
+    "confirm_delete.html": '''{% raw %}<h1>Delete {{ object }}</h1>
+<form method="post">
+  {% csrf_token %}
+  <p>Are you sure you want to delete "{{ object }}"?</p>
+  <button type="submit">Delete</button>
+  <a href="../">Cancel</a>
+</form>
+{% endraw %}''',
+}
+
+
+def field_code(ftype: str) -> str:
+    """'CharField' → models.CharField(max_length=255); повне визначення з параметрами пишеться як є."""
+    if "(" in ftype:
+        return f"models.{ftype}"
+    return f"models.{ftype}(max_length=255)"
+
+
+def _environment(templates: Dict[str, str]) -> Environment:
+    env = Environment(loader=DictLoader(templates), undefined=StrictUndefined,
+                      keep_trailing_newline=True, autoescape=False)
+    env.filters.update(field_code=field_code, pyrepr=repr, camelize=camelize, tuple=tuple)
+    return env
+
+
+_PROJECT_ENV = _environment(PROJECT_TEMPLATES)
+_APP_ENV = _environment(APP_TEMPLATES)
+# компілюємо всі шаблони один раз
+_PROJECT = {name: _PROJECT_ENV.get_template(name) for name in PROJECT_TEMPLATES}
+_APP = {name: _APP_ENV.get_template(name) for name in APP_TEMPLATES}
+
+_SECRET_KEY_RE = re.compile(r'SECRET_KEY = os\.environ\.get\("DJANGO_SECRET_KEY", "([^"]+)"\)')
+
+
+def existing_secret_key(project_dir: Path) -> Optional[str]:
+    """SECRET_KEY вже згенерованого settings.py — щоб повторний запуск його не змінював."""
+    settings = Path(project_dir) / PROJECT_NAME / "settings.py"
+    if not settings.exists():
+        return None
+    match = _SECRET_KEY_RE.search(settings.read_text(encoding="utf-8"))
+    return match.group(1) if match else None
+
+
+def render_project_skeleton(project_dir: Path, apps: Iterable[str]) -> Dict[Path, str]:
+    """manage.py і пакет проєкту (settings з усіма apps у INSTALLED_APPS, urls з include кожної app)."""
+    project_dir = Path(project_dir)
+    context = {
+        "project": PROJECT_NAME,
+        "templates_dir": PROJECT_TEMPLATES_DIR,
+        "apps": list(apps),
+        "secret_key": existing_secret_key(project_dir) or f"django-insecure-{secrets.token_urlsafe(40)}",
+    }
+    return {
+        project_dir / name.format(project=PROJECT_NAME): template.render(context)
+        for name, template in _PROJECT.items()
+    }
+
+
+def render_app(app: dict, root: Path, skip_templates: Iterable[str] = ()) -> Dict[Path, str]:
+    """
+    Усі файли однієї Django app (models, views, urls, apps.py, заглушки шаблонів) у пам'яті.
+    Шаблон *confirm_delete.html отримує готову форму підтвердження замість заглушки.
+    """
+    app_name = app["name"]
+    app_dir = Path(root) / app_name
+    context = {
+        "project": PROJECT_NAME,
+        "app": app_name,
+        "models": app.get("models", []),
+        "views": app.get("views", []),
+        "urls": app.get("urls", []),
+        "mixins": app.get("mixins", []),
+        "uses_reverse": any(view.get("success_url") for view in app.get("views", [])),
+    }
+    files = {app_dir / name: _APP[name].render(context)
+             for name in ("__init__.py", "models.py", "views.py", "urls.py", "apps.py")}
+
+    skip_templates = set(skip_templates)
+    for tmpl in app.get("templates", []):
+        tmpl_name = tmpl["name"] if isinstance(tmpl, dict) else tmpl
+        if tmpl_name in skip_templates:
+            continue
+        stub = "confirm_delete.html" if tmpl_name.endswith("confirm_delete.html") else "template.html"
+        files[app_dir / "templates" / tmpl_name] = _APP[stub].render(name=tmpl_name)
+    return files
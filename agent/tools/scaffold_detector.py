@@ -0,0 +1,314 @@
+"""
+Розпізнавання стандартних Rails-скафолдів (rails generate scaffold) у rails_structure.
+Ресурс зі стоковими CRUD-діями, маршрутом resources і в'юшками index/show/new/edit
+конвертується детерміновано — у generic views Django (List/Detail/Create/Update/DeleteView),
+URLs і шаблон підтвердження видалення; у LLM іде лише нестандартна частина контролера.
+
+Стоковість перевіряється за кодом контролера: тіла CRUD-дій і хелперів мають складатися
+лише з рядків, які генерує scaffold. Додаткові before_action (authorize_admin!) і нестоковий
+finder у set_<singular> (BlogPost.friendly.find) не скасовують детермінованих views — вони
+йдуть у LLM фрагментами, з яких вона робить mixin-и (dispatch/get_object), а views їх успадковують.
+Контролер зі зміненим тілом CRUD-дії (наприклад, index з фільтрацією) повністю йде в LLM.
+"""
+import re
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from agent.tools.plan_utils import app_name_for, camelize, singularize
+from agent.tools.rails_parser import resource_actions
+
+CRUD_ACTIONS = ("index", "show", "new", "edit", "create", "update", "destroy")
+# ERB-в'юшки скафолда; _form і _<singular> — партіали, які вони підключають
+SCAFFOLD_VIEWS = ("index", "show", "new", "edit")
+CRUD_VIEW_TYPES = {"ListView", "DetailView", "CreateView", "UpdateView", "DeleteView"}
+# які дії контролера обслуговує кожен generic view скафолда
+VIEW_ACTIONS = {
+    "ListView": ("index",), "DetailView": ("show",), "CreateView": ("new", "create"),
+    "UpdateView": ("edit", "update"), "DeleteView": ("destroy",),
+}
+
+# Рядки, з яких складаються тіла методів скафолда (Rails 5–8, з respond_to/json і без)
+_RESPOND = [r"respond_to do \|format\|", r"format\.html \{ .+ \}", r"format\.json \{ .+ \}", r"else"]
+STOCK_BODY_LINES = {
+    "index": [r"@\w+ = \w+\.all"],
+    "show": [],
+    "new": [r"@\w+ = \w+\.new"],
+    "edit": [],
+    "create": [r"@\w+ = \w+\.new\(\w+_params\)", r"if @\w+\.save", r"redirect_to @\w+, notice: .+",
+               r"render :new, status: :\w+", *_RESPOND],
+    "update": [r"if @\w+\.update\(\w+_params\)", r"redirect_to @\w+, notice: .+",
+               r"render :edit, status: :\w+", *_RESPOND],
+    "destroy": [r"@\w+\.destroy!?", r"redirect_to \w+_(path|url), (status: :see_other, )?notice: .+",
+                r"head :no_content", *_RESPOND],
+    "set": [r"@\w+ = \w+\.find\(params(\[:id\]|\.expect\(:id\))\)"],
+    "params": [r"params\.require\(:\w+\)\.permit\((:\w+(, *)?)*\)",
+               r"params\.expect\(\w+: \[ *(:\w+(, *)?)* *\]\)", r"params\.fetch\(:\w+, \{\}\)"],
+}
+# рядки рівня класу, крім def/end
+STOCK_CLASS_LINES = [r"class \w+ < ApplicationController", r"before_action :set_\w+(, only: .+)?",
+                     r"private", r"protected"]
+_DEF_RE = re.compile(r"^def\s+(\w+[!?]?)")
+_FILTER_RE = re.compile(r"before_action :(\w+[!?]?)(?:, (.+))?")
+
+
+def _helpers(singular: str) -> set:
+    """Приватні методи скафолда: before_action set_<singular> і strong params <singular>_params."""
+    return {f"set_{singular}", f"{singular}_params"}
+
+
+def _method_bodies(code: str) -> Dict[Optional[str], List[str]]:
+    """
+    Значущі рядки коду по методах: {назва: рядки тіла}, None — рівень класу.
+    Тіло триває до наступного def/private/protected; end і коментарі відкидаються.
+    """
+    bodies: Dict[Optional[str], List[str]] = {None: []}
+    current = None
+    for raw in code.splitlines():
+        line = raw.split(" #", 1)[0].strip()
+        if not line or line.startswith("#") or line == "end":
+            continue
+        match = _DEF_RE.match(line)
+        if match:
+            current = match.group(1)
+            bodies[current] = []
+        elif line in ("private", "protected"):
+            current = None
+            bodies[None].append(line)
+        else:
+            bodies[current].append(line)
+    return bodies
+
+
+def _stock(lines: List[str], patterns: List[str]) -> bool:
+    return all(any(re.fullmatch(p, line) for p in patterns) for line in lines)
+
+
+def _view_types(actions: Iterable[str]) -> List[str]:
+    actions = set(actions)
+    return [kind for kind, served in VIEW_ACTIONS.items() if actions & set(served)]
+
+
+def _custom_code(code: str, singular: str, model: str) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """
+    Порівнює контролер зі згенерованим scaffold.
+    :return: (методи або "class body", код яких не можна лишити на детерміновані views;
+              фрагменти-mixin-и для LLM: {"name", "rails", "view_types"})
+    """
+    bodies = _method_bodies(code)
+    expected = {**{a: STOCK_BODY_LINES[a] for a in CRUD_ACTIONS}, f"{singular}_params": STOCK_BODY_LINES["params"]}
+    custom, mixins = [], []
+
+    class_lines, set_actions = [], list(CRUD_ACTIONS)
+    for line in bodies[None]:
+        match = _FILTER_RE.fullmatch(line)
+        if match and match.group(1) == f"set_{singular}":
+            set_actions = resource_actions(match.group(2) or "")
+        elif match:
+            method = match.group(1)
+            # метод фільтра, визначений у цьому ж контролері, іде у фрагмент разом з before_action
+            defined = [f"def {method}", *bodies[method]] if method in bodies else []
+            mixins.append({"name": f"{camelize(method.rstrip('!?'))}Mixin", "filter": method,
+                           "rails": [line, *defined],
+                           "view_types": _view_types(resource_actions(match.group(2) or ""))})
+        else:
+            class_lines.append(line)
+    if not _stock(class_lines, STOCK_CLASS_LINES):
+        custom.append("class body")
+    for method, patterns in expected.items():
+        if not _stock(bodies.get(method, []), patterns):
+            custom.append(method)
+
+    finder = bodies.get(f"set_{singular}", [])
+    if not _stock(finder, STOCK_BODY_LINES["set"]):
+        mixins.append({"name": f"{model}LookupMixin", "rails": [f"def set_{singular}", *finder],
+                       "view_types": [v for v in _view_types(set_actions) if v not in ("ListView", "CreateView")]})
+    return custom, mixins
+
+
+def detect_scaffolds(rails_structure: Dict[str, Any], model_names: Iterable[str],
+                     rails_dir: str) -> List[Dict[str, Any]]:
+    """
+    Контролери скафолдової форми: усі 7 CRUD-дій зі стоковими тілами, маршрут resources :<app>
+    з усіма діями, в'юшки <app>/index|show|new|edit і модель, відома з app/models або db/schema.rb.
+    :param rails_dir: корінь Rails-проєкту — звідси читається код контролерів
+    Додаткові фільтри і нестоковий finder стають фрагментами "mixins" (див. _custom_code).
+    :return: [{"controller", "app", "model", "singular", "extra_actions", "mixins", "sources"}]
+    """
+    model_names = set(model_names)
+    resources = {
+        route["controller"] for route in rails_structure.get("routes", [])
+        if set(CRUD_ACTIONS) <= set(route.get("actions", []))
+    }
+    templates = {t["name"]: t for t in rails_structure.get("templates", [])}
+
+    scaffolds = []
+    for ctrl in rails_structure.get("controllers", []):
+        app = app_name_for("controller", ctrl)
+        singular = singularize(app)
+        model = ctrl.get("model") or camelize(singular)
+        views = [f"{app}/{view}" for view in SCAFFOLD_VIEWS]
+        if not (set(CRUD_ACTIONS) <= set(ctrl.get("actions", [])) and app in resources
+                and all(view in templates for view in views) and model in model_names):
+            continue
+        try:
+            code = (Path(rails_dir) / ctrl["source"]).read_text(encoding="utf-8")
+        except (KeyError, OSError, UnicodeDecodeError):
+            continue
+        custom, mixins = _custom_code(code, singular, model)
+        if custom:
+            logging.info(f"🏗️ {ctrl['name']} looks like a scaffold but has custom code "
+                         f"({', '.join(custom)}) — converting it with the LLM.")
+            continue
+        if mixins:
+            logging.info(f"🏗️ {ctrl['name']}: scaffold views are generated, "
+                         f"{', '.join(m['name'] for m in mixins)} go to the LLM as fragments.")
+        # парсер відкидає !/? у назвах методів
+        filters = {m["filter"].rstrip("!?") for m in mixins if "filter" in m}
+        standard = set(CRUD_ACTIONS) | _helpers(singular) | filters
+        scaffolds.append({
+            "controller": ctrl["name"],
+            "app": app,
+            "model": model,
+            "singular": singular,
+            "extra_actions": [a for a in ctrl["actions"] if a not in standard],
+            "mixins": mixins,
+            "sources": sorted({ctrl.get("source"), "config/routes.rb",
+                               *(templates[view].get("source") for view in views)} - {None}),
+        })
+    return scaffolds
+
+
+def scaffold_app(scaffold: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    App плану для скафолда. Імена URL збігаються з Rails route helpers (blog_posts,
+    blog_post, new_blog_post, edit_blog_post) — на них посилаються сконвертовані шаблони,
+    context_object_name — з інстанс-змінними (@blog_posts, @blog_post).
+    """
+    app, model, singular = scaffold["app"], scaffold["model"], scaffold["singular"]
+
+    def view(kind: str, template: str, **extra) -> Dict[str, Any]:
+        mixins = [m["name"] for m in scaffold.get("mixins", []) if kind in m["view_types"]]
+        return {"name": f"{model}{kind}", "type": kind, "model": model,
+                "template": f"{app}/{template}.html", **({"mixins": mixins} if mixins else {}), **extra}
+
+    views = [
+        view("ListView", "index", context_object_name=app),
+        view("DetailView", "show", context_object_name=singular),
+        view("CreateView", "new", success_url=singular),
+        view("UpdateView", "edit", context_object_name=singular, success_url=singular),
+        view("DeleteView", "confirm_delete", context_object_name=singular, success_url=app),
+    ]
+    urls = [
+        {"pattern": "", "view": f"{model}ListView", "name": app},
+        {"pattern": "<int:pk>/", "view": f"{model}DetailView", "name": singular},
+        {"pattern": "new/", "view": f"{model}CreateView", "name": f"new_{singular}"},
+        {"pattern": "<int:pk>/edit/", "view": f"{model}UpdateView", "name": f"edit_{singular}"},
+        {"pattern": "<int:pk>/delete/", "view": f"{model}DeleteView", "name": f"delete_{singular}"},
+    ]
+    templates = [{"name": v["template"], "context_variables": [v.get("context_object_name", "form")]}
+                 for v in views]
+    return {"name": app, "models": [], "views": views, "urls": urls, "templates": templates}
+
+
+def strip_scaffolds(rails_structure: Dict[str, Any], scaffolds: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    rails_structure без стандартної частини скафолдів: маршрути resources, в'юшки скафолда
+    і CRUD-дії прибираються; у контролері лишаються тільки нестандартні дії і фрагменти
+    ("fragments": Rails-код фільтрів/finder-а, з якого LLM робить mixin з указаною назвою).
+    Моделі лишаються — їх (якщо вони не зі схеми) і далі генерує LLM.
+    """
+    if not scaffolds:
+        return rails_structure
+    by_controller = {s["controller"]: s for s in scaffolds}
+    apps = {s["app"] for s in scaffolds}
+    skipped_templates = {
+        f"{s['app']}/{view}" for s in scaffolds
+        for view in (*SCAFFOLD_VIEWS, "_form", f"_{s['singular']}")
+    }
+
+    controllers = []
+    for ctrl in rails_structure.get("controllers", []):
+        scaffold = by_controller.get(ctrl.get("name"))
+        if scaffold is None:
+            controllers.append(ctrl)
+            continue
+        if scaffold["extra_actions"] or scaffold["mixins"]:
+            controllers.append({
+                **ctrl, "actions": scaffold["extra_actions"],
+                "fragments": [{"mixin": m["name"], "rails": "\n".join(m["rails"]),
+                               "views": [f"{scaffold['model']}{kind}" for kind in m["view_types"]]}
+                              for m in scaffold["mixins"]],
+            })
+    return {
+        **rails_structure,
+        "controllers": controllers,
+        "routes": [r for r in rails_structure.get("routes", [])
+                   if not (r.get("controller") in apps and "actions" in r)],
+        "templates": [t for t in rails_structure.get("templates", []) if t["name"] not in skipped_templates],
+    }
+
+
+def scaffold_plan_fragment(scaffolds: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {"apps": [scaffold_app(s) for s in scaffolds]}
+
+
+def claim_scaffold_models(django_plan: Dict[str, Any], scaffolds: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Views скафолда імпортують модель з .models своєї app: моделі скафолдів, які LLM поклала
+    в інші apps, переносяться в app скафолда, а дублікати CRUD-views цих моделей в інших apps
+    (разом з їхніми URLs) прибираються.
+    """
+    owners = {s["model"]: s["app"] for s in scaffolds}
+    apps = {app["name"]: app for app in django_plan.get("apps", [])}
+    moved = []
+    for app in django_plan.get("apps", []):
+        foreign = [m for m in app.get("models", []) if owners.get(m.get("name"), app["name"]) != app["name"]]
+        dropped = {v["name"] for v in app.get("views", [])
+                   if owners.get(v.get("model"), app["name"]) != app["name"] and v.get("type") in CRUD_VIEW_TYPES}
+        if not (foreign or dropped):
+            continue
+        app["models"] = [m for m in app["models"] if m not in foreign]
+        app["views"] = [v for v in app["views"] if v["name"] not in dropped]
+        app["urls"] = [u for u in app.get("urls", []) if u.get("view") not in dropped]
+        for model in foreign:
+            target = apps[owners[model["name"]]].setdefault("models", [])
+            if all(m.get("name") != model["name"] for m in target):
+                target.append(model)
+            moved.append(model["name"])
+    if moved:
+        logging.info(f"🏗️ Scaffold models moved into their apps: {', '.join(sorted(set(moved)))}")
+    return django_plan
+
+
+def claim_scaffold_mixins(django_plan: Dict[str, Any], scaffolds: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Mixin-и фрагментів мають бути у views.py app скафолда: визначені LLM в інших apps
+    переносяться, а на невизначені views перестають посилатися (з попередженням) —
+    інакше views.py не імпортується.
+    """
+    apps = {app["name"]: app for app in django_plan.get("apps", [])}
+    defined = {m.get("name"): (app, m) for app in django_plan.get("apps", []) for m in app.get("mixins", [])}
+    for scaffold in scaffolds:
+        app = apps.get(scaffold["app"])
+        if app is None:
+            continue
+        own = {m.get("name") for m in app.get("mixins", [])}
+        missing = set()
+        for mixin in scaffold.get("mixins", []):
+            name = mixin["name"]
+            if name in own:
+                continue
+            if name in defined:
+                source, spec = defined[name]
+                source["mixins"] = [m for m in source["mixins"] if m is not spec]
+                app.setdefault("mixins", []).append(spec)
+                own.add(name)
+            else:
+                missing.add(name)
+        if missing:
+            logging.warning(f"⚠️ {scaffold['controller']}: LLM did not return {', '.join(sorted(missing))} — "
+                            f"these Rails filters are not applied to the Django views.")
+            for view in app.get("views", []):
+                if view.get("mixins"):
+                    view["mixins"] = [m for m in view["mixins"] if m not in missing]
+    return django_plan
@@ -0,0 +1,405 @@
+import re
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Iterable
+from agent.tools.file_tools import read_file
+from agent.tools.plan_utils import underscore, pluralize, singularize, camelize
+
+
+# Таблиці фреймворку та гемів, для яких моделі в Django не генеруємо
+FRAMEWORK_TABLE_PREFIXES = (
+    "active_storage_", "action_text_", "action_mailbox_", "solid_",
+    "ar_internal_metadata", "schema_migrations", "friendly_id_slugs",
+)
+
+COLUMN_TYPES = {
+    "string", "text", "integer", "bigint", "float", "decimal", "numeric", "boolean",
+    "date", "datetime", "timestamp", "timestamptz", "time", "binary", "json", "jsonb",
+    "uuid", "inet", "citext", "primary_key",
+}
+
+# Rails-тип → Django-поле (без параметрів)
+DJANGO_FIELDS = {
+    "string": "CharField",
+    "citext": "CharField",
+    "text": "TextField",
+    "integer": "IntegerField",
+    "bigint": "BigIntegerField",
+    "float": "FloatField",
+    "decimal": "DecimalField",
+    "numeric": "DecimalField",
+    "boolean": "BooleanField",
+    "date": "DateField",
+    "datetime": "DateTimeField",
+    "timestamp": "DateTimeField",
+    "timestamptz": "DateTimeField",
+    "time": "TimeField",
+    "binary": "BinaryField",
+    "json": "JSONField",
+    "jsonb": "JSONField",
+    "uuid": "UUIDField",
+    "inet": "GenericIPAddressField",
+}
+
+DJANGO_INDEX_NAME_MAX = 30
+
+
+# --------------------------
+# RUBY ARGUMENTS
+# --------------------------
+def split_ruby_args(text: str) -> List[str]:
+    """Розбиває аргументи Ruby-виклику за комами верхнього рівня."""
+    parts, depth, quote, current = [], 0, None, []
+    for ch in text:
+        if quote:
+            current.append(ch)
+            if ch == quote:
+                quote = None
+            continue
+        if ch in "\"'":
+            quote = ch
+        elif ch in "[{(":
+            depth += 1
+        elif ch in "]})":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+            continue
+        current.append(ch)
+    if "".join(current).strip():
+        parts.append("".join(current).strip())
+    return parts
+
+
+def _value(text: str) -> Any:
+    text = text.strip()
+    if text.startswith("[") and text.endswith("]"):
+        return [_value(v) for v in split_ruby_args(text[1:-1])]
+    if text.startswith(":"):
+        return text[1:]
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "\"'":
+        return text[1:-1]
+    if text in ("true", "false"):
+        return text == "true"
+    if text == "nil":
+        return None
+    if re.fullmatch(r"-?\d+", text):
+        return int(text)
+    if re.fullmatch(r"-?\d+\.\d+", text):
+        return float(text)
+    return text
+
+
+def _parse_call(args_text: str):
+    """`:title, :body, null: false` → (["title", "body"], {"null": False})"""
+    positional, options = [], {}
+    for arg in split_ruby_args(args_text):
+        m = re.match(r'^(\w+):\s+(.+)$', arg, re.S) or re.match(r'^:(\w+)\s*=>\s*(.+)$', arg, re.S)
+        if m:
+            options[m.group(1)] = _value(m.group(2))
+        else:
+            positional.append(_value(arg))
+    return positional, options
+
+
+# --------------------------
+# SCHEMA / MIGRATIONS
+# --------------------------
+def _new_table(name: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    return {"name": name, "id": options.get("id", True) is not False, "columns": [], "indexes": [], "foreign_keys": []}
+
+
+def _column(name: str, col_type: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    column = {"name": name, "type": col_type, "null": options.get("null", True) is not False}
+    for key in ("default", "limit", "precision", "scale"):
+        if key in options:
+            column[key] = options[key]
+    return column
+
+
+def _add_reference(table: Dict[str, Any], ref: str, options: Dict[str, Any]):
+    ref_type = options.get("type") if options.get("type") in COLUMN_TYPES else "bigint"
+    table["columns"].append(_column(f"{ref}_id", ref_type, options))
+    if options.get("polymorphic"):
+        table["columns"].append(_column(f"{ref}_type", "string", options))
+    elif options.get("foreign_key", True) is not False:
+        to_table = options.get("to_table") or pluralize(ref)
+        table["foreign_keys"].append({"column": f"{ref}_id", "to_table": to_table})
+
+
+def _add_index(table: Dict[str, Any], columns: Any, options: Dict[str, Any]):
+    columns = columns if isinstance(columns, list) else [columns]
+    table["indexes"].append({
+        "columns": [str(c) for c in columns],
+        "name": options.get("name"),
+        "unique": bool(options.get("unique")),
+    })
+
+
+def _apply_table_line(table: Dict[str, Any], method: str, args_text: str):
+    positional, options = _parse_call(args_text)
+    if method in COLUMN_TYPES:
+        for name in positional:
+            table["columns"].append(_column(str(name), method, options))
+    elif method == "column" and len(positional) >= 2:
+        table["columns"].append(_column(str(positional[0]), str(positional[1]), options))
+    elif method == "timestamps":
+        for name in ("created_at", "updated_at"):
+            table["columns"].append(_column(name, "datetime", {"null": options.get("null", False)}))
+    elif method in ("references", "belongs_to"):
+        for ref in positional:
+            _add_reference(table, str(ref), options)
+    elif method == "index" and positional:
+        _add_index(table, positional[0], options)
+    elif method == "foreign_key" and positional:
+        column = options.get("column") or f"{singularize(str(positional[0]))}_id"
+        if not any(fk["column"] == column for fk in table["foreign_keys"]):
+            table["foreign_keys"].append({"column": str(column), "to_table": str(positional[0])})
+
+
+_BLOCK_OPENERS = re.compile(r'^(if|unless|case|while|until|begin|def|class|module)\b|\bdo(\s*\|[^|]*\|)?\s*$')
+
+
+def parse_schema_source(code: str, tables: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Розбирає db/schema.rb або файл міграції й застосовує його до словника таблиць.
+    Міграції застосовуються послідовно до того самого словника.
+    """
+    tables = {} if tables is None else tables
+    current, depth = None, 0
+
+    for raw in code.splitlines():
+        line = raw.split(" #", 1)[0].strip() if not raw.strip().startswith("#") else ""
+        if not line:
+            continue
+
+        if current is not None:
+            if line == "end":
+                depth -= 1
+                if depth == 0:
+                    current = None
+                continue
+            if _BLOCK_OPENERS.search(line):
+                depth += 1
+                continue
+            m = re.match(r'^\w+\.(\w+)\s*(.*)$', line)
+            if m:
+                _apply_table_line(current, m.group(1), m.group(2))
+            continue
+
+        m = re.match(r'^create_table\s+(.+?)\s+do\s*\|\w+\|$', line)
+        if m:
+            positional, options = _parse_call(m.group(1))
+            current = _new_table(str(positional[0]), options)
+            tables[current["name"]] = current
+            depth = 1
+            continue
+
+        m = re.match(r'^(\w+)[\s(]+(.*?)\)?$', line)
+        if not m:
+            continue
+        method, (positional, options) = m.group(1), _parse_call(m.group(2))
+        table = tables.get(str(positional[0])) if positional else None
+
+        if method == "add_column" and table and len(positional) >= 3:
+            table["columns"].append(_column(str(positional[1]), str(positional[2]), options))
+        elif method == "remove_column" and table and len(positional) >= 2:
+            table["columns"] = [c for c in table["columns"] if c["name"] != positional[1]]
+        elif method == "rename_column" and table and len(positional) >= 3:
+            for c in table["columns"]:
+                if c["name"] == positional[1]:
+                    c["name"] = str(positional[2])
+        elif method == "change_column_null" and table and len(positional) >= 3:
+            for c in table["columns"]:
+                if c["name"] == positional[1]:
+                    c["null"] = bool(positional[2])
+        elif method == "add_index" and table and len(positional) >= 2:
+            _add_index(table, positional[1], options)
+        elif method in ("add_reference", "add_belongs_to") and table and len(positional) >= 2:
+            _add_reference(table, str(positional[1]), options)
+        elif method == "add_timestamps" and table:
+            _apply_table_line(table, "timestamps", "")
+        elif method == "add_foreign_key" and table and len(positional) >= 2:
+            column = options.get("column") or f"{singularize(str(positional[1]))}_id"
+            table["foreign_keys"].append({"column": str(column), "to_table": str(positional[1])})
+        elif method == "drop_table" and positional:
+            tables.pop(str(positional[0]), None)
+        elif method == "rename_table" and table and len(positional) >= 2:
+            table["name"] = str(positional[1])
+            tables[table["name"]] = tables.pop(str(positional[0]))
+
+    return tables
+
+
+def parse_schema_rb(schema_file: Path) -> Dict[str, Dict[str, Any]]:
+    return parse_schema_source(read_file(str(schema_file)))
+
+
+def parse_migrations(migration_files: Iterable[Path]) -> Dict[str, Dict[str, Any]]:
+    """Відтворює схему, застосовуючи міграції в порядку їхніх timestamp-префіксів."""
+    tables: Dict[str, Dict[str, Any]] = {}
+    for path in sorted(migration_files, key=lambda p: Path(p).name):
+        parse_schema_source(read_file(str(path)), tables)
+    return tables
+
+
+# --------------------------
+# DJANGO MODELS
+# --------------------------
+def model_name_for_table(table: str) -> str:
+    return camelize(singularize(table))
+
+
+def _py(value: Any) -> str:
+    return repr(value)
+
+
+def _field_definition(column: Dict[str, Any], fk_table: Optional[str], unique: bool) -> str:
+    args = []
+    if fk_table:
+        kind = "OneToOneField" if unique else "ForeignKey"
+        args = [_py(model_name_for_table(fk_table)), "on_delete=models.CASCADE"]
+        if column["null"]:
+            args += ["null=True", "blank=True"]
+        return f"{kind}({', '.join(args)})"
+
+    col_type = column["type"]
+    field = DJANGO_FIELDS.get(col_type, "TextField")
+    name = column["name"]
+
+    if field == "CharField":
+        args.append(f"max_length={column.get('limit') or 255}")
+    elif field == "DecimalField":
+        args.append(f"max_digits={column.get('precision') or 10}")
+        args.append(f"decimal_places={column.get('scale') or 2}")
+
+    if name == "created_at" and field == "DateTimeField":
+        args.append("auto_now_add=True")
+    elif name == "updated_at" and field == "DateTimeField":
+        args.append("auto_now=True")
+    elif column.get("default") is not None and not str(column["default"]).startswith("->"):
+        # лямбди (-> { "now()" }) — SQL-вирази, у Django їх не переносимо
+        args.append(f"default={_py(column['default'])}")
+
+    if column["null"]:
+        args += ["null=True", "blank=True"]
+    if unique:
+        args.append("unique=True")
+
+    return f"{field}({', '.join(args)})"
+
+
+def _index_name(table: str, fields: List[str], rails_name: Optional[str]) -> str:
+    if rails_name and len(rails_name) <= DJANGO_INDEX_NAME_MAX:
+        return rails_name
+    digest = hashlib.sha1(f"{table}:{','.join(fields)}".encode()).hexdigest()[:6]
+    return f"{table[:12]}_{fields[0][:10]}_{digest}"[:DJANGO_INDEX_NAME_MAX]
+
+
+def table_to_django_model(table: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Перетворює опис таблиці у модель плану:
+    {"name", "fields": {поле: "CharField(...)"}, "meta": {"db_table", "indexes", "unique_together"}}.
+    """
+    fks = {fk["column"]: fk["to_table"] for fk in table["foreign_keys"]}
+    unique_single = {i["columns"][0] for i in table["indexes"] if i["unique"] and len(i["columns"]) == 1}
+
+    def field_name(column: str) -> str:
+        return column[:-3] if column in fks and column.endswith("_id") else column
+
+    fields = {}
+    for column in table["columns"]:
+        if column["name"] == "id":
+            continue
+        fields[field_name(column["name"])] = _field_definition(
+            column, fks.get(column["name"]), column["name"] in unique_single
+        )
+
+    indexes, unique_together = [], []
+    for index in table["indexes"]:
+        names = [field_name(c) for c in index["columns"]]
+        if index["unique"] and len(names) > 1:
+            unique_together.append(names)
+        elif not index["unique"] and not (len(names) == 1 and index["columns"][0] in fks):
+            indexes.append({"fields": names, "name": _index_name(table["name"], names, index["name"])})
+
+    meta = {"db_table": table["name"]}
+    if indexes:
+        meta["indexes"] = indexes
+    if unique_together:
+        meta["unique_together"] = unique_together
+
+    return {"name": model_name_for_table(table["name"]), "fields": fields, "meta": meta, "source": "schema"}
+
+
+def schema_to_django_models(tables: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    models = []
+    for name, table in tables.items():
+        if name.startswith(FRAMEWORK_TABLE_PREFIXES):
+            continue
+        models.append(table_to_django_model(table))
+    return models
+
+
+def load_schema_models(index) -> List[Dict[str, Any]]:
+    """
+    Моделі Django з db/schema.rb, а якщо його немає — з db/migrate/*.rb.
+    :param index: RailsFileIndex проєкту
+    """
+    if index.has("db/schema.rb"):
+        tables = parse_schema_rb(index.path("db/schema.rb"))
+        origin = "db/schema.rb"
+    elif index.bucket("migrations"):
+        tables = parse_migrations(index.path(rel) for rel in index.bucket("migrations"))
+        origin = f"{len(index.bucket('migrations'))} migrations"
+    else:
+        return []
+
+    models = schema_to_django_models(tables)
+    logging.info(f"🗄️ {len(models)} моделей зі схеми ({origin}), {len(tables) - len(models)} службових таблиць пропущено")
+    return models
+
+
+# --------------------------
+# PLAN INJECTION
+# --------------------------
+def schema_plan_fragment(django_plan: Dict[str, Any], schema_models: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Розкладає моделі зі схеми по apps плану: у app, чиї views посилаються на модель,
+    інакше — в app з детермінованою назвою (blog_posts для BlogPost).
+    Посилання ForeignKey('Model') уточнюються до 'app.Model'.
+    """
+    owner = {}
+    for app in django_plan.get("apps", []):
+        for view in app.get("views", []):
+            if isinstance(view, dict) and view.get("model"):
+                owner.setdefault(view["model"], app["name"])
+
+    placement = {m["name"]: owner.get(m["name"]) or pluralize(underscore(m["name"])) for m in schema_models}
+
+    def qualify(definition: str) -> str:
+        return re.sub(
+            r"^(ForeignKey|OneToOneField)\('(\w+)'",
+            lambda m: f"{m.group(1)}('{placement[m.group(2)]}.{m.group(2)}'" if m.group(2) in placement else m.group(0),
+            definition,
+        )
+
+    apps: Dict[str, Dict[str, Any]] = {}
+    for model in schema_models:
+        app = apps.setdefault(placement[model["name"]], {"name": placement[model["name"]], "models": []})
+        app["models"].append({**model, "fields": {k: qualify(v) for k, v in model["fields"].items()}})
+    return {"apps": list(apps.values())}
+
+
+def strip_models(django_plan: Dict[str, Any], names: Iterable[str]) -> Dict[str, Any]:
+    """Прибирає з плану LLM моделі, які генеруються детерміновано зі схеми."""
+    names = set(names)
+    return {
+        **django_plan,
+        "apps": [
+            {**app, "models": [m for m in app.get("models", []) if m.get("name") not in names]}
+            for app in django_plan.get("apps", [])
+        ],
+    }
@@ -1,62 +1,731 @@
+import os
 import re
+import time
 import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from agent.tools.file_tools import list_files, read_file, write_file, ensure_dir
+from typing import Dict, List, Any, Optional, Tuple
+from agent.tools.file_tools import list_files, read_file, write_file, write_files_atomic, ensure_dir
+from agent.tools.plan_utils import singularize, pluralize
+from agent.tools.schema_parser import split_ruby_args
 
 
-def convert_erb_to_django(erb_content: str) -> str:
+# ==========================
+# LEXER
+# ==========================
+def tokenize_erb(source: str) -> List[Tuple[str, str]]:
     """
-    Перетворює ERB-шаблон з Rails у HTML-шаблон у стилі Django.
-    Основна ідея — конвертація Ruby-синтаксису <%= %> у {{ }},
-    а <% %> у {% %}.
+    Один лінійний прохід по шаблону → список токенів (kind, value):
+    text, output (<%= %>), raw (<%== %>), code (<% %>), comment (<%# %>).
+    Враховує trim-маркери <%- і -%> та екранування <%%.
+    """
+    tokens: List[Tuple[str, str]] = []
+    text: List[str] = []
+    pos, n = 0, len(source)
+
+    while pos < n:
+        start = source.find("<%", pos)
+        if start == -1:
+            text.append(source[pos:])
+            break
+        text.append(source[pos:start])
+
+        if source.startswith("<%%", start):
+            text.append("<%")
+            pos = start + 3
+            continue
+
+        end = source.find("%>", start + 2)
+        if end == -1:
+            text.append(source[start:])
+            break
+
+        inner = source[start + 2:end]
+        trim_right = inner.endswith("-")
+        if trim_right:
+            inner = inner[:-1]
+
+        if inner.startswith("-"):
+            inner = inner[1:]
+            # <%- прибирає відступ рядка перед тегом
+            if text:
+                text[-1] = re.sub(r"[ \t]+$", "", text[-1])
+
+        if inner.startswith("#"):
+            kind, inner = "comment", inner[1:]
+        elif inner.startswith("=="):
+            kind, inner = "raw", inner[2:]
+        elif inner.startswith("="):
+            kind, inner = "output", inner[1:]
+        else:
+            kind = "code"
+
+        if text:
+            tokens.append(("text", "".join(text)))
+            text = []
+        tokens.append((kind, inner.strip()))
+
+        pos = end + 2
+        if trim_right and source.startswith("\n", pos):
+            pos += 1
+
+    if text and "".join(text):
+        tokens.append(("text", "".join(text)))
+    return tokens
+
+
+# ==========================
+# PARSER → AST
+# ==========================
+_EACH = re.compile(r"^(.+?)\.each(_with_index)?\s+do\s*\|\s*(\w+)(?:\s*,\s*(\w+))?\s*\|$")
+_DO_BLOCK = re.compile(r"\s+do(\s*\|[^|]*\|)?$")
+
+
+def parse_erb(tokens: List[Tuple[str, str]]) -> Dict[str, Any]:
+    """
+    Будує дерево шаблону з токенів. Вузли — словники з полем kind:
+    text, output, raw, comment, stmt (невідомий Ruby-код),
+    if (branches + orelse), for, block (будь-який `... do |x|`).
+    Незакриті блоки автоматично закриваються в кінці шаблону.
+    """
+    root = {"kind": "root", "children": []}
+    stack: List[Tuple[Dict[str, Any], List]] = [(root, root["children"])]
+
+    def add(node: Dict[str, Any]):
+        stack[-1][1].append(node)
+
+    def open_block(node: Dict[str, Any], target: List):
+        add(node)
+        stack.append((node, target))
+
+    for kind, value in tokens:
+        if kind in ("text", "comment", "raw"):
+            add({"kind": kind, "code": value})
+            continue
+
+        if kind == "output":
+            m = _DO_BLOCK.search(value)
+            if m:
+                node = {"kind": "block", "code": value[:m.start()].strip(), "args": _block_args(m.group(1)),
+                        "output": True, "children": []}
+                open_block(node, node["children"])
+            else:
+                add({"kind": "output", "code": value})
+            continue
+
+        # --- code ---
+        head = value.split(None, 1)[0] if value else ""
+        rest = value[len(head):].strip()
+
+        if head in ("if", "unless"):
+            node = {"kind": "if", "negate": head == "unless", "branches": [[rest, []]], "orelse": None}
+            open_block(node, node["branches"][0][1])
+        elif head == "elsif" and stack[-1][0]["kind"] == "if":
+            node = stack.pop()[0]
+            node["branches"].append([rest, []])
+            stack.append((node, node["branches"][-1][1]))
+        elif value == "else" and stack[-1][0]["kind"] == "if":
+            node = stack.pop()[0]
+            node["orelse"] = []
+            stack.append((node, node["orelse"]))
+        elif value == "end" or value.startswith("end "):
+            if len(stack) > 1:
+                stack.pop()
+            else:
+                add({"kind": "comment", "code": "unmatched end"})
+        elif _EACH.match(value):
+            m = _EACH.match(value)
+            node = {"kind": "for", "iterable": m.group(1), "var": m.group(3),
+                    "index": m.group(4) if m.group(2) else None, "children": []}
+            open_block(node, node["children"])
+        elif _DO_BLOCK.search(value):
+            m = _DO_BLOCK.search(value)
+            node = {"kind": "block", "code": value[:m.start()].strip(), "args": _block_args(m.group(1)),
+                    "output": False, "children": []}
+            open_block(node, node["children"])
+        else:
+            add({"kind": "stmt", "code": value})
+
+    if len(stack) > 1:
+        logging.debug(f"⚠️ ERB: {len(stack) - 1} незакритих блоків закрито автоматично")
+    return root
+
+
+def _block_args(args: Optional[str]) -> List[str]:
+    return re.findall(r"\w+", args or "")
+
+
+# ==========================
+# RUBY EXPRESSIONS
+# ==========================
+_EXPR_TOKEN = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<str>"(?:[^"\\\#]|\\.|\#(?!\{))*"|'(?:[^'\\]|\\.)*')
+  | (?P<num>\d+(?:\.\d+)?)
+  | (?P<index>\[\s*(?::\w+|"\w+"|'\w+'|\d+)\s*\])
+  | (?P<attr>\.\w+[?!]?)
+  | (?P<ident>@{0,2}[A-Za-z_]\w*[?!]?)
+  | (?P<op>&&|\|\||==|!=|>=|<=|<|>|!)
+""", re.X)
+
+_TRUTHY = {"present?", "any?", "attached?", "exists?"}
+_FALSY = {"nil?", "blank?", "empty?", "none?"}
+_LENGTH = {"count", "size", "length"}
+_LITERALS = {"nil": "None", "true": "True", "false": "False"}
+_OPERATORS = {"&&": "and", "||": "or", "!": "not "}
+_KEYWORDS = {"and", "or", "not", "in"}
+_RUBY_ONLY = {"if", "unless", "do", "end", "yield", "then", "self"}
+
+
+def translate_expr(code: str, condition: bool = False) -> Optional[str]:
+    """
+    Переводить просте Ruby-вираження у вираз шаблонів Django:
+    @post.title → post.title, errors[:title].any? → errors.title,
+    items.count → items|length, x.nil? → not x.
+    Повертає None, якщо вираз неможливо перекласти (виклики з аргументами, блоки, інтерполяція).
     """
-    # <%= expression %> → {{ expression }}
-    html = re.sub(r"<%=\s*(.*?)\s*%>", r"{{ \1 }}", erb_content)
+    out: List[str] = []
+    operand_start: Optional[int] = None
+    after_operand = False
+    pos = 0
+
+    while pos < len(code):
+        m = _EXPR_TOKEN.match(code, pos)
+        if not m:
+            return None
+        pos = m.end()
+        kind, tok = m.lastgroup, m.group()
+
+        if kind == "ws":
+            out.append(" ")
+            continue
+        elif kind in ("str", "num"):
+            if after_operand:
+                return None
+            operand_start = len(out)
+            out.append(tok)
+        elif kind == "ident":
+            name = tok.lstrip("@")
+            if name in _RUBY_ONLY or name.endswith("!"):
+                return None
+            if name in _KEYWORDS:
+                out.append(name)
+                after_operand = False
+                continue
+            # два операнди поспіль — виклик методу без дужок (helper arg)
+            if after_operand:
+                return None
+            operand_start = len(out)
+            out.append(_LITERALS.get(name, name.rstrip("?")))
+        elif kind == "attr":
+            name = tok[1:]
+            if operand_start is None or name.endswith("!"):
+                return None
+            if name in _TRUTHY:
+                continue
+            if name in _FALSY:
+                out.insert(operand_start, "not ")
+            elif name in _LENGTH:
+                out.append("|length")
+            else:
+                out.append("." + name.rstrip("?"))
+        elif kind == "index":
+            out.append("." + tok.strip("[] :\"'"))
+        elif kind == "op":
+            out.append(_OPERATORS.get(tok, f" {tok} "))
+            after_operand = False
+            continue
+        after_operand = True
+
+    result = re.sub(r"\s+", " ", "".join(out)).strip()
+    if not result:
+        return None
+    if not condition and re.search(r"\b(and|or|not)\b|==|!=|[<>]", result):
+        return None
+    return result
+
+
+def _string_literal(code: str) -> Optional[str]:
+    code = code.strip()
+    if re.fullmatch(r'"(?:[^"\\#]|\\.|#(?!\{))*"|\'(?:[^\'\\]|\\.)*\'', code):
+        return code[1:-1]
+    return None
+
+
+def _split_modifier(code: str) -> Tuple[str, Optional[str], bool]:
+    """`render "x" if admin` → ("render \"x\"", "admin", False); unless → negate=True."""
+    depth, quote = 0, None
+    for i, ch in enumerate(code):
+        if quote:
+            if ch == quote:
+                quote = None
+            continue
+        if ch in "\"'":
+            quote = ch
+        elif ch in "([{":
+            depth += 1
+        elif ch in ")]}":
+            depth -= 1
+        elif depth == 0 and ch == " ":
+            for keyword in ("if", "unless"):
+                if code.startswith(f" {keyword} ", i):
+                    return code[:i].strip(), code[i + len(keyword) + 2:].strip(), keyword == "unless"
+    return code, None, False
+
+
+def _escape_comment(text: str) -> str:
+    return text.replace("#}", "# }").replace("\n", " ")
+
+
+def _todo(code: str) -> str:
+    return "{# TODO erb: " + _escape_comment(code) + " #}"
+
+
+# ==========================
+# HELPERS
+# ==========================
+# Хелпери Rails без аналогів у шаблоні Django або з фіксованою заміною
+HELPER_TAGS = {
+    "csrf_meta_tags": "",
+    "csp_meta_tag": "",
+    "javascript_importmap_tags": "<script type=\"module\" src=\"{% static 'application.js' %}\"></script>",
+    "stylesheet_link_tag": "<link rel=\"stylesheet\" href=\"{% static 'application.css' %}\">",
+    "javascript_include_tag": "<script src=\"{% static 'application.js' %}\"></script>",
+    "notice": "{% for message in messages %}{{ message }}{% endfor %}",
+    "alert": "",
+}
+
+
+@lru_cache(maxsize=4096)
+def partial_template_name(partial: str, view_dir: str = "") -> str:
+    """Rails-партіал → ім'я Django-шаблону: "layouts/alerts" → "layouts/_alerts.html"."""
+    directory, _, name = partial.rpartition("/")
+    directory = directory or view_dir
+    return f"{directory}/_{name}.html" if directory else f"_{name}.html"
+
+
+def _url(target: str) -> str:
+    """Аргумент link_to/button_to → значення href."""
+    literal = _string_literal(target)
+    if literal is not None:
+        return literal
+    m = re.fullmatch(r"(\w+)_(?:path|url)(?:\((.*)\))?", target.strip())
+    if m:
+        args = [translate_expr(a) for a in split_ruby_args(m.group(2) or "")]
+        args = " ".join(a for a in args if a and "=" not in a)
+        return "{% url '" + m.group(1) + "'" + (f" {args}" if args else "") + " %}"
+    expr = translate_expr(target)
+    return "{{ " + expr + ".get_absolute_url }}" if expr else "#"
+
+
+def _call_args(rest: str) -> List[str]:
+    """Аргументи виклику хелпера: `link_to("a", b)` і `link_to "a", b` розбираються однаково."""
+    rest = rest.strip()
+    if rest.startswith("(") and rest.endswith(")"):
+        rest = rest[1:-1]
+    return split_ruby_args(rest)
+
+
+def _text_or_expr(code: str) -> str:
+    literal = _string_literal(code)
+    if literal is not None:
+        return literal
+    expr = translate_expr(code)
+    return "{{ " + expr + " }}" if expr else _todo(code)
+
+
+# ==========================
+# RENDERER
+# ==========================
+class _Context:
+    def __init__(self, view_dir: str):
+        self.view_dir = view_dir
+        self.uses_static = False
+        self.form_vars: List[str] = []
+
 
-    # <% code %> → {% code %}
-    html = re.sub(r"<%\s*(.*?)\s*%>", r"{% \1 %}", html)
+def _hash_pairs(code: str) -> Optional[List[Tuple[str, str]]]:
+    """Ruby-хеш `{ post: @post, :title => "x" }` → [(ключ, вираз)]; None — не літерал хеша."""
+    code = code.strip()
+    if not (code.startswith("{") and code.endswith("}")):
+        return None
+    pairs = []
+    for item in split_ruby_args(code[1:-1]):
+        m = re.match(r"""^(?:(\w+):\s+|:(\w+)\s*=>\s*|["'](\w+)["']\s*=>\s*)(.+)$""", item.strip(), re.S)
+        if not m:
+            return None
+        pairs.append((m.group(1) or m.group(2) or m.group(3), m.group(4)))
+    return pairs
 
-    # Ruby коментарі → HTML коментарі
-    html = re.sub(r"<%#\s*(.*?)\s*%>", r"<!-- \1 -->", html)
 
-    # Замінюємо Ruby змінні @var → var
-    html = re.sub(r"@(\w+)", r"\1", html)
+def _render_partial(args_code: str, ctx: _Context) -> str:
+    args = _call_args(args_code)
+    if not args:
+        return _todo("render")
 
-    # Заміна Ruby умов на Django теги
-    html = html.replace("if", "if").replace("elsif", "elif").replace("end", "endif")
+    options = {}
+    positional = []
+    for arg in args:
+        m = re.match(r"^(\w+):\s+(.+)$", arg, re.S)
+        if m:
+            options[m.group(1)] = m.group(2)
+        else:
+            positional.append(arg)
 
-    # Часткові рендери <%= render 'partial' %> → {% include 'partial.html' %}
-    html = re.sub(r"{%\s*include\s*['\"]([\w\/]+)['\"]\s*%}", r"{% include '\1.html' %}", html)
-    html = re.sub(r"{{\s*render\s*['\"]([\w\/]+)['\"]\s*}}", r"{% include '\1.html' %}", html)
+    partial = _string_literal(options.get("partial", positional[0] if positional else ""))
+    collection = options.get("collection")
 
+    if partial is None and positional:
+        # render @blog_posts / render blog_post — партіал за назвою моделі
+        expr = translate_expr(positional[0])
+        if not expr or "|" in expr:
+            return _todo(f"render {args_code}")
+        collection_name = expr.split(".")[-1]
+        if singularize(collection_name) != collection_name:
+            item = singularize(collection_name)
+            name = partial_template_name(f"{collection_name}/{item}")
+            return "{% for " + item + " in " + expr + " %}{% include '" + name + "' with " + item + "=" + item + " %}{% endfor %}"
+        name = partial_template_name(f"{pluralize(collection_name)}/{collection_name}")
+        return "{% include '" + name + "' with " + collection_name + "=" + expr + " %}"
+
+    if partial is None:
+        return _todo(f"render {args_code}")
+
+    name = partial_template_name(partial, ctx.view_dir)
+    # змінні партіала: опції render (render "form", post: @post) і locals: { ... }
+    local_vars = [(k, v) for k, v in options.items() if k not in ("partial", "collection", "locals", "as")]
+    if "locals" in options:
+        pairs = _hash_pairs(options["locals"])
+        if pairs is None:
+            return _todo(f"render {args_code}")
+        local_vars += pairs
+    with_args, untranslated = [], []
+    for key, value in local_vars:
+        expr = translate_expr(value)
+        if expr:
+            with_args.append(f"{key}={expr}")
+        else:
+            untranslated.append(f"{key}: {value}")
+    with_clause = f" with {' '.join(with_args)}" if with_args else ""
+    # непереведені locals не губляться мовчки — партіал отримає їх після ручної правки
+    todo = _todo(f"render {partial} locals {', '.join(untranslated)}") if untranslated else ""
+
+    if collection:
+        iterable = translate_expr(collection)
+        item = _string_literal(options.get("as", "")) or options.get("as", "").lstrip(":") or partial.rpartition("/")[2]
+        if not iterable:
+            return _todo(f"render {args_code}")
+        return todo + "{% for " + item + " in " + iterable + " %}{% include '" + name + "'" + with_clause + " %}{% endfor %}"
+    return todo + "{% include '" + name + "'" + with_clause + " %}"
+
+
+def _render_output(code: str, ctx: _Context, raw: bool = False) -> str:
+    body, cond, negate = _split_modifier(code)
+    html = _render_output_body(body, ctx, raw)
+    if cond is None:
+        return html
+    cond_expr = translate_expr(cond, condition=True)
+    if cond_expr is None:
+        return _todo(f"if {cond}") + html
+    if negate:
+        return "{% if " + cond_expr + " %}{% else %}" + html + "{% endif %}"
+    return "{% if " + cond_expr + " %}" + html + "{% endif %}"
+
+
+def _render_output_body(code: str, ctx: _Context, raw: bool) -> str:
+    m = re.fullmatch(r"yield(?:\(?\s*:(\w+)\s*\)?)?", code)
+    if m:
+        return "{% block " + (m.group(1) or "content") + " %}{% endblock %}"
+
+    m = re.fullmatch(r"content_for\(?\s*:(\w+)\s*\)?(?:\s*\|\|\s*(.+))?", code)
+    if m:
+        default = _string_literal(m.group(2) or "") or ""
+        return "{% block " + m.group(1) + " %}" + default + "{% endblock %}"
+
+    m = re.match(r"render\b\s*(.*)$", code, re.S)
+    if m:
+        return _render_partial(m.group(1), ctx)
+
+    m = re.fullmatch(r"raw\s*\(?(.+?)\)?|(.+)\.html_safe", code, re.S)
+    if m:
+        code, raw = (m.group(1) or m.group(2)).strip(), True
+
+    head = re.match(r"[\w.]+", code)
+    head = head.group() if head else ""
+    rest = code[len(head):].strip()
+
+    if head in HELPER_TAGS:
+        html = HELPER_TAGS[head]
+        ctx.uses_static |= "{% static" in html
+        return html
+
+    if head in ("link_to", "button_to"):
+        args = _call_args(rest)
+        if len(args) < 2:
+            return _todo(code)
+        text, href = _text_or_expr(args[0]), _url(args[1])
+        if head == "button_to":
+            return f'<form method="post" action="{href}">{{% csrf_token %}}<button type="submit">{text}</button></form>'
+        return f'<a href="{href}">{text}</a>'
+
+    if head == "image_tag":
+        args = _call_args(rest)
+        literal = _string_literal(args[0]) if args else None
+        if literal is not None:
+            ctx.uses_static = True
+            return "<img src=\"{% static '" + literal + "' %}\">"
+        expr = translate_expr(args[0]) if args else None
+        return "<img src=\"{{ " + expr + ".url }}\">" if expr else _todo(code)
+
+    if head == "pluralize":
+        args = _call_args(rest)
+        count = translate_expr(args[0]) if args else None
+        word = _string_literal(args[1]) if len(args) > 1 else None
+        if count and word:
+            return "{{ " + count + " }} " + word + "{{ " + count + "|pluralize }}"
+
+    form_call = re.fullmatch(r"(\w+)\.(\w+)", head)
+    if form_call and form_call.group(1) in ctx.form_vars:
+        method = form_call.group(2)
+        field = re.match(r":(\w+)", rest.strip("( "))
+        if method == "submit":
+            return '<button type="submit">Save</button>'
+        if field and method == "label":
+            return "{{ form." + field.group(1) + ".label_tag }}"
+        if field:
+            return "{{ form." + field.group(1) + " }}"
+        return _todo(code)
+
+    expr = translate_expr(code)
+    if expr is None:
+        return _todo(code)
+    return "{{ " + expr + ("|safe" if raw else "") + " }}"
+
+
+def _escape_text(text: str) -> str:
+    """Екранує у звичайному HTML послідовності, які шаблонізатор Django сприйняв би як теги."""
+    return re.sub(
+        r"\{[{%#]",
+        lambda m: {"{{": "{% templatetag openvariable %}", "{%": "{% templatetag openblock %}",
+                   "{#": "{% templatetag opencomment %}"}[m.group()],
+        text,
+    )
+
+
+def _render_nodes(nodes: List[Dict[str, Any]], ctx: _Context, out: List[str]):
+    for node in nodes:
+        kind = node["kind"]
+        if kind == "text":
+            out.append(_escape_text(node["code"]))
+        elif kind == "output":
+            out.append(_render_output(node["code"], ctx))
+        elif kind == "raw":
+            out.append(_render_output(node["code"], ctx, raw=True))
+        elif kind == "comment":
+            text = node["code"].lstrip("=").strip()
+            if "\n" in text:
+                out.append("{% comment %}" + text + "{% endcomment %}")
+            else:
+                out.append("{# " + _escape_comment(text) + " #}")
+        elif kind == "stmt":
+            out.append(_render_stmt(node["code"]))
+        elif kind == "if":
+            _render_if(node, ctx, out)
+        elif kind == "for":
+            _render_for(node, ctx, out)
+        elif kind == "block":
+            _render_block(node, ctx, out)
+
+
+def _render_stmt(code: str) -> str:
+    m = re.fullmatch(r"content_for\(?\s*:(\w+)\s*,\s*(.+?)\)?", code, re.S)
+    if m:
+        return "{% block " + m.group(1) + " %}" + _text_or_expr(m.group(2)) + "{% endblock %}"
+    return _todo(code)
+
+
+def _render_if(node: Dict[str, Any], ctx: _Context, out: List[str]):
+    for i, (cond, children) in enumerate(node["branches"]):
+        expr = translate_expr(cond, condition=True)
+        if expr is None:
+            out.append(_todo(cond))
+            expr = "True"
+        if i == 0 and node["negate"]:
+            # unless → if ... else ...: Django не підтримує дужки в умовах
+            out.append("{% if " + expr + " %}")
+            if node["orelse"] is not None:
+                _render_nodes(node["orelse"], ctx, out)
+            out.append("{% else %}")
+            _render_nodes(children, ctx, out)
+            out.append("{% endif %}")
+            return
+        out.append("{% " + ("if " if i == 0 else "elif ") + expr + " %}")
+        _render_nodes(children, ctx, out)
+    if node["orelse"] is not None:
+        out.append("{% else %}")
+        _render_nodes(node["orelse"], ctx, out)
+    out.append("{% endif %}")
+
+
+def _render_for(node: Dict[str, Any], ctx: _Context, out: List[str]):
+    iterable = translate_expr(node["iterable"])
+    if iterable is None:
+        out.append(_todo(f"{node['iterable']}.each"))
+        iterable = "TODO"
+    out.append("{% for " + node["var"] + " in " + iterable + " %}")
+    if node["index"]:
+        out.append("{% with " + node["index"] + "=forloop.counter0 %}")
+    _render_nodes(node["children"], ctx, out)
+    if node["index"]:
+        out.append("{% endwith %}")
+    out.append("{% endfor %}")
+
+
+def _render_block(node: Dict[str, Any], ctx: _Context, out: List[str]):
+    code = node["code"]
+    head = re.match(r"\w+", code)
+    head = head.group() if head else ""
+
+    if head in ("form_with", "form_for", "form_tag"):
+        out.append('<form method="post" enctype="multipart/form-data">{% csrf_token %}')
+        ctx.form_vars.extend(node["args"])
+        _render_nodes(node["children"], ctx, out)
+        del ctx.form_vars[len(ctx.form_vars) - len(node["args"]):]
+        out.append("</form>")
+        return
+
+    if head == "link_to":
+        args = _call_args(code[len(head):])
+        out.append(f'<a href="{_url(args[0]) if args else "#"}">')
+        _render_nodes(node["children"], ctx, out)
+        out.append("</a>")
+        return
+
+    m = re.fullmatch(r"content_for\(?\s*:(\w+)\s*\)?", code)
+    if m:
+        out.append("{% block " + m.group(1) + " %}")
+        _render_nodes(node["children"], ctx, out)
+        out.append("{% endblock %}")
+        return
+
+    out.append(_todo(code + " do"))
+    _render_nodes(node["children"], ctx, out)
+
+
+# ==========================
+# PUBLIC API
+# ==========================
+@lru_cache(maxsize=2048)
+def compile_erb(source: str, view_dir: str = "") -> str:
+    """
+    Компілює ERB у шаблон Django: лексер → AST → один прохід рендерера.
+    Результат кешується за (вміст, директорія), тож партіал, який зустрічається
+    багато разів, компілюється лише один раз.
+    """
+    ctx = _Context(view_dir)
+    out: List[str] = []
+    _render_nodes(parse_erb(tokenize_erb(source))["children"], ctx, out)
+    html = "".join(out)
+    if ctx.uses_static:
+        html = "{% load static %}\n" + html
     return html
 
 
-def convert_erb_file(erb_file: str, out_dir: str):
+def convert_erb_to_django(erb_content: str, view_dir: str = "") -> str:
+    """
+    Перетворює ERB-шаблон з Rails у HTML-шаблон у стилі Django.
+    <%= expr %> → {{ expr }}, if/elsif/else/unless/each ... end → {% if %}/{% for %},
+    render → {% include %}, невідомий Ruby-код → {# TODO erb: ... #}.
+    :param view_dir: директорія шаблону відносно app/views (для відносних партіалів)
+    """
+    return compile_erb(erb_content, view_dir)
+
+
+def django_template_name(erb_name: str) -> str:
+    """show.html.erb → show.html, _form.html.erb → _form.html, index.erb → index.html"""
+    name = erb_name[:-4] if erb_name.endswith(".erb") else erb_name
+    return name if Path(name).suffix else name + ".html"
+
+
+def convert_erb_file(erb_file: str, out_dir: str, view_dir: str = ""):
     """
     Конвертує один ERB-файл у HTML-шаблон Django.
     """
     content = read_file(erb_file)
-    converted = convert_erb_to_django(content)
+    converted = convert_erb_to_django(content, view_dir)
 
-    rel_path = Path(erb_file).name.replace(".erb", ".html")
+    rel_path = django_template_name(Path(erb_file).name)
     ensure_dir(out_dir)
     write_file(Path(out_dir) / rel_path, converted)
 
     logging.debug(f"🧩 Конвертовано шаблон {erb_file} → {rel_path}")
 
 
-def batch_convert_erb(rails_views_dir: str, django_templates_dir: str):
+# ==========================
+# PARALLEL BATCH
+# ==========================
+# Менше файлів конвертуються в поточному процесі: старт пулу дорожчий за роботу
+POOL_MIN_FILES = 32
+
+
+def convert_view_job(job: Tuple[str, str, str]) -> Tuple[str, float, Optional[str]]:
+    """
+    Робоча функція пулу процесів: (src, dst, view_dir) → (src, секунди, помилка).
+    Кеш compile_erb живе в кожному процесі окремо. Помилки читання/запису не ковтаються
+    (на відміну від file_tools.read_file/write_file), а потрапляють у результат.
+    """
+    src, dst, view_dir = job
+    started = time.perf_counter()
+    try:
+        content = Path(src).read_text(encoding="utf-8")
+        write_files_atomic({Path(dst): convert_erb_to_django(content, view_dir)})
+        return src, time.perf_counter() - started, None
+    except Exception as e:
+        return src, time.perf_counter() - started, str(e)
+
+
+def convert_views_parallel(jobs: List[Tuple[str, str, str]], max_workers: Optional[int] = None):
+    """
+    Конвертує шаблони у пулі процесів розміром os.cpu_count().
+    :return: список (src, секунди, помилка) у порядку jobs
+    """
+    workers = max_workers or os.cpu_count() or 1
+    if len(jobs) < POOL_MIN_FILES or workers == 1:
+        return [convert_view_job(job) for job in jobs]
+    chunksize = max(1, len(jobs) // (workers * 4))
+    # fork з процесу, де вже працюють потоки (asyncio.to_thread, логування), може взяти чужі блокування
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method)) as pool:
+        return list(pool.map(convert_view_job, jobs, chunksize=chunksize))
+
+
+def timing_summary(results, top: int = 5) -> str:
+    """Підсумок часу конвертації по файлах: загалом, середнє, найповільніші."""
+    if not results:
+        return "🎨 Немає шаблонів для конвертації."
+    total = sum(seconds for _, seconds, _ in results)
+    lines = [f"🎨 {len(results)} templates, {total:.3f}s CPU, {1000 * total / len(results):.2f}ms avg"]
+    for src, seconds, error in sorted(results, key=lambda r: -r[1])[:top]:
+        lines.append(f"  {1000 * seconds:8.2f}ms  {src}{'  ❌ ' + error if error else ''}")
+    return "\n".join(lines)
+
+
+def batch_convert_erb(rails_views_dir: str, django_templates_dir: str, max_workers: Optional[int] = None):
     """
     Рекурсивно конвертує всі Rails-шаблони (ERB) у Django-шаблони.
     """
-    erb_files = list_files(rails_views_dir, [".erb", ".html.erb"])
+    erb_files = list_files(rails_views_dir, [".erb"])
     logging.info(f"🎨 Знайдено {len(erb_files)} ERB шаблонів для конвертації...")
 
+    jobs = []
     for erb_file in erb_files:
         relative = Path(erb_file).relative_to(rails_views_dir)
-        out_path = Path(django_templates_dir) / relative.parent
-        ensure_dir(out_path)
-        convert_erb_file(erb_file, str(out_path))
+        out_path = Path(django_templates_dir) / relative.parent / django_template_name(relative.name)
+        jobs.append((erb_file, str(out_path), relative.parent.as_posix().strip(".")))
 
+    results = convert_views_parallel(jobs, max_workers)
+    logging.info(timing_summary(results))
     logging.info(f"✅ Усі шаблони конвертовано у {django_templates_dir}")
+    return results
@@ -0,0 +1,172 @@
+import os
+import gzip
+import json
+import queue
+import shutil
+import hashlib
+import logging
+import logging.handlers
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+TRACE_LOGGER = "rails2django.trace"
+
+# Рядки/об'єкти, більші за цей розмір, замінюються хешем при повторі
+INLINE_BYTES = 2048
+
+
+def _gzip_rotator(source: str, dest: str):
+    with open(source, "rb") as src, gzip.open(dest, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+
+class GzipRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler, який стискає ротовані файли (run_x.log.1.gz, ...)."""
+
+    def __init__(self, filename: str, max_bytes: int, backup_count: int, compress: bool = True):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True)
+        if compress:
+            self.namer = lambda name: name + ".gz"
+            self.rotator = _gzip_rotator
+
+
+class TraceFormatter(logging.Formatter):
+    """
+    Серіалізує структурований запис трасування в один рядок JSONL.
+    Виконується у фоновому потоці QueueListener, тож json.dumps великих
+    payload-ів не блокує пайплайн.
+
+    - великі значення (> INLINE_BYTES) записуються з sha256, а повтори того самого
+      вмісту (незмінні поля стану між вузлами, однакові промпти) — лише посиланням {"$ref": hash};
+    - кожне поле обрізається до max_field_bytes, а весь запис — до max_record_bytes.
+    """
+
+    def __init__(self, max_field_bytes: int = 64 * 1024, max_record_bytes: int = 256 * 1024):
+        super().__init__()
+        self.max_field_bytes = max_field_bytes
+        self.max_record_bytes = max_record_bytes
+        self._seen = set()
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = record.msg if isinstance(record.msg, dict) else {"message": record.getMessage()}
+        entry = {"ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds")}
+        for key, value in data.items():
+            entry[key] = self._compact(value, nested=True)
+
+        line = json.dumps(entry, ensure_ascii=False, default=str)
+        while len(line.encode("utf-8")) > self.max_record_bytes:
+            sized = [(len(json.dumps(v, ensure_ascii=False, default=str)), k) for k, v in entry.items() if k != "ts"]
+            size, key = max(sized)
+            if size < 64:
+                break
+            entry[key] = {"$dropped": True, "bytes": size}
+            line = json.dumps(entry, ensure_ascii=False, default=str)
+        return line
+
+    def _compact(self, value: Any, nested: bool = False) -> Any:
+        if value is None or isinstance(value, (bool, int, float)):
+            return value
+        text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, default=str)
+        size = len(text.encode("utf-8"))
+        if size <= INLINE_BYTES:
+            return value
+
+        # великий словник (напр. стан) — дедуплікуємо по полях
+        if nested and isinstance(value, dict):
+            return {k: self._compact(v) for k, v in value.items()}
+
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+        if digest in self._seen:
+            return {"$ref": digest, "bytes": size}
+        self._seen.add(digest)
+        entry = {"$hash": digest, "bytes": size, "text": text[:self.max_field_bytes]}
+        if size > self.max_field_bytes:
+            entry["truncated"] = True
+        return entry
+
+
+class _PassThroughQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler, що не форматує запис у потоці виклику:
+    повідомлення й аргументи обробляються вже у QueueListener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.exc_text = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def start_logging(log_path: str, trace_path: str, max_bytes: int = 50 * 1024 * 1024,
+                  backup_count: int = 5, compress: bool = True):
+    """
+    Під'єднує до root-логера і логера трасування QueueHandler, а запис у консоль,
+    текстовий лог і JSONL-трасу виконує один фоновий QueueListener.
+    """
+    global _listener
+    stop_logging()
+
+    text_formatter = logging.Formatter("%(asctime)s [%(levelname)s] %(message)s")
+    console = logging.StreamHandler()
+    console.setFormatter(text_formatter)
+    text_file = GzipRotatingFileHandler(log_path, max_bytes, backup_count, compress)
+    text_file.setFormatter(text_formatter)
+    trace_file = GzipRotatingFileHandler(trace_path, max_bytes, backup_count, compress)
+    trace_file.setFormatter(TraceFormatter())
+
+    # трасу пишемо лише у JSONL, решту — у консоль і текстовий лог
+    console.addFilter(lambda r: r.name != TRACE_LOGGER)
+    text_file.addFilter(lambda r: r.name != TRACE_LOGGER)
+    trace_file.addFilter(lambda r: r.name == TRACE_LOGGER)
+
+    log_queue: "queue.SimpleQueue" = queue.SimpleQueue()
+    handler = _PassThroughQueueHandler(log_queue)
+
+    root = logging.getLogger()
+    for h in list(root.handlers):
+        root.removeHandler(h)
+    root.setLevel(logging.DEBUG)
+    root.addHandler(handler)
+
+    tracer = logging.getLogger(TRACE_LOGGER)
+    tracer.handlers = [handler]
+    tracer.setLevel(logging.DEBUG)
+    tracer.propagate = False
+
+    _listener = logging.handlers.QueueListener(
+        log_queue, console, text_file, trace_file, respect_handler_level=True
+    )
+    _listener.start()
+
+
+def stop_logging():
+    """Дочікується запису всіх повідомлень з черги і зупиняє фоновий потік."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def tracing_enabled() -> bool:
+    return bool(logging.getLogger(TRACE_LOGGER).handlers)
+
+
+def trace(event: str, **fields: Any):
+    """
+    Структурований запис у JSONL-трасу. Серіалізація відкладається у фоновий потік,
+    тож значення мають не змінюватися після виклику (передавайте знімки).
+    Якщо трасування не налаштовано — нічого не робить.
+    """
+    if not tracing_enabled():
+        return
+    record: Dict[str, Any] = {"event": event}
+    record.update(fields)
+    logging.getLogger(TRACE_LOGGER).debug(record)
@@ -0,0 +1,126 @@
+import sys
+import json
+import queue
+import atexit
+import logging
+import itertools
+import threading
+import contextvars
+import subprocess
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+class DjangoValidator:
+    """
+    Клієнт теплого процесу agent.tools.validator_worker.
+    Процес стартує при першому запиті й живе до кінця роботи (Django імпортується один раз);
+    запити серіалізуються, тож один валідатор можна ділити між вузлами і проєктами.
+    Відповідь чекається не довше timeout секунд: завислий воркер (наприклад, згенерований
+    код зациклився при імпорті) вбивається, а валідація вважається невдалою.
+    """
+
+    def __init__(self, python: str = sys.executable, timeout: float = 120.0):
+        self.python = python
+        self.timeout = timeout
+        self._process: Optional[subprocess.Popen] = None
+        self._lines: Optional[queue.Queue] = None
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def _start(self):
+        logging.info("🩺 Starting Django validator worker...")
+        self._process = subprocess.Popen(
+            [self.python, "-m", "agent.tools.validator_worker"],
+            cwd=str(REPO_ROOT),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            bufsize=1,
+        )
+        # читання — в окремому потоці, щоб чекати відповідь з таймаутом (select на пайпах не всюди є)
+        self._lines = queue.Queue()
+        threading.Thread(target=self._read_lines, args=(self._process.stdout, self._lines), daemon=True).start()
+
+    @staticmethod
+    def _read_lines(stdout, lines: queue.Queue):
+        for line in stdout:
+            lines.put(line)
+        lines.put("")  # EOF — воркер завершився
+
+    def _kill(self):
+        if self._process and self._process.poll() is None:
+            self._process.kill()
+            self._process.wait()
+        self._process = None
+
+    def warm_up(self):
+        """Стартує воркер заздалегідь: імпорт Django перекривається з LLM-етапами пайплайну."""
+        with self._lock:
+            if self._process is None or self._process.poll() is not None:
+                self._start()
+
+    def validate(self, project_dir: str, apps: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        system checks + makemigrations --dry-run для проєкту (або лише apps).
+        :return: {"ok", "errors": [...], "warnings": [...], "migrations": {app: [операції]}, "duration"}
+        """
+        request = {"project_dir": str(Path(project_dir).resolve()), "apps": list(apps) if apps else None}
+        with self._lock:
+            for attempt in range(2):  # впалий воркер перезапускається один раз
+                if self._process is None or self._process.poll() is not None:
+                    self._start()
+                request["id"] = next(self._ids)
+                try:
+                    self._process.stdin.write(json.dumps(request) + "\n")
+                    self._process.stdin.flush()
+                    line = self._lines.get(timeout=self.timeout)
+                except (BrokenPipeError, OSError):
+                    line = ""
+                except queue.Empty:
+                    logging.error(f"❌ Validator worker did not answer in {self.timeout:.0f}s — killing it.")
+                    self._kill()  # наступний запит стартує новий воркер
+                    return _failed(f"validation timed out after {self.timeout:.0f}s")
+                if line:
+                    return json.loads(line)
+                logging.warning(f"⚠️ Validator worker exited (code {self._process.poll()}), restarting...")
+                self._process = None
+        return _failed("validator worker crashed twice")
+
+    def close(self):
+        with self._lock:
+            if self._process and self._process.poll() is None:
+                self._process.stdin.close()
+                try:
+                    self._process.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    self._process.kill()
+            self._process = None
+
+
+def _failed(message: str) -> Dict[str, Any]:
+    return {"ok": False, "errors": [{"kind": "worker", "level": "error", "message": message}],
+            "warnings": [], "migrations": {}}
+
+
+# Валідатор поза запуском; кожен запуск пайплайна має власний (start_validator) —
+# проєкти пакетного режиму не стоять у черзі до одного воркера і не перезавантажують його один одному
+VALIDATOR = DjangoValidator()
+atexit.register(VALIDATOR.close)
+_run_validator: contextvars.ContextVar[Optional[DjangoValidator]] = contextvars.ContextVar(
+    "run_validator", default=None)
+
+
+def start_validator() -> DjangoValidator:
+    """Окремий валідатор (і воркер) для запуску; закривати — викликачу."""
+    validator = DjangoValidator()
+    _run_validator.set(validator)
+    return validator
+
+
+def current_validator() -> DjangoValidator:
+    """Валідатор поточного запуску (start_validator), інакше — VALIDATOR."""
+    return _run_validator.get() or VALIDATOR
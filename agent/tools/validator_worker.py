@@ -0,0 +1,253 @@
+"""
+Довгоживучий процес-валідатор згенерованих Django-проєктів.
+Django імпортується один раз; на кожен запит перезавантажуються лише змінені модулі проєкту,
+після чого запускаються system checks і dry-run makemigrations (через MigrationAutodetector).
+
+Протокол — JSON-рядки через stdin/stdout:
+    → {"id": 1, "project_dir": "/out", "apps": ["blog"]}          (apps — необов'язково)
+    ← {"id": 1, "ok": false, "errors": [...], "warnings": [...], "migrations": {...},
+       "reloaded": [...], "duration": 0.012}
+
+    python -m agent.tools.validator_worker
+"""
+import os
+import sys
+import json
+import time
+import warnings
+import traceback
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import django
+from django.apps import apps as registry
+from django.conf import settings, ENVIRONMENT_VARIABLE
+from django.core import checks
+from django.urls import clear_url_caches
+from django.utils.functional import empty
+
+# stdout належить протоколу; все, що друкує Django чи згенерований код, іде в stderr
+_PROTOCOL = sys.stdout
+sys.stdout = sys.stderr
+
+
+class ProjectSession:
+    """Стан одного проєкту в процесі: sys.path, відбитки файлів і пакет проєкту в sys.modules."""
+
+    def __init__(self, project_dir: Path):
+        self.project_dir = project_dir
+        self.package = self._settings_package(project_dir)
+        self.fingerprints: Dict[Path, tuple] = {}
+        self.dirty = True
+
+    @staticmethod
+    def _settings_package(project_dir: Path) -> str:
+        for settings_file in sorted(project_dir.glob("*/settings.py")):
+            return settings_file.parent.name
+        raise FileNotFoundError(f"settings.py not found under {project_dir}")
+
+    def scan(self) -> Dict[Path, tuple]:
+        fingerprints = {}
+        for path in (self.project_dir / self.package).rglob("*.py"):
+            stat = path.stat()
+            fingerprints[path] = (stat.st_mtime_ns, stat.st_size)
+        return fingerprints
+
+    def module_name(self, path: Path) -> str:
+        parts = list(path.relative_to(self.project_dir).with_suffix("").parts)
+        if parts[-1] == "__init__":
+            parts.pop()
+        return ".".join(parts)
+
+
+_session: Optional[ProjectSession] = None
+_BUILTIN_LABELS: set = set()
+
+CONTRIB_APPS = [
+    "django.contrib.admin",
+    "django.contrib.auth",
+    "django.contrib.contenttypes",
+    "django.contrib.sessions",
+    "django.contrib.messages",
+    "django.contrib.staticfiles",
+]
+
+
+def _purge_modules(prefix: str, only: Optional[set] = None) -> List[str]:
+    names = [n for n in sys.modules if n == prefix or n.startswith(prefix + ".")]
+    if only is not None:
+        names = [n for n in names if n in only]
+    for name in names:
+        del sys.modules[name]
+    return names
+
+
+def _app_label_of(session: ProjectSession, module: str) -> Optional[str]:
+    parts = module.split(".")
+    return parts[1] if len(parts) > 1 and parts[0] == session.package else None
+
+
+def _reset_registry():
+    """Повертає реєстр apps у стан «до populate», зберігаючи моделі незмінених apps."""
+    registry.app_configs = {}
+    registry.apps_ready = registry.models_ready = registry.ready = False
+    registry.loading = False
+    registry.ready_event.clear()
+    registry.clear_cache()
+    clear_url_caches()
+
+
+def _load(project_dir: Path) -> List[str]:
+    """
+    Готує процес до перевірки project_dir; повертає перезавантажені модулі.
+    Гранулярність — app: якщо змінився будь-який її файл, пакет app імпортується заново.
+    Зміна будь-якого models.py перезавантажує весь пакет проєкту (Django лишається імпортованим).
+    Кореневий urls.py тримає посилання на urls/views apps, тому перезавантажується завжди.
+    """
+    global _session
+    if _session is None or _session.project_dir != project_dir:
+        if _session is not None:
+            _purge_modules(_session.package)
+            sys.path.remove(str(_session.project_dir))
+        _session = ProjectSession(project_dir)
+        sys.path.insert(0, str(project_dir))
+
+    session = _session
+    fingerprints = session.scan()
+    if session.dirty:
+        changed_labels = None
+        reloaded = _purge_modules(session.package)
+    else:
+        changed = {p for p, f in fingerprints.items() if session.fingerprints.get(p) != f}
+        changed |= set(session.fingerprints) - set(fingerprints)
+        modules = {session.module_name(p) for p in changed}
+        # файли у підпакетах — це apps; settings/urls/wsgi лежать у корені пакета
+        changed_labels = {p.relative_to(session.project_dir / session.package).parts[0]
+                          for p in changed if len(p.relative_to(session.project_dir / session.package).parts) > 1}
+        if any(p.name == "models.py" for p in changed):
+            # зв'язки інших apps тримають посилання на старі класи моделей — лише повне перезавантаження
+            changed_labels = None
+            reloaded = _purge_modules(session.package)
+        else:
+            reloaded = _purge_modules(session.package, modules | {f"{session.package}.urls"})
+            for label in changed_labels:
+                reloaded += _purge_modules(f"{session.package}.{label}")
+    session.fingerprints = fingerprints
+
+    # моделі змінених apps реєструються заново при повторному імпорті models.py
+    for label in list(registry.all_models):
+        if label not in _BUILTIN_LABELS and (changed_labels is None or label in changed_labels):
+            del registry.all_models[label]
+    if changed_labels is None:
+        registry._pending_operations.clear()  # lazy-зв'язки видалених моделей
+
+    settings_module = f"{session.package}.settings"
+    if changed_labels is None or settings_module in reloaded:
+        os.environ[ENVIRONMENT_VARIABLE] = settings_module
+        settings._wrapped = empty
+
+    _reset_registry()
+    session.dirty = True  # знімається лише після успішного populate
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # "Model ... was already registered"
+        registry.populate(settings.INSTALLED_APPS)
+    session.dirty = False
+    return sorted(set(reloaded))
+
+
+def _check_messages(app_configs) -> List[Dict[str, Any]]:
+    messages = []
+    for message in checks.run_checks(app_configs=app_configs, include_deployment_checks=False):
+        obj = message.obj
+        messages.append({
+            "kind": "check",
+            "id": message.id,
+            "level": "error" if message.is_serious() else "warning",
+            "app": getattr(getattr(obj, "_meta", None), "app_label", None),
+            "object": str(obj) if obj is not None else None,
+            "message": message.msg,
+            "hint": message.hint,
+        })
+    return messages
+
+
+def _migration_changes(labels: List[str]) -> Dict[str, List[str]]:
+    """makemigrations --dry-run: операції, які Django згенерував би для кожної app."""
+    from django.db.migrations.autodetector import MigrationAutodetector
+    from django.db.migrations.loader import MigrationLoader
+    from django.db.migrations.questioner import NonInteractiveMigrationQuestioner
+    from django.db.migrations.state import ProjectState
+
+    loader = MigrationLoader(None, ignore_no_migrations=True)
+    autodetector = MigrationAutodetector(
+        loader.project_state(),
+        ProjectState.from_apps(registry),
+        NonInteractiveMigrationQuestioner(specified_apps=set(labels), dry_run=True),
+    )
+    # apps без migrations/ — «real apps» лоадера; convert_apps робить їх кандидатами на 0001_initial
+    changes = autodetector.changes(graph=loader.graph, trim_to_apps=set(labels), convert_apps=set(labels))
+    return {
+        label: [op.describe() for migration in migrations for op in migration.operations]
+        for label, migrations in changes.items()
+    }
+
+
+def _error_location(exc: BaseException) -> Dict[str, Any]:
+    frames = traceback.extract_tb(exc.__traceback__)
+    if isinstance(exc, SyntaxError) and exc.filename:
+        return {"file": exc.filename, "line": exc.lineno}
+    for frame in reversed(frames):
+        if _session and frame.filename.startswith(str(_session.project_dir)):
+            return {"file": frame.filename, "line": frame.lineno}
+    return {}
+
+
+def validate(request: Dict[str, Any]) -> Dict[str, Any]:
+    started = time.perf_counter()
+    project_dir = Path(request["project_dir"]).resolve()
+    response: Dict[str, Any] = {"id": request.get("id"), "errors": [], "warnings": [], "migrations": {}}
+    try:
+        response["reloaded"] = _load(project_dir)
+        project_labels = [c.label for c in registry.get_app_configs()
+                          if c.name.startswith(_session.package + ".")]
+        labels = [l for l in project_labels if l in request["apps"]] if request.get("apps") else project_labels
+        # checks усього проєкту (URLconf, шаблони) лише коли перевіряється весь проєкт
+        app_configs = [registry.get_app_config(l) for l in labels] if request.get("apps") else None
+        for message in _check_messages(app_configs):
+            response["errors" if message["level"] == "error" else "warnings"].append(message)
+        response["migrations"] = _migration_changes(labels)
+    except Exception as e:
+        location = _error_location(e)
+        app = _app_label_of(_session, _session.module_name(Path(location["file"]))) \
+            if _session and location.get("file", "").startswith(str(_session.project_dir)) else None
+        response["errors"].append({
+            "kind": "import", "id": type(e).__name__, "level": "error", "app": app,
+            "message": str(e), **location,
+        })
+    response["ok"] = not response["errors"]
+    response["duration"] = round(time.perf_counter() - started, 4)
+    return response
+
+
+def main():
+    global _BUILTIN_LABELS
+    # Django і contrib-apps імпортуються один раз — саме це робить процес «теплим»
+    settings.configure(INSTALLED_APPS=CONTRIB_APPS)
+    django.setup()
+    _BUILTIN_LABELS = set(registry.all_models)
+    settings._wrapped = empty
+    _reset_registry()
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            response = validate(json.loads(line))
+        except Exception as e:  # зламаний запит не повинен вбивати воркер
+            response = {"ok": False, "errors": [{"kind": "protocol", "level": "error", "message": str(e)}]}
+        _PROTOCOL.write(json.dumps(response, default=str) + "\n")
+        _PROTOCOL.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Локальний OpenAI-сумісний сервер (POST /v1/chat/completions) для офлайн-бенчмарків.
+Підтримує stream=true (SSE), налаштовувану затримку і повертає згенеровані
+за змістом промпта JSON-плани для LLMConverterNode. Кеш префіксів імітується:
+повторне system-повідомлення повертається в usage як prompt_tokens_details.cached_tokens.
+
+    python -m benchmarks.fake_openai_server --port 8765 --latency 0.2
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=fake python main.py ...
+"""
+import re
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from agent.tools.plan_utils import underscore, pluralize, singularize, camelize
+
+CONVERTER_MARKER = "Django 5.x application plan"
+PLANNER_MARKER = "orchestration planner"
+CANNED_STEPS = {"steps": [{"tool": "parse_rails_project", "args": {}}, {"tool": "build_django_project", "args": {}},
+                          {"tool": "convert_templates", "args": {}}]}
+
+
+def _payload_models(prompt: str) -> list:
+    """Назви моделей з JSON-представлення rails_structure, вбудованого у промпт."""
+    start = prompt.find('{"models"')
+    if start == -1:
+        return []
+    try:
+        structure, _ = json.JSONDecoder().raw_decode(prompt, start)
+    except json.JSONDecodeError:
+        return []
+    return [m["name"] for m in structure.get("models", []) if isinstance(m, dict) and m.get("name")]
+
+
+def canned_plan(prompt: str) -> dict:
+    """План з одним app на модель (або на app, заданий у chunked-промпті)."""
+    forced = re.search(r'single Django app named "(\w+)"', prompt)
+    models = _payload_models(prompt)
+    apps = {}
+    if not models:
+        models = [camelize(singularize(forced.group(1)))] if forced else ["Page"]
+    for model in models:
+        name = forced.group(1) if forced else pluralize(underscore(model))
+        app = apps.setdefault(name, {"name": name, "models": [], "views": [], "urls": [], "templates": []})
+        app["models"].append({"name": model, "fields": {"title": "CharField"}})
+        app["views"].append({"name": f"{model}ListView", "type": "ListView", "model": model,
+                             "template": f"{name}/{underscore(model)}_list.html"})
+        app["urls"].append({"pattern": f"{underscore(model)}/", "view": f"{model}ListView"})
+        app["templates"].append({"name": f"{name}/{underscore(model)}_list.html"})
+    # фрагменти скафолдів (фільтри, finder) — порожні mixin-и; конвертер сам переносить їх у app скафолда
+    mixins = [{"name": name, "code": f"class {name}:\n    pass\n"}
+              for name in dict.fromkeys(re.findall(r'"mixin":\s*"(\w+)"', prompt))]
+    if mixins:
+        next(iter(apps.values()))["mixins"] = mixins
+    return {"apps": list(apps.values())}
+
+
+_seen_prefixes = set()
+_prefix_lock = threading.Lock()
+
+
+def cached_tokens_for(messages: list) -> int:
+    """Токени system-повідомлення, якщо такий самий префікс уже надходив (як кеш префіксів провайдера)."""
+    if not messages or messages[0].get("role") != "system":
+        return 0
+    prefix = str(messages[0].get("content", ""))
+    with _prefix_lock:
+        seen = prefix in _seen_prefixes
+        _seen_prefixes.add(prefix)
+    return len(prefix) // 4 if seen else 0
+
+
+def reply_for(messages: list) -> str:
+    prompt = "\n".join(str(m.get("content", "")) for m in messages)
+    if CONVERTER_MARKER in prompt:
+        return json.dumps(canned_plan(prompt))
+    if PLANNER_MARKER in prompt:
+        return json.dumps(CANNED_STEPS)
+    if "requirements" in prompt.lower():
+        return "Django>=5.0\n"
+    return "# Synthetic response\n\nGenerated by the fake OpenAI server."
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    server_version = "FakeOpenAI/1.0"
+    latency = 0.0
+    tokens_per_second = 0.0
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        content = reply_for(body.get("messages", []))
+        model = body.get("model", "fake")
+        prompt_tokens = sum(len(str(m.get("content", ""))) for m in body.get("messages", [])) // 4
+        completion_tokens = max(1, len(content) // 4)
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                 "total_tokens": prompt_tokens + completion_tokens,
+                 "prompt_tokens_details": {"cached_tokens": cached_tokens_for(body.get("messages", []))}}
+
+        time.sleep(self.latency)
+        if body.get("stream"):
+            include_usage = (body.get("stream_options") or {}).get("include_usage")
+            self._stream(content, model, usage if include_usage else None)
+            return
+
+        data = json.dumps({
+            "id": "chatcmpl-fake", "object": "chat.completion", "created": int(time.time()), "model": model,
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": usage,
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, content: str, model: str, usage: dict = None):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        step = 64
+        delay = (step / 4) / self.tokens_per_second if self.tokens_per_second else 0.0
+        for i in range(0, len(content), step):
+            chunk = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()),
+                     "model": model, "choices": [{"index": 0, "delta": {"content": content[i:i + step]},
+                                                  "finish_reason": None}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            if delay:
+                time.sleep(delay)
+        chunk = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()),
+                 "model": model, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+        self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+        if usage:
+            chunk = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()),
+                     "model": model, "choices": [], "usage": usage}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def start_fake_server(port: int = 0, latency: float = 0.0, tokens_per_second: float = 0.0):
+    """Запускає сервер у фоновому потоці. :return: (server, base_url для OPENAI_BASE_URL)"""
+    handler = type("Handler", (FakeOpenAIHandler,), {"latency": latency, "tokens_per_second": tokens_per_second})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="Затримка перед відповіддю, с")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Швидкість стріму (0 — без затримки)")
+    args = parser.parse_args()
+    server, url = start_fake_server(args.port, args.latency, args.tokens_per_second)
+    print(f"Fake OpenAI server → {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Офлайн end-to-end бенчмарк run_conversion_pipeline на синтетичних Rails-проєктах.
+Для кожного розміру: генерує проєкт, запускає пайплайн проти локального фейкового
+OpenAI-сервера і звітує час кожного етапу та пікову пам'ять (tracemalloc).
+
+    python -m benchmarks.run_benchmarks --sizes 10 100 1000 --latency 0.05 --json bench.json
+"""
+import os
+import json
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import tracemalloc
+from pathlib import Path
+from benchmarks.synthetic_rails import generate_rails_app
+from benchmarks.fake_openai_server import start_fake_server
+
+STAGES = ["parser", "planner", "discovery", "converter", "builder", "templates", "validator", "readme", "requirements"]
+
+
+def run_one(n_models: int, workdir: Path, convert_mode: str, workers: int, stream: bool, memory: bool) -> dict:
+    from agent.graph import run_conversion_pipeline
+
+    rails_dir = workdir / f"rails_{n_models}"
+    out_dir = workdir / f"django_{n_models}"
+    started = time.perf_counter()
+    generate_rails_app(str(rails_dir), n_models)
+    generate_seconds = time.perf_counter() - started
+
+    if memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    result = run_conversion_pipeline(
+        str(rails_dir), str(out_dir),
+        use_cache=False, incremental=False,
+        convert_mode=convert_mode, max_workers=workers, stream_plan=stream,
+        checkpoint_db=str(workdir / "checkpoints.sqlite"),
+    )
+    wall = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1] if memory else 0
+    if memory:
+        tracemalloc.stop()
+
+    timings = result.get("node_timings", {})
+    return {
+        "models": n_models,
+        "mode": convert_mode,
+        "generate_s": round(generate_seconds, 3),
+        "wall_s": round(wall, 3),
+        "peak_mb": round(peak / 2 ** 20, 1),
+        "stages": {name: round(timings[name]["duration"], 3) for name in STAGES if name in timings},
+    }
+
+
+def format_table(results: list) -> str:
+    header = f"{'models':>7} {'mode':<8}{'wall s':>8}{'peak MB':>9}" + "".join(f"{s[:9]:>10}" for s in STAGES)
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(
+            f"{r['models']:>7} {r['mode']:<8}{r['wall_s']:>8.2f}{r['peak_mb']:>9.1f}"
+            + "".join(f"{r['stages'].get(s, 0.0):>10.3f}" for s in STAGES)
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--convert-mode", choices=["single", "chunked"], default="single")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--stream", action="store_true")
+    parser.add_argument("--latency", type=float, default=0.05, help="Затримка фейкового LLM, с")
+    parser.add_argument("--no-memory", action="store_true", help="Без tracemalloc (швидше, без піку пам'яті)")
+    parser.add_argument("--keep", action="store_true", help="Не видаляти згенеровані проєкти")
+    parser.add_argument("--json", help="Записати результати у JSON-файл")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format="%(message)s")
+
+    server, base_url = start_fake_server(latency=args.latency)
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ.setdefault("OPENAI_API_KEY", "fake-key")
+
+    workdir = Path(tempfile.mkdtemp(prefix="r2d_bench_"))
+    results = []
+    try:
+        for n in args.sizes:
+            result = run_one(n, workdir, args.convert_mode, args.workers, args.stream, not args.no_memory)
+            results.append(result)
+            print(f"✅ {n} models: {result['wall_s']:.2f}s, peak {result['peak_mb']} MB", flush=True)
+    finally:
+        server.shutdown()
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print(format_table(results))
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+Генератор синтетичних Rails-проєктів заданого розміру для бенчмарків.
+
+Кожна модель itemN має belongs_to на попередню модель (ланцюжок асоціацій),
+CRUD-контролер, resources-маршрут, п'ять ERB-шаблонів і таблицю в db/schema.rb
+з індексами та зовнішнім ключем. Лише кожен третій контролер — стоковий scaffold
+(його конвертує scaffold_detector без LLM); решта мають фільтр авторизації або
+змінений index і йдуть у LLM, як у реальних проєктах.
+
+    python -m benchmarks.synthetic_rails --models 100 --output /tmp/rails_100
+"""
+import argparse
+from pathlib import Path
+
+
+def _write(path: Path, content: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding="utf-8")
+
+
+def _names(i: int):
+    singular = f"item{i}"
+    return singular, f"{singular}s", f"Item{i}"
+
+
+def _model(i: int) -> str:
+    singular, plural, klass = _names(i)
+    lines = [f"class {klass} < ApplicationRecord"]
+    if i > 0:
+        lines.append(f"  belongs_to :{_names(i - 1)[0]}")
+    lines.append(f"  has_many :{_names(i + 1)[1]}, dependent: :destroy")
+    lines.append("  validates :title, presence: true")
+    lines.append("end")
+    return "\n".join(lines) + "\n"
+
+
+def _controller(i: int) -> str:
+    singular, plural, klass = _names(i)
+    # i % 3: 0 — стоковий scaffold, 1 — авторизація, 2 — змінений index
+    auth = "\n  before_action :authenticate_user!, except: %i[ index show ]" if i % 3 == 1 else ""
+    scope = ".where(published: true).order(:position)" if i % 3 == 2 else ".all"
+    return f"""class {klass}sController < ApplicationController
+  before_action :set_{singular}, only: %i[ show edit update destroy ]{auth}
+
+  def index
+    @{plural} = {klass}{scope}
+  end
+
+  def show
+  end
+
+  def new
+    @{singular} = {klass}.new
+  end
+
+  def edit
+  end
+
+  def create
+    @{singular} = {klass}.new({singular}_params)
+    if @{singular}.save
+      redirect_to @{singular}, notice: "{klass} was successfully created."
+    else
+      render :new, status: :unprocessable_entity
+    end
+  end
+
+  def update
+    if @{singular}.update({singular}_params)
+      redirect_to @{singular}, notice: "{klass} was successfully updated."
+    else
+      render :edit, status: :unprocessable_entity
+    end
+  end
+
+  def destroy
+    @{singular}.destroy!
+    redirect_to {plural}_path, notice: "{klass} was successfully destroyed."
+  end
+
+  private
+
+  def set_{singular}
+    @{singular} = {klass}.find(params.expect(:id))
+  end
+
+  def {singular}_params
+    params.expect({singular}: [ :title, :body, :position, :price, :published ])
+  end
+end
+"""
+
+
+def _views(i: int) -> dict:
+    singular, plural, klass = _names(i)
+    return {
+        "index.html.erb": f"""<% content_for :title, "{klass}s" %>
+<h1>{klass}s</h1>
+<div id="{plural}">
+  <% @{plural}.each do |{singular}| %>
+    <%= render {singular} %>
+    <p><%= link_to "Show", {singular} %></p>
+  <% end %>
+</div>
+<%= link_to "New {singular}", new_{singular}_path %>
+""",
+        "show.html.erb": f"""<% content_for :title, @{singular}.title %>
+<%= render @{singular} %>
+<% if @{singular}.published %>
+  <span class="badge">published</span>
+<% else %>
+  <span class="badge">draft</span>
+<% end %>
+<%= link_to "Edit", edit_{singular}_path(@{singular}) %>
+<%= link_to "Back", {plural}_path %>
+""",
+        f"_{singular}.html.erb": f"""<div id="<%= dom_id {singular} %>">
+  <p><strong>Title:</strong> <%= {singular}.title %></p>
+  <p><strong>Body:</strong> <%= {singular}.body %></p>
+  <p><strong>Price:</strong> <%= {singular}.price %></p>
+</div>
+""",
+        "_form.html.erb": f"""<%= form_with(model: {singular}) do |form| %>
+  <% if {singular}.errors.any? %>
+    <ul>
+      <% {singular}.errors.each do |error| %>
+        <li><%= error.full_message %></li>
+      <% end %>
+    </ul>
+  <% end %>
+  <div><%= form.label :title %><%= form.text_field :title %></div>
+  <div><%= form.label :body %><%= form.textarea :body %></div>
+  <div><%= form.label :price %><%= form.number_field :price %></div>
+  <div><%= form.submit %></div>
+<% end %>
+""",
+        "new.html.erb": f"""<h1>New {singular}</h1>
+<%= render "form", {singular}: @{singular} %>
+""",
+        "edit.html.erb": f"""<h1>Editing {singular}</h1>
+<%= render "form", {singular}: @{singular} %>
+""",
+    }
+
+
+def _schema(n: int) -> str:
+    lines = ['ActiveRecord::Schema[8.0].define(version: 2025_01_01_000000) do']
+    for i in range(n):
+        singular, plural, _ = _names(i)
+        lines.append(f'  create_table "{plural}", force: :cascade do |t|')
+        lines.append('    t.string "title", null: false')
+        lines.append('    t.text "body"')
+        lines.append('    t.integer "position", default: 0')
+        lines.append('    t.decimal "price", precision: 10, scale: 2')
+        lines.append('    t.boolean "published", default: false, null: false')
+        if i > 0:
+            parent = _names(i - 1)[0]
+            lines.append(f'    t.bigint "{parent}_id", null: false')
+            lines.append(f'    t.index ["{parent}_id"], name: "index_{plural}_on_{parent}_id"')
+        lines.append('    t.datetime "created_at", null: false')
+        lines.append('    t.datetime "updated_at", null: false')
+        lines.append(f'    t.index ["title", "position"], name: "index_{plural}_on_title_and_position", unique: true')
+        lines.append("  end")
+        lines.append("")
+    for i in range(1, n):
+        lines.append(f'  add_foreign_key "{_names(i)[1]}", "{_names(i - 1)[1]}"')
+    lines.append("end")
+    return "\n".join(lines) + "\n"
+
+
+def generate_rails_app(root: str, n_models: int) -> Path:
+    """Створює синтетичний Rails-проєкт з n_models моделями у root."""
+    root = Path(root)
+    _write(root / "app/models/application_record.rb",
+           "class ApplicationRecord < ActiveRecord::Base\n  primary_abstract_class\nend\n")
+    _write(root / "app/controllers/application_controller.rb", """class ApplicationController < ActionController::Base
+  private
+
+  def authenticate_user!
+    redirect_to root_path, alert: "Please sign in." unless session[:user_id]
+  end
+end
+""")
+    _write(root / "app/views/layouts/application.html.erb", """<!DOCTYPE html>
+<html>
+  <head>
+    <title><%= content_for(:title) || "Synthetic" %></title>
+    <%= csrf_meta_tags %>
+    <%= stylesheet_link_tag :app %>
+  </head>
+  <body>
+    <p class="notice"><%= notice %></p>
+    <%= yield %>
+  </body>
+</html>
+""")
+
+    routes = ["Rails.application.routes.draw do"]
+    for i in range(n_models):
+        singular, plural, _ = _names(i)
+        _write(root / f"app/models/{singular}.rb", _model(i))
+        _write(root / f"app/controllers/{plural}_controller.rb", _controller(i))
+        for name, content in _views(i).items():
+            _write(root / f"app/views/{plural}/{name}", content)
+        routes.append(f"  resources :{plural}")
+    routes.append('  root "item0s#index"')
+    routes.append("end")
+    _write(root / "config/routes.rb", "\n".join(routes) + "\n")
+    _write(root / "db/schema.rb", _schema(n_models))
+    return root
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic Rails app generator")
+    parser.add_argument("--models", type=int, default=10)
+    parser.add_argument("--output", required=True)
+    args = parser.parse_args()
+    print(f"Generated {generate_rails_app(args.output, args.models)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,37 +1,89 @@
 import argparse
 import logging
-from datetime import datetime
-from agent.graph import run_conversion_pipeline
+from agent.graph import CHECKPOINT_DB, run_conversion_pipeline
+from agent.batch import run_batch
+from agent.tools.log_utils import setup_logging
 from agent.tools.env_loader import load_env
 
 
-def setup_logging():
-    """Налаштовуємо розширене логування в консоль і файл"""
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M")
-    log_file = f"logs/run_{timestamp}.log"
-    logging.basicConfig(
-        level=logging.DEBUG,
-        format="%(asctime)s [%(levelname)s] %(message)s",
-        handlers=[
-            logging.FileHandler(log_file, encoding="utf-8"),
-            logging.StreamHandler()
-        ]
-    )
-    logging.info(f"🧠 Логування активовано → {log_file}")
-    return log_file
-
-
 def main():
     load_env()  # зчитуємо .env і виводимо ключові параметри
     log_path = setup_logging()
 
     parser = argparse.ArgumentParser(description="Rails → Django LLM Converter")
-    parser.add_argument("--input", required=True, help="Шлях до Rails-проєкту")
-    parser.add_argument("--output", required=True, help="Шлях для Django-виводу")
+    parser.add_argument("--input", help="Шлях до Rails-проєкту")
+    parser.add_argument("--output", help="Шлях для Django-виводу")
+    parser.add_argument("--batch", help="JSON-маніфест з парами input/output для пакетної конвертації")
+    parser.add_argument("--batch-report", default="batch_report.json", help="Зведений звіт пакетного запуску")
+    parser.add_argument("--projects-parallel", type=int, default=4, help="Проєкти, що конвертуються одночасно")
+    parser.add_argument("--max-in-flight", type=int, default=16,
+                        help="Глобальний ліміт одночасних LLM-запитів у пакетному режимі")
+    parser.add_argument("--cache-dir", default=".llm_cache", help="Директорія кешу LLM-відповідей")
+    parser.add_argument("--no-cache", action="store_true", help="Вимкнути кеш LLM-відповідей")
+    parser.add_argument("--convert-mode", choices=["single", "chunked"], default="single",
+                        help="single — один промпт на весь проєкт, chunked — окремо на кожну сутність")
+    parser.add_argument("--workers", type=int, default=4, help="Паралельні LLM-виклики у chunked-режимі")
+    parser.add_argument("--full", action="store_true",
+                        help="Ігнорувати маніфест і перетворити весь проєкт заново")
+    parser.add_argument("--stream", action="store_true",
+                        help="Стрімити план і записувати apps, щойно вони згенеровані (режим single)")
+    parser.add_argument("--no-validate", action="store_true",
+                        help="Не перевіряти згенерований проєкт (check + makemigrations --dry-run)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Профілювання вузлів і LLM-викликів: таблиця в лозі + Chrome trace (Perfetto)")
+    parser.add_argument("--checkpoint-db", default=CHECKPOINT_DB,
+                        help="SQLite-файл чекпойнтів стану після кожного вузла ({run_id} — id запуску)")
+    parser.add_argument("--no-checkpoint", action="store_true", help="Не зберігати чекпойнти")
+    parser.add_argument("--resume", metavar="RUN_ID",
+                        help="Продовжити запуск RUN_ID з останнього успішного вузла")
+    parser.add_argument("--from-node", help="Разом з --resume: перезапустити, починаючи з вузла (напр. converter)")
+    parser.add_argument("--timeout", type=float, help="Ліміт часу на конверсію, с (потім її можна продовжити --resume)")
     args = parser.parse_args()
+    if args.from_node and not args.resume:
+        parser.error("--from-node потребує --resume RUN_ID")
+    if args.resume and args.no_checkpoint:
+        parser.error("--resume несумісний з --no-checkpoint")
+    if not args.batch and not args.resume and not (args.input and args.output):
+        parser.error("потрібні --input і --output (або --batch / --resume)")
+
+    if args.batch:
+        logging.info("🚀 Пакетний запуск конвертера...")
+        report = run_batch(
+            args.batch,
+            report_path=args.batch_report,
+            projects_parallel=args.projects_parallel,
+            max_in_flight=args.max_in_flight,
+            cache_dir=args.cache_dir,
+            use_cache=not args.no_cache,
+            convert_mode=args.convert_mode,
+            max_workers=args.workers,
+            incremental=not args.full,
+            stream_plan=args.stream,
+            validate=not args.no_validate,
+        )
+        if report["failed"]:
+            raise SystemExit(1)
+        return
 
     logging.info("🚀 Запуск конвертера...")
-    run_conversion_pipeline(args.input, args.output, log_path)
+    run_conversion_pipeline(
+        args.input,
+        args.output,
+        log_path,
+        cache_dir=args.cache_dir,
+        use_cache=not args.no_cache,
+        convert_mode=args.convert_mode,
+        max_workers=args.workers,
+        incremental=not args.full,
+        stream_plan=args.stream,
+        validate=not args.no_validate,
+        profile_path=str(log_path.with_suffix(".profile.json")) if args.profile else None,
+        checkpoint_db=None if args.no_checkpoint else args.checkpoint_db,
+        run_id=args.resume,
+        resume=bool(args.resume),
+        from_node=args.from_node,
+        timeout=args.timeout,
+    )
     logging.info("✅ Конверсія завершена успішно!")
 
 